@@ -3,23 +3,28 @@ from pathlib import Path
 root_dir = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(root_dir))
 
-from google.adk import Agent
-import google.generativeai as genai
+from shared.clients import LazyClient, get_gemini_model
+from shared.query_cache import QueryCache
+from shared.query_planner import plan_task, negotiate_locally, sanitize_plan
 from dotenv import load_dotenv
-import os
 import json
+import os
 
 load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-gemini_model = genai.GenerativeModel('gemini-2.0-flash-exp')
+gemini_model = LazyClient(get_gemini_model)
 
-def plan_execution(task_description: str) -> dict:
-    """
-    Agent Planning - Analyzes task and creates execution plan.
-    Decides which agents to use and in what order.
-    """
-    print(f"\n🧠 PLANNING: {task_description}")
-    
+# "rules": local planner, Gemini only for tasks it can't place; "llm": always Gemini
+COORDINATOR_PLANNER = os.getenv("COORDINATOR_PLANNER", "rules")
+
+# Plans depend only on the task text, so they outlive memory writes
+plan_cache = QueryCache(
+    max_size=int(os.getenv("PLAN_CACHE_SIZE", "1000")),
+    ttl=float(os.getenv("PLAN_CACHE_TTL", "3600")),
+    track_index_generation=False
+)
+
+def plan_execution_llm(task_description: str) -> dict:
+    """Ask Gemini for an execution plan."""
     planning_prompt = f"""You are an AI Agent Coordinator. Analyze this task and create an execution plan.
 
 TASK: {task_description}
@@ -50,21 +55,48 @@ Respond ONLY with valid JSON."""
     if '```json' in plan_text:
         plan_text = plan_text.split('```json')[1].split('```')[0].strip()
     
-    plan = json.loads(plan_text)
+    return json.loads(plan_text)
+
+def plan_execution(task_description: str, planner: str = None) -> dict:
+    """
+    Agent Planning - Analyzes task and creates execution plan.
+    Decides which agents to use and in what order.
+    
+    Plans come from the local rule-based planner unless planner is "llm" or
+    the rules can't place the task; Gemini failures fall back to the rule
+    plan, and invalid fields in a Gemini plan to the rule plan's values. Plans are cached by normalized task text. The path taken is
+    recorded under "planner".
+    """
+    print(f"\n🧠 PLANNING: {task_description}")
+    planner = planner or COORDINATOR_PLANNER
+    
+    cached = plan_cache.get(f"{planner}:{task_description}")
+    if cached is not None:
+        print(f"   ⚡ Plan from cache ({cached['planner']})")
+        return cached
+    
+    plan, confident = plan_task(task_description)
+    if planner == "rules" and confident:
+        plan["planner"] = "rules"
+    else:
+        try:
+            plan = {**sanitize_plan(plan_execution_llm(task_description), plan), "planner": "llm" if planner == "llm" else "llm_fallback"}
+        except Exception as e:
+            print(f"   ⚠️  LLM planning failed, using rule plan: {str(e)}")
+            plan["planner"] = "rules_fallback"
     
     print(f"   📋 Task Type: {plan['task_type']}")
     print(f"   🤖 Agents: {', '.join(plan['agents_required'])}")
     print(f"   ⚡ Strategy: {plan['execution_strategy']}")
     print(f"   📊 Complexity: {plan['estimated_complexity']}")
     
+    if plan["planner"] != "rules_fallback":
+        # A failed Gemini call shouldn't pin the fallback plan for the whole TTL
+        plan_cache.put(f"{planner}:{task_description}", plan)
     return plan
 
-def negotiate_resources(agents: list, task_complexity: str) -> dict:
-    """
-    Agent Negotiation - Agents negotiate resources and priorities.
-    """
-    print(f"\n🤝 NEGOTIATING: {len(agents)} agents for {task_complexity} complexity task")
-    
+def negotiate_resources_llm(agents: list, task_complexity: str) -> dict:
+    """Ask Gemini to negotiate resource allocation between agents."""
     negotiation_prompt = f"""Agents are negotiating resource allocation.
 
 AGENTS INVOLVED: {', '.join(agents)}
@@ -89,19 +121,43 @@ Return JSON:
     if '```json' in result_text:
         result_text = result_text.split('```json')[1].split('```')[0].strip()
     
-    negotiation = json.loads(result_text)
+    return json.loads(result_text)
+
+def negotiate_resources(agents: list, task_complexity: str, planner: str = None) -> dict:
+    """
+    Agent Negotiation - Agents negotiate resources and priorities.
+    Uses the local priority rules unless planner is "llm" (Gemini, with the
+    rules as fallback).
+    """
+    print(f"\n🤝 NEGOTIATING: {len(agents)} agents for {task_complexity} complexity task")
+    planner = planner or COORDINATOR_PLANNER
+    
+    negotiation = negotiate_locally(agents, task_complexity)
+    if planner == "llm":
+        try:
+            negotiation = negotiate_resources_llm(agents, task_complexity)
+        except Exception as e:
+            print(f"   ⚠️  LLM negotiation failed, using rules: {str(e)}")
     
     print(f"   👑 Primary: {negotiation['primary_agent']}")
     print(f"   🔧 Support: {', '.join(negotiation['support_agents'])}")
     
     return negotiation
 
-# Create coordinator agent
-coordinator_agent = Agent(
-    model='gemini-2.0-flash-exp',
-    name='coordinator_agent',
-    description='Intelligent coordinator that plans tasks and coordinates multiple agents',
-    tools=[plan_execution, negotiate_resources]
-)
+def create_coordinator_agent():
+    """Build the ADK coordinator agent (google.adk is only imported when needed)"""
+    from google.adk import Agent
+    return Agent(
+        model='gemini-2.0-flash-exp',
+        name='coordinator_agent',
+        description='Intelligent coordinator that plans tasks and coordinates multiple agents',
+        tools=[plan_execution, negotiate_resources]
+    )
+
+def __getattr__(name):
+    if name == "coordinator_agent":
+        globals()["coordinator_agent"] = create_coordinator_agent()
+        return globals()["coordinator_agent"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 print("✅ Coordinator Agent initialized")
\ No newline at end of file
@@ -1,80 +1,103 @@
 # REMOVE the sys.path manipulation block entirely
 
-from google.adk import Agent
-from shared.pinecone_client import PineconeClient
+from shared.clients import LazyClient, get_memory_store, get_gemini_model, GEMINI_POOL_SIZE
 from shared.embeddings import get_query_embedding
-import google.generativeai as genai
+from shared.aggregates import get_corpus_stats
 from dotenv import load_dotenv
-import os
 from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import json  # <-- add this
 
 
 load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-gemini_model = genai.GenerativeModel('gemini-2.0-flash-exp')
-db = PineconeClient()
+gemini_model = LazyClient(get_gemini_model)
+db = LazyClient(get_memory_store)
 
-def find_cross_conversation_patterns(topic: str, min_occurrences: int = 3) -> dict:
+def get_corpus_distribution() -> dict:
     """
-    NOVEL FEATURE: Find patterns across ALL conversations.
-    
-    Analyzes multiple audio files to find:
-    - Recurring topics
-    - Decision evolution over time
-    - Speaker patterns
-    - Timeline of discussions
+    Speaker, file, time and duration distributions over the whole corpus.
+    Served from the ingest-time aggregates: one document read, no vector scan.
     """
-    print(f"\n🔍 CROSS-CONVERSATION ANALYSIS: {topic}")
-    print(f"   Searching across ALL memories for patterns...")
-    
-    # Get many results to analyze patterns
-    query_embedding = get_query_embedding(topic)
-    matches = db.search(query_embedding, top_k=50)  # Get many results
+    print(f"\n📊 CORPUS DISTRIBUTION")
+    stats = get_corpus_stats()
+    print(f"   ✅ {stats['total_files']} files, {stats['total_segments']} segments")
+    return stats
+
+# Search depths of the two analyses; the combined operation searches once at the larger one
+PATTERN_TOP_K = 50
+EVOLUTION_TOP_K = 30
+
+# Background pattern analyses of get_full_insights (one per in-flight request);
+# sized like the gemini pool, which bounds the calls themselves
+insights_executor = ThreadPoolExecutor(max_workers=GEMINI_POOL_SIZE, thread_name_prefix="recallos-insights")
+
+def group_matches(matches: list) -> dict:
+    """
+    Group search matches by file and speaker and build the timeline in one pass.
     
-    # Group by file_id and speaker
+    Returns:
+        Dictionary with by_file, by_speaker, by_time (match order) and
+        timeline (the first EVOLUTION_TOP_K matches, chronological)
+    """
     by_file = defaultdict(list)
     by_speaker = defaultdict(list)
     by_time = []
+    timeline = []
     
-    for match in matches:
+    for rank, match in enumerate(matches):
         metadata = match.metadata
+        text = metadata.get('text', '')
         file_id = metadata.get('file_id', 'unknown')
         speaker = metadata.get('speaker', 'Unknown')
         timestamp = metadata.get('timestamp_start', 0)
+        created_at = metadata.get('created_at', '')
         
         by_file[file_id].append({
-            'text': metadata.get('text', ''),
+            'text': text,
             'score': match.score,
             'timestamp': timestamp,
             'speaker': speaker
         })
         
         by_speaker[speaker].append({
-            'text': metadata.get('text', ''),
+            'text': text,
             'file_id': file_id,
             'timestamp': timestamp
         })
         
         by_time.append({
-            'text': metadata.get('text', ''),
+            'text': text,
             'file_id': file_id,
             'speaker': speaker,
             'timestamp': timestamp,
-            'created_at': metadata.get('created_at', '')
+            'created_at': created_at
         })
+        
+        if rank < EVOLUTION_TOP_K:
+            timeline.append({
+                'text': text,
+                'created_at': created_at,
+                'speaker': speaker,
+                'file_id': file_id,
+                'score': match.score
+            })
     
-    # Analyze patterns with Gemini
-    analysis_prompt = f"""Analyze these cross-conversation patterns about "{topic}":
+    timeline.sort(key=lambda x: x['created_at'])
+    return {'by_file': by_file, 'by_speaker': by_speaker, 'by_time': by_time, 'timeline': timeline}
+
+def build_patterns_prompt(topic: str, grouped: dict, corpus: dict, speaker_share: dict) -> str:
+    by_file, by_speaker, by_time = grouped['by_file'], grouped['by_speaker'], grouped['by_time']
+    return f"""Analyze these cross-conversation patterns about "{topic}":
 
-FILES ANALYZED: {len(by_file)}
-TOTAL MENTIONS: {len(matches)}
+FILES ANALYZED: {len(by_file)} of {corpus.get('total_files', 'unknown')} in the corpus
+TOTAL MENTIONS: {len(by_time)} of {corpus.get('total_segments', 'unknown')} segments in the corpus
 SPEAKERS: {list(by_speaker.keys())}
 
 PATTERN DATA:
 {json.dumps({
     'by_file': {k: len(v) for k, v in by_file.items()},
     'by_speaker': {k: len(v) for k, v in by_speaker.items()},
+    'share_of_speaker_segments': speaker_share,
     'sample_mentions': [m['text'][:100] for m in by_time[:5]]
 }, indent=2)}
 
@@ -87,24 +110,89 @@ PROVIDE INSIGHTS:
 
 Format as structured JSON with actionable insights."""
 
-    response = gemini_model.generate_content(analysis_prompt)
-    insights_text = response.text.strip()
-    
-    print(f"   📊 Analyzed {len(by_file)} conversations")
-    print(f"   👥 {len(by_speaker)} speakers found")
-    print(f"   💬 {len(matches)} relevant segments")
-    
+def build_evolution_prompt(topic: str, timeline: list) -> str:
+    return f"""Analyze how discussion about "{topic}" has evolved:
+
+TIMELINE DATA (chronological):
+{json.dumps(timeline, indent=2)}
+
+PROVIDE:
+1. Early discussion points
+2. Mid-term developments
+3. Recent conclusions
+4. Overall trajectory
+5. Key inflection points
+
+Return structured analysis."""
+
+def corpus_context(grouped: dict) -> tuple:
+    """Corpus totals (one aggregates read) and each speaker's topic share of their segments"""
+    try:
+        corpus = get_corpus_stats(top_files=0)
+    except Exception as e:
+        print(f"   ⚠️  Corpus aggregates unavailable: {str(e)}")
+        corpus = {}
+    corpus_speakers = corpus.get('speaker_distribution', {})
+    speaker_share = {
+        k: round(len(v) / corpus_speakers[k], 3)
+        for k, v in grouped['by_speaker'].items() if corpus_speakers.get(k)
+    }
+    return corpus, speaker_share
+
+def patterns_result(topic: str, grouped: dict, corpus: dict, speaker_share: dict, insights_text: str) -> dict:
+    by_file, by_speaker, by_time = grouped['by_file'], grouped['by_speaker'], grouped['by_time']
     return {
         'topic': topic,
         'conversations_analyzed': len(by_file),
-        'total_mentions': len(matches),
+        'total_mentions': len(by_time),
         'speakers': list(by_speaker.keys()),
         'speaker_distribution': {k: len(v) for k, v in by_speaker.items()},
         'file_distribution': {k: len(v) for k, v in by_file.items()},
+        'speaker_share': speaker_share,
+        'corpus_files': corpus.get('total_files', 0),
+        'corpus_segments': corpus.get('total_segments', 0),
         'insights': insights_text,
         'timeline': sorted(by_time, key=lambda x: x.get('created_at', ''))[:10]
     }
 
+def evolution_result(topic: str, timeline: list, evolution_text: str) -> dict:
+    return {
+        'topic': topic,
+        'timeline_points': len(timeline),
+        'evolution_analysis': evolution_text,
+        'chronological_data': timeline
+    }
+
+def find_cross_conversation_patterns(topic: str, min_occurrences: int = 3) -> dict:
+    """
+    NOVEL FEATURE: Find patterns across ALL conversations.
+    
+    Analyzes multiple audio files to find:
+    - Recurring topics
+    - Decision evolution over time
+    - Speaker patterns
+    - Timeline of discussions
+    """
+    print(f"\n🔍 CROSS-CONVERSATION ANALYSIS: {topic}")
+    print(f"   Searching across ALL memories for patterns...")
+    
+    # Get many results to analyze patterns
+    query_embedding = get_query_embedding(topic)
+    matches = db.search(query_embedding, top_k=PATTERN_TOP_K)
+    
+    grouped = group_matches(matches)
+    corpus, speaker_share = corpus_context(grouped)
+    
+    # Analyze patterns with Gemini
+    response = gemini_model.generate_content(build_patterns_prompt(topic, grouped, corpus, speaker_share))
+    insights_text = response.text.strip()
+    
+    print(f"   📊 Analyzed {len(grouped['by_file'])} conversations")
+    print(f"   👥 {len(grouped['by_speaker'])} speakers found")
+    print(f"   💬 {len(matches)} relevant segments")
+    
+    return patterns_result(topic, grouped, corpus, speaker_share, insights_text)
+
 def get_topic_evolution(topic: str) -> dict:
     """
     Track how discussion about a topic has evolved over time.
@@ -112,54 +200,66 @@ def get_topic_evolution(topic: str) -> dict:
     print(f"\n📈 TOPIC EVOLUTION: {topic}")
     
     query_embedding = get_query_embedding(topic)
-    matches = db.search(query_embedding, top_k=30)
+    matches = db.search(query_embedding, top_k=EVOLUTION_TOP_K)
+    timeline = group_matches(matches)['timeline']
     
-    # Sort by time
-    timeline = []
-    for match in matches:
-        metadata = match.metadata
-        timeline.append({
-            'text': metadata.get('text', ''),
-            'created_at': metadata.get('created_at', ''),
-            'speaker': metadata.get('speaker', 'Unknown'),
-            'file_id': metadata.get('file_id', 'unknown'),
-            'score': match.score
-        })
+    # Analyze evolution
+    response = gemini_model.generate_content(build_evolution_prompt(topic, timeline))
     
-    timeline.sort(key=lambda x: x['created_at'])
+    print(f"   ✅ Tracked {len(timeline)} mentions over time")
     
-    # Analyze evolution
-    evolution_prompt = f"""Analyze how discussion about "{topic}" has evolved:
-
-TIMELINE DATA (chronological):
-{json.dumps(timeline, indent=2)}
-
-PROVIDE:
-1. Early discussion points
-2. Mid-term developments
-3. Recent conclusions
-4. Overall trajectory
-5. Key inflection points
-
-Return structured analysis."""
+    return evolution_result(topic, timeline, response.text)
 
-    response = gemini_model.generate_content(evolution_prompt)
+def get_full_insights(topic: str) -> dict:
+    """
+    Cross-conversation patterns and topic evolution from a single retrieval.
     
-    print(f"   ✅ Tracked {len(timeline)} mentions over time")
+    Embeds and searches once at PATTERN_TOP_K; the grouping and the
+    chronological timeline (the best EVOLUTION_TOP_K matches, as
+    get_topic_evolution would fetch) come from the same result set, and the
+    two Gemini analyses run concurrently: the pattern analysis on
+    insights_executor, the evolution analysis on the calling thread.
+    
+    Returns:
+        Dictionary with topic, patterns (as find_cross_conversation_patterns)
+        and evolution (as get_topic_evolution)
+    """
+    print(f"\n🔍📈 FULL INSIGHTS: {topic}")
+    
+    query_embedding = get_query_embedding(topic)
+    matches = db.search(query_embedding, top_k=max(PATTERN_TOP_K, EVOLUTION_TOP_K))
+    
+    grouped = group_matches(matches)
+    corpus, speaker_share = corpus_context(grouped)
+    
+    patterns_future = insights_executor.submit(
+        gemini_model.generate_content, build_patterns_prompt(topic, grouped, corpus, speaker_share)
+    )
+    evolution_text = gemini_model.generate_content(build_evolution_prompt(topic, grouped['timeline'])).text
+    insights_text = patterns_future.result().text.strip()
+    
+    print(f"   📊 {len(grouped['by_file'])} conversations, {len(matches)} segments, {len(grouped['timeline'])} timeline points")
     
     return {
         'topic': topic,
-        'timeline_points': len(timeline),
-        'evolution_analysis': response.text,
-        'chronological_data': timeline
+        'patterns': patterns_result(topic, grouped, corpus, speaker_share, insights_text),
+        'evolution': evolution_result(topic, grouped['timeline'], evolution_text)
     }
 
-# Create insights agent
-insights_agent = Agent(
-    model='gemini-2.0-flash-exp',
-    name='insights_agent',
-    description='Finds patterns and insights across multiple conversations - NOVEL FEATURE',
-    tools=[find_cross_conversation_patterns, get_topic_evolution]
-)
+def create_insights_agent():
+    """Build the ADK insights agent (google.adk is only imported when needed)"""
+    from google.adk import Agent
+    return Agent(
+        model='gemini-2.0-flash-exp',
+        name='insights_agent',
+        description='Finds patterns and insights across multiple conversations - NOVEL FEATURE',
+        tools=[find_cross_conversation_patterns, get_topic_evolution, get_full_insights, get_corpus_distribution]
+    )
+
+def __getattr__(name):
+    if name == "insights_agent":
+        globals()["insights_agent"] = create_insights_agent()
+        return globals()["insights_agent"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 print("✅ Insights Agent initialized (Cross-Conversation Analysis)")
\ No newline at end of file
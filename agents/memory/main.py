@@ -4,13 +4,15 @@ root_dir = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(root_dir))
 
 from google.adk import Agent
-from shared.pinecone_client import PineconeClient
+from shared.clients import LazyClient, get_memory_store
 from shared.embeddings import get_document_embedding, get_query_embedding
+from shared.indexing import index_stored_vectors, unindex_vectors
+from shared.query_cache import bump_index_generation
 import uuid
 from datetime import datetime
 
-# Initialize database
-db = PineconeClient()
+# Shared database client (Pinecone or local, per VECTOR_BACKEND), built on first use
+db = LazyClient(get_memory_store)
 
 def store_memory(text: str, metadata: dict = None) -> dict:
     """
@@ -37,6 +39,8 @@ def store_memory(text: str, metadata: dict = None) -> dict:
         embedding=embedding,
         metadata=full_metadata
     )
+    bump_index_generation()
+    index_stored_vectors([{"id": memory_id, "embedding": embedding, "metadata": full_metadata}], [{"chunk": 0, "stored": 1}], 1)
     
     print(f"✅ Stored memory: {memory_id} - {text[:50]}...")
     return {
@@ -45,6 +49,26 @@ def store_memory(text: str, metadata: dict = None) -> dict:
         "text": text[:100]
     }
 
+def delete_memory(memory_id: str) -> dict:
+    """
+    Delete a memory from the vector database and the keyword index.
+    
+    Args:
+        memory_id: ID returned by store_memory
+    
+    Returns:
+        Dictionary with deletion confirmation
+    """
+    db.delete(memory_id)
+    bump_index_generation()
+    unindex_vectors([memory_id])
+    
+    print(f"🗑️  Deleted memory: {memory_id}")
+    return {
+        "id": memory_id,
+        "status": "deleted"
+    }
+
 def search_memory(query: str, top_k: int = 5) -> dict:
     """
     Search for similar memories using semantic search.
@@ -21,15 +21,29 @@ insights_module = importlib.util.module_from_spec(insights_spec)
 insights_spec.loader.exec_module(insights_module)
 find_cross_conversation_patterns = insights_module.find_cross_conversation_patterns
 get_topic_evolution = insights_module.get_topic_evolution
+get_corpus_distribution = insights_module.get_corpus_distribution
+get_full_insights = insights_module.get_full_insights
 
 # Now import everything else
-from google.adk import Agent
-from shared.pinecone_client import PineconeClient
-from shared.embeddings import get_document_embedding, get_query_embedding
-from shared.google_services import upload_to_storage, save_session, get_session, log_agent_action
-from google.cloud import speech
-import google.generativeai as genai
+from shared.clients import LazyClient, get_memory_store, get_transcriber, get_gemini_model
+from shared.embeddings import get_document_embedding, get_query_embedding, get_document_embeddings, async_get_query_embedding
+from shared.google_services import (
+    upload_to_storage, save_session, log_agent_action, record_session_query, flush_session_writes,
+    hash_file, claim_content_hash, update_content_hash, storage_path_for
+)
+from shared.query_cache import QueryCache, bump_index_generation, get_index_generation
+from shared.query_classifier import classify_query, sanitize_query_params, MAX_SEARCH_DEPTH
+from shared.chunking import chunk_segments, iter_chunks
+from shared.pipeline import run_pipeline, batched
+from shared.aggregates import IngestAggregate
+from shared.topics import topic_map
+from shared.lexical_index import lexical_index, reciprocal_rank_fusion
+from shared.indexing import index_stored_vectors
+from shared.vector_store import VectorMatch
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import numpy as np
 import os
 import uuid
 from datetime import datetime
@@ -38,113 +52,61 @@ import time
 
 load_dotenv()
 
-# Initialize all clients
-db = PineconeClient()
-os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", "/app/speech-key.json")
-speech_client = speech.SpeechClient()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-gemini_model = genai.GenerativeModel('gemini-2.0-flash-exp')
+# Clients are built on first use and shared with the coordinator/insights modules
+db = LazyClient(get_memory_store)
+transcriber = LazyClient(get_transcriber)
+gemini_model = LazyClient(get_gemini_model)
+
+# Bulk ingestion settings
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "100"))
+UPSERT_MAX_RETRIES = int(os.getenv("UPSERT_MAX_RETRIES", "3"))
+
+# "pipelined": embed and upsert chunks while transcription is still running; "sequential": one stage at a time
+INGEST_MODE = os.getenv("INGEST_MODE", "pipelined")
+# Chunks per embedding request in pipelined mode, and whole-file attempts
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "32"))
+INGEST_MAX_RETRIES = 3
+
+# "dense": vector search only; "hybrid": BM25 and vector results fused by reciprocal rank.
+# The BM25 index lives on each instance's local disk (LEXICAL_INDEX_PATH) and only sees
+# what that instance ingested, while Pinecone is shared: enable hybrid on multi-instance
+# or freshly started deployments only after POST /search/reindex has rebuilt it
+SEARCH_MODE = os.getenv("SEARCH_MODE", "dense")
+# Candidates taken from each ranking before fusion, and the RRF rank constant
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+RRF_K = 60
+
+# Answers to repeated queries, invalidated whenever new vectors are stored
+query_cache = QueryCache()
 
+# "heuristic": local classifier, Gemini only for undecided queries; "llm": always Gemini
+QUERY_ANALYZER = os.getenv("QUERY_ANALYZER", "heuristic")
+
+# "concurrent": search speculatively at max depth while the query is analyzed; "sequential": old behaviour
+QUERY_EXECUTION_MODE = os.getenv("QUERY_EXECUTION_MODE", "concurrent")
+query_executor = ThreadPoolExecutor(max_workers=int(os.getenv("QUERY_WORKERS", "8")), thread_name_prefix="recallos-query")
 
 
 # ==================== TRANSCRIPTION FUNCTIONS ====================
 
-def transcribe_audio(audio_path: str, gcs_uri: str = None) -> dict:
+def transcribe_audio(audio_path: str, gcs_uri: str = None, mode: str = None) -> dict:
     """
-    Transcribe audio using Google Cloud Speech-to-Text.
-    If gcs_uri provided, use long-running operation for large files.
+    Transcribe audio with the configured backend (TRANSCRIPTION_BACKEND).
+    The Google backend uses a long-running operation when gcs_uri is given and,
+    in "chunked" mode, transcribes long audio as parallel overlapping windows.
     """
     print(f"🎙️ Transcribing: {audio_path}")
     
     try:
-        # If GCS URI provided, use long-running operation (no size limit)
-        if gcs_uri:
-            print(f"   Using GCS URI: {gcs_uri}")
-            
-            audio = speech.RecognitionAudio(uri=gcs_uri)
-            
-            diarization_config = speech.SpeakerDiarizationConfig(
-                enable_speaker_diarization=True,
-                min_speaker_count=1,
-                max_speaker_count=4,
-            )
-            
-            config = speech.RecognitionConfig(
-                encoding=speech.RecognitionConfig.AudioEncoding.MP3,
-                language_code="en-US",
-                enable_word_time_offsets=True,
-                enable_automatic_punctuation=True,
-                diarization_config=diarization_config,
-                model="latest_long",
-            )
-            
-            print("   Starting long-running transcription...")
-            operation = speech_client.long_running_recognize(config=config, audio=audio)
-            print("   Waiting for operation to complete...")
-            response = operation.result(timeout=300)
-            
-        else:
-            # For small files, use synchronous recognition
-            with open(audio_path, "rb") as audio_file:
-                content = audio_file.read()
-            
-            audio = speech.RecognitionAudio(content=content)
-            
-            diarization_config = speech.SpeakerDiarizationConfig(
-                enable_speaker_diarization=True,
-                min_speaker_count=1,
-                max_speaker_count=4,
-            )
-            
-            config = speech.RecognitionConfig(
-                encoding=speech.RecognitionConfig.AudioEncoding.MP3,
-                language_code="en-US",
-                enable_word_time_offsets=True,
-                enable_automatic_punctuation=True,
-                diarization_config=diarization_config,
-                model="latest_long",
-            )
-            
-            print("   Sending to Google Speech API...")
-            response = speech_client.recognize(config=config, audio=audio)
-        
-        # Extract results (same for both methods)
-        full_text = ""
-        segments = []
-        
-        for i, result in enumerate(response.results):
-            alternative = result.alternatives[0]
-            full_text += alternative.transcript + " "
-            
-            if alternative.words:
-                segment_text = alternative.transcript
-                start_time = alternative.words[0].start_time.total_seconds()
-                end_time = alternative.words[-1].end_time.total_seconds()
-                speaker_tag = getattr(alternative.words[0], 'speaker_tag', 1)
-                
-                segments.append({
-                    "text": segment_text,
-                    "start": start_time,
-                    "end": end_time,
-                    "speaker": f"Speaker {speaker_tag}"
-                })
+        result = transcriber.transcribe(audio_path, gcs_uri=gcs_uri, mode=mode)
         
-        duration = segments[-1]["end"] if segments else 0
-        
-        result = {
-            "text": full_text.strip(),
-            "segments": segments,
-            "language": "en",
-            "duration": duration
-        }
-        
-        print(f"✅ Transcribed {len(segments)} segments ({duration:.1f}s)")
+        print(f"✅ Transcribed {len(result['segments'])} segments ({result['duration']:.1f}s)")
         return result
         
     except Exception as e:
         import traceback
         traceback.print_exc()
-        return {"error": f"Google Speech transcription failed: {str(e)}"}
+        return {"error": f"Transcription failed: {str(e)}"}
 
 # ==================== MEMORY FUNCTIONS ====================
 
@@ -164,6 +126,8 @@ def store_memory(text: str, metadata: dict = None) -> dict:
         embedding=embedding,
         metadata=full_metadata
     )
+    bump_index_generation()
+    index_stored_vectors([{"id": memory_id, "embedding": embedding, "metadata": full_metadata}], [{"chunk": 0, "stored": 1}], 1)
     
     print(f"✅ Stored memory: {memory_id} - {text[:50]}...")
     return {
@@ -172,11 +136,57 @@ def store_memory(text: str, metadata: dict = None) -> dict:
         "text": text[:100]
     }
 
-def search_memory(query: str, top_k: int = 5) -> dict:
-    """Search for similar memories using semantic search."""
-    query_embedding = get_query_embedding(query)
-    matches = db.search(query_embedding, top_k=top_k)
+def store_memories_batch(texts: list, metadatas: list, batch_size: int = None, ids: list = None) -> dict:
+    """
+    Store many memory chunks at once: batched embeddings, chunked upserts.
+    
+    Args:
+        texts: Text content for each memory
+        metadatas: Metadata dict for each memory (same order as texts)
+        batch_size: Vectors per upsert request (defaults to UPSERT_BATCH_SIZE)
+        ids: Vector IDs (same order as texts); stable IDs make re-ingesting
+            overwrite earlier vectors. Random IDs are generated if omitted.
+    
+    Returns:
+        Dictionary with stored/failed totals and a report per upsert chunk
+    """
+    batch_size = batch_size or UPSERT_BATCH_SIZE
+    created_at = datetime.now().isoformat()
+    
+    embeddings = get_document_embeddings(texts)
+    ids = ids or [f"mem_{uuid.uuid4().hex[:8]}" for _ in texts]
     
+    vectors = [{
+        "id": id,
+        "embedding": embedding,
+        "metadata": {
+            "text": text,
+            "created_at": created_at,
+            **(metadata or {})
+        }
+    } for id, text, embedding, metadata in zip(ids, texts, embeddings, metadatas)]
+    
+    chunks = db.store_batch_chunked(vectors, batch_size=batch_size, max_retries=UPSERT_MAX_RETRIES)
+    index_stored_vectors(vectors, chunks, batch_size)
+    
+    for report in chunks:
+        if report["failed"]:
+            log_agent_action('memory', 'chunk_failed', report)
+    
+    stored = sum(r["stored"] for r in chunks)
+    failed = sum(r["failed"] for r in chunks)
+    if stored:
+        bump_index_generation()
+    
+    print(f"✅ Stored {stored} memories in {len(chunks)} upserts ({failed} failed)")
+    return {
+        "stored": stored,
+        "failed": failed,
+        "chunks": chunks
+    }
+
+def format_search_results(query: str, matches: list) -> dict:
+    """Turn vector store matches into the search_memory result shape."""
     results = [{
         "id": match.id,
         "score": match.score,
@@ -194,10 +204,79 @@ def search_memory(query: str, top_k: int = 5) -> dict:
         "query": query
     }
 
+def use_hybrid_search(mode: str = None) -> bool:
+    return (mode or SEARCH_MODE) == "hybrid" and lexical_index.count > 0
+
+def fuse_rankings(dense_matches: list, lexical_hits: list) -> tuple:
+    """
+    Reciprocal-rank fusion of the dense and BM25 rankings.
+    
+    Returns:
+        (ids, missing): every fused id, best first, and those only the
+        lexical ranking found (their metadata still has to be fetched)
+    """
+    fused = reciprocal_rank_fusion(
+        [[m.id for m in dense_matches], [id for id, _ in lexical_hits]], k=RRF_K
+    )
+    dense_ids = {m.id for m in dense_matches}
+    ids = [id for id, _ in fused]
+    return ids, [id for id in ids if id not in dense_ids]
+
+def assemble_matches(ids: list, dense_matches: list, fetched: list, query_embedding: list, top_k: int) -> list:
+    """
+    The top_k matches in fused order. Lexical-only hits are scored by cosine
+    against the query too, so every result's score means the same thing;
+    ids the store no longer has (deleted since they were indexed) are skipped
+    before truncating, so they never take a result slot.
+    """
+    by_id = {m.id: m for m in dense_matches}
+    if fetched:
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        for v in fetched:
+            embedding = np.asarray(v["embedding"], dtype=np.float32)
+            score = float(embedding @ query / (np.linalg.norm(embedding) or 1.0))
+            by_id[v["id"]] = VectorMatch(v["id"], score, v["metadata"])
+    return [by_id[id] for id in ids if id in by_id][:top_k]
+
+def search_memory(query: str, top_k: int = 5, mode: str = None) -> dict:
+    """
+    Search memories.
+    "hybrid" mode (SEARCH_MODE) fuses BM25 and vector results so exact names,
+    numbers and jargon rank well; "dense" is semantic search only.
+    """
+    query_embedding = get_query_embedding(query)
+    if not use_hybrid_search(mode):
+        matches = db.search(query_embedding, top_k=top_k)
+        return format_search_results(query, matches)
+    
+    depth = max(top_k, HYBRID_CANDIDATES)
+    lexical_hits = lexical_index.search(query, depth)
+    dense_matches = db.search(query_embedding, top_k=depth)
+    ids, missing = fuse_rankings(dense_matches, lexical_hits)
+    fetched = db.fetch(missing) if missing else []
+    return format_search_results(query, assemble_matches(ids, dense_matches, fetched, query_embedding, top_k))
+
+async def async_search_memory(query: str, top_k: int = 5, mode: str = None) -> dict:
+    """Async variant of search_memory (async embedding and vector store clients)."""
+    query_embedding = await async_get_query_embedding(query)
+    if not use_hybrid_search(mode):
+        matches = await db.async_search(query_embedding, top_k=top_k)
+        return format_search_results(query, matches)
+    
+    depth = max(top_k, HYBRID_CANDIDATES)
+    lexical_hits, dense_matches = await asyncio.gather(
+        asyncio.to_thread(lexical_index.search, query, depth),
+        db.async_search(query_embedding, top_k=depth)
+    )
+    ids, missing = fuse_rankings(dense_matches, lexical_hits)
+    fetched = await asyncio.to_thread(db.fetch, missing) if missing else []
+    return format_search_results(query, assemble_matches(ids, dense_matches, fetched, query_embedding, top_k))
+
 # ==================== SYNTHESIS FUNCTIONS ====================
 
-def answer_question(query: str, context: list) -> dict:
-    """Generate intelligent answer from query and context memories."""
+def build_answer_prompt(query: str, context: list) -> str:
+    """Build the synthesis prompt from query and context memories."""
     # Format context
     context_text = ""
     for i, memory in enumerate(context, 1):
@@ -225,16 +304,56 @@ INSTRUCTIONS:
 5. Be natural and conversational
 
 ANSWER:"""
+    return prompt
 
-    response = gemini_model.generate_content(prompt)
-    answer = response.text
-    
-    sources = [{
+def format_sources(context: list) -> list:
+    """Source list returned alongside an answer."""
+    return [{
         "id": m.get('id'),
         "text": m.get('text', '')[:100],
         "score": m.get('score', 0),
         "metadata": m.get('metadata', {})
     } for m in context]
+
+def answer_question(query: str, context: list) -> dict:
+    """Generate intelligent answer from query and context memories."""
+    prompt = build_answer_prompt(query, context)
+    response = gemini_model.generate_content(prompt)
+    answer = response.text
+    
+    sources = format_sources(context)
+    
+    print(f"💬 Generated answer for: '{query[:50]}...'")
+    return {
+        "answer": answer,
+        "sources": sources,
+        "query": query
+    }
+
+def answer_question_stream(query: str, context: list):
+    """
+    Streaming variant of answer_question.
+    Yields the source list first, then answer text chunks as Gemini generates them.
+    
+    Yields:
+        {"type": "sources", "sources": [...]}, then {"type": "token", "text": "..."} per chunk
+    """
+    yield {"type": "sources", "sources": format_sources(context)}
+    
+    prompt = build_answer_prompt(query, context)
+    for chunk in gemini_model.generate_content(prompt, stream=True):
+        if chunk.parts:
+            yield {"type": "token", "text": chunk.text}
+    
+    print(f"💬 Streamed answer for: '{query[:50]}...'")
+
+async def async_answer_question(query: str, context: list) -> dict:
+    """Async variant of answer_question."""
+    prompt = build_answer_prompt(query, context)
+    response = await gemini_model.generate_content_async(prompt)
+    answer = response.text
+    
+    sources = format_sources(context)
     
     print(f"💬 Generated answer for: '{query[:50]}...'")
     return {
@@ -246,12 +365,171 @@ ANSWER:"""
 # ==================== ORCHESTRATOR WORKFLOWS ====================
 # ==================== ENHANCED WORKFLOWS WITH RETRY & LOGGING ====================
 
-def upload_and_process_audio(audio_path: str) -> dict:
+def memory_id_for(content_hash: str, index: int) -> str:
+    """Stable vector ID for the index-th memory chunk of an audio file."""
+    return f"mem_{content_hash[:16]}_{index:05d}"
+
+def chunk_metadata(chunk: dict, base_metadata: dict) -> dict:
+    """Vector metadata for one transcript chunk."""
+    return {
+        **base_metadata,
+        "segment_index": chunk['segment_start'],
+        "segment_index_end": chunk['segment_end'],
+        "timestamp_start": chunk['start'],
+        "timestamp_end": chunk['end'],
+        "speaker": chunk['speaker']
+    }
+
+class TranscriptionFailed(Exception):
+    """The transcriber failed mid-stream; the only pipelined failure that retries the whole file"""
+
+def transcribe_and_store_pipelined(audio_path: str, gcs_url: str, content_hash: str, base_metadata: dict) -> dict:
+    """
+    Transcription, chunking, embedding and upserts as one pipeline.
+    
+    Segments are chunked as the transcriber produces them; every
+    INGEST_BATCH_SIZE chunks are embedded and upserted on their own threads,
+    with bounded queues between the stages for backpressure. Embedding
+    batches and upsert chunks are retried on their own (a batch that keeps
+    failing is reported as failed, as in sequential mode); only a
+    transcription failure retries the whole file. Vector IDs are stable, so
+    a retry overwrites whatever the failed attempt stored.
+    
+    Returns:
+        Dictionary with a transcript summary (segments, duration, preview),
+        stored/failed totals, the upsert chunk reports and the file's
+        IngestAggregate
+    """
+    for attempt in range(INGEST_MAX_RETRIES):
+        transcript = {"segments": 0, "duration": 0, "preview": ""}
+        aggregate = IngestAggregate(base_metadata["file_id"], base_metadata["session_id"])
+        created_at = datetime.now().isoformat()
+        
+        def segments():
+            try:
+                for segment in transcriber.iter_segments(audio_path, gcs_uri=gcs_url):
+                    transcript["segments"] += 1
+                    transcript["duration"] = segment["end"]
+                    if len(transcript["preview"]) < 200:
+                        transcript["preview"] = (transcript["preview"] + " " + segment["text"]).strip()[:200]
+                    yield segment
+            except Exception as e:
+                raise TranscriptionFailed(str(e)) from e
+        
+        def embed(batch):
+            for embed_attempt in range(UPSERT_MAX_RETRIES):
+                try:
+                    embeddings = get_document_embeddings([chunk['text'] for _, chunk in batch])
+                    break
+                except Exception as e:
+                    if embed_attempt == UPSERT_MAX_RETRIES - 1:
+                        log_agent_action('memory', 'embed_failed', {'chunks': len(batch), 'error': str(e)})
+                        return {"vectors": [], "failed": len(batch), "attempts": UPSERT_MAX_RETRIES, "error": str(e)}
+                    time.sleep(2 ** embed_attempt)  # Exponential backoff
+            
+            for _, chunk in batch:
+                aggregate.add(chunk)
+            return {"vectors": [{
+                "id": memory_id_for(content_hash, i),
+                "embedding": embedding,
+                "metadata": {
+                    "text": chunk['text'],
+                    "created_at": created_at,
+                    **chunk_metadata(chunk, base_metadata)
+                }
+            } for (i, chunk), embedding in zip(batch, embeddings)]}
+        
+        def upsert(embedded):
+            if not embedded["vectors"]:
+                return [{"chunk": 0, "stored": 0, "failed": embedded["failed"],
+                         "attempts": embedded["attempts"], "error": embedded["error"]}]
+            vectors = embedded["vectors"]
+            reports = db.store_batch_chunked(vectors, batch_size=UPSERT_BATCH_SIZE, max_retries=UPSERT_MAX_RETRIES)
+            index_stored_vectors(vectors, reports, UPSERT_BATCH_SIZE)
+            return reports
+        
+        try:
+            source = batched(enumerate(iter_chunks(segments())), INGEST_BATCH_SIZE)
+            reports = [report for batch_reports in run_pipeline(source, [embed, upsert]) for report in batch_reports]
+            break
+        except TranscriptionFailed as e:
+            log_agent_action('ingest', 'retry', {
+                'attempt': attempt + 1,
+                'segments_seen': transcript["segments"],
+                'error': str(e)
+            })
+            if attempt == INGEST_MAX_RETRIES - 1:
+                raise
+            time.sleep(2 ** attempt)  # Exponential backoff
+    
+    for i, report in enumerate(reports):
+        report["chunk"] = i
+        if report["failed"]:
+            log_agent_action('memory', 'chunk_failed', report)
+    
+    stored = sum(r["stored"] for r in reports)
+    failed = sum(r["failed"] for r in reports)
+    if stored:
+        bump_index_generation()
+    
+    log_agent_action('transcription', 'success', {
+        'segments': transcript["segments"],
+        'duration': transcript["duration"]
+    })
+    log_agent_action('memory', 'batch_complete', {
+        'stored': stored,
+        'failed': failed,
+        'chunks': len(reports)
+    })
+    return {
+        "transcript": transcript,
+        "stored": stored,
+        "failed": failed,
+        "chunks": reports,
+        "aggregate": aggregate
+    }
+
+def duplicate_upload(session_id: str, content_hash: str, existing: dict) -> dict:
+    """Result for an upload whose content is already ingested (or being ingested) by another session"""
+    log_agent_action('orchestrator', 'duplicate_upload', {
+        'session_id': session_id,
+        'existing_session_id': existing.get('session_id'),
+        'content_hash': content_hash
+    })
+    if existing.get('session_id') != session_id:
+        save_session(session_id, {'status': 'duplicate', 'duplicate_of': existing.get('session_id')})
+    print(f"♻️  Already ingested as {existing.get('session_id')} ({existing.get('status')})")
+    return {
+        "status": "duplicate",
+        "session_id": existing.get('session_id'),
+        "file_id": f"audio_{content_hash[:16]}",
+        "content_hash": content_hash,
+        "existing_status": existing.get('status'),
+        **{k: existing[k] for k in ('gcs_url', 'duration', 'segments_stored') if k in existing}
+    }
+
+def upload_and_process_audio(audio_path: str, session_id: str = None, content_hash: str = None,
+                             gcs_url: str = None, claimed: bool = False) -> dict:
     """
     Complete workflow with Cloud Storage, Firestore tracking, and retry logic.
+    Pass session_id to process under an existing session (e.g. a queued job).
+    
+    Audio is deduplicated by content: if the same file was already ingested
+    (or is being ingested), the existing session is returned without any
+    processing. IDs are derived from the content hash, so a retried ingest
+    overwrites its earlier GCS object and vectors instead of duplicating them.
+    Pass content_hash and gcs_url when the file was already hashed and
+    uploaded while it was received (see shared.streaming_upload), and
+    claimed=True when session_id already holds the content hash claim.
     """
-    session_id = f"session_{uuid.uuid4().hex[:8]}"
-    file_id = f"audio_{uuid.uuid4().hex[:8]}"
+    session_id = session_id or f"session_{uuid.uuid4().hex[:8]}"
+    content_hash = content_hash or hash_file(audio_path)
+    file_id = f"audio_{content_hash[:16]}"
+    
+    if not claimed:
+        existing = claim_content_hash(content_hash, session_id)
+        if existing is not None:
+            return duplicate_upload(session_id, content_hash, existing)
     
     log_agent_action('orchestrator', 'start_processing', {
         'session_id': session_id,
@@ -267,89 +545,123 @@ def upload_and_process_audio(audio_path: str) -> dict:
         # Save initial session to Firestore
         save_session(session_id, {
             'file_id': file_id,
+            'content_hash': content_hash,
             'status': 'processing',
             'audio_path': audio_path,
             'started_at': datetime.now().isoformat()
         })
         
-        # Step 1: Upload to Cloud Storage
+        # Step 1: Upload to Cloud Storage (already done when streamed in)
         print("\n[1/4] ☁️  Uploading to Cloud Storage...")
-        storage_path = f"uploads/{file_id}.mp3"
+        storage_path = storage_path_for(content_hash)
         
-        try:
-            gcs_url = upload_to_storage(audio_path, storage_path)
-            log_agent_action('storage', 'upload_complete', {'gcs_url': gcs_url})
-            print(f"   ✅ Uploaded to {gcs_url}")
-        except Exception as e:
-            log_agent_action('storage', 'upload_failed', {'error': str(e)})
-            raise
-        
-        # Step 2: Transcribe with retry
-        print("\n[2/4] 🎙️ Transcribing audio...")
-        max_retries = 3
-        transcript_data = None
-        
-        for attempt in range(max_retries):
+        if gcs_url:
+            print(f"   ✅ Already streamed to {gcs_url}")
+        else:
+            try:
+                gcs_url = upload_to_storage(audio_path, storage_path)
+                log_agent_action('storage', 'upload_complete', {'gcs_url': gcs_url})
+                print(f"   ✅ Uploaded to {gcs_url}")
+            except Exception as e:
+                log_agent_action('storage', 'upload_failed', {'error': str(e)})
+                raise
+        
+        base_metadata = {
+            "session_id": session_id,
+            "file_id": file_id,
+            "audio_file": audio_path,
+            "gcs_url": gcs_url
+        }
+        
+        if INGEST_MODE == "pipelined":
+            # Steps 2+3 overlap: chunks are embedded and upserted while transcription continues
+            print("\n[2-3/4] 🎙️💾 Transcribing and storing as segments arrive...")
             try:
-                transcript_data = transcribe_audio(audio_path, gcs_uri=gcs_url)
+                ingest = transcribe_and_store_pipelined(audio_path, gcs_url, content_hash, base_metadata)
+            except Exception as e:
+                save_session(session_id, {'status': 'failed', 'error': str(e)})
+                update_content_hash(content_hash, {'status': 'failed'})
+                return {"error": f"Ingest failed after {INGEST_MAX_RETRIES} attempts: {str(e)}"}
+            
+            transcript_summary = ingest['transcript']
+            stored_count = ingest['stored']
+            failed_count = ingest['failed']
+            chunk_reports = ingest['chunks']
+            aggregate = ingest['aggregate']
+            print(f"   ✅ Transcribed {transcript_summary['segments']} segments, stored {stored_count} chunks ({failed_count} failed)")
+        else:
+            # Step 2: Transcribe with retry
+            print("\n[2/4] 🎙️ Transcribing audio...")
+            max_retries = 3
+            transcript_data = None
+            
+            for attempt in range(max_retries):
+                try:
+                    transcript_data = transcribe_audio(audio_path, gcs_uri=gcs_url)
                 
-                if "error" not in transcript_data:
-                    log_agent_action('transcription', 'success', {
-                        'segments': len(transcript_data['segments']),
-                        'duration': transcript_data['duration']
-                    })
-                    break
-                else:
-                    raise Exception(transcript_data['error'])
+                    if "error" not in transcript_data:
+                        log_agent_action('transcription', 'success', {
+                            'segments': len(transcript_data['segments']),
+                            'duration': transcript_data['duration']
+                        })
+                        break
+                    else:
+                        raise Exception(transcript_data['error'])
                     
-            except Exception as e:
-                log_agent_action('transcription', 'retry', {
-                    'attempt': attempt + 1,
-                    'error': str(e)
-                })
+                except Exception as e:
+                    log_agent_action('transcription', 'retry', {
+                        'attempt': attempt + 1,
+                        'error': str(e)
+                    })
                 
-                if attempt == max_retries - 1:
-                    save_session(session_id, {'status': 'failed', 'error': str(e)})
-                    return {"error": f"Transcription failed after {max_retries} attempts: {str(e)}"}
+                    if attempt == max_retries - 1:
+                        save_session(session_id, {'status': 'failed', 'error': str(e)})
+                        update_content_hash(content_hash, {'status': 'failed'})
+                        return {"error": f"Transcription failed after {max_retries} attempts: {str(e)}"}
                 
-                time.sleep(2 ** attempt)  # Exponential backoff
-        
-        print(f"   ✅ Transcribed {len(transcript_data['segments'])} segments")
-        
-        # Step 3: Store in memory with parallel processing simulation
-        print("\n[3/4] 💾 Storing in memory...")
-        stored_count = 0
-        failed_count = 0
-        
-        for i, segment in enumerate(transcript_data['segments']):
+                    time.sleep(2 ** attempt)  # Exponential backoff
+            
+            print(f"   ✅ Transcribed {len(transcript_data['segments'])} segments")
+            
+            # Step 3: Chunk the transcript and store it with batched embeddings and chunked upserts
+            print("\n[3/4] 💾 Storing in memory...")
+            chunks = chunk_segments(transcript_data['segments'])
+            aggregate = IngestAggregate(file_id, session_id)
+            for chunk in chunks:
+                aggregate.add(chunk)
+            log_agent_action('memory', 'chunked', {
+                'segments': len(transcript_data['segments']),
+                'chunks': len(chunks)
+            })
+            
             try:
-                store_memory(
-                    text=segment['text'],
-                    metadata={
-                        "session_id": session_id,
-                        "file_id": file_id,
-                        "segment_index": i,
-                        "timestamp_start": segment['start'],
-                        "timestamp_end": segment['end'],
-                        "speaker": segment.get('speaker', 'Unknown'),
-                        "audio_file": audio_path,
-                        "gcs_url": gcs_url
-                    }
+                store_result = store_memories_batch(
+                    ids=[memory_id_for(content_hash, i) for i in range(len(chunks))],
+                    texts=[chunk['text'] for chunk in chunks],
+                    metadatas=[chunk_metadata(chunk, base_metadata) for chunk in chunks]
                 )
-                stored_count += 1
+                stored_count = store_result['stored']
+                failed_count = store_result['failed']
+                chunk_reports = store_result['chunks']
             except Exception as e:
-                log_agent_action('memory', 'store_failed', {
-                    'segment': i,
-                    'error': str(e)
-                })
-                failed_count += 1
-        
-        log_agent_action('memory', 'batch_complete', {
-            'stored': stored_count,
-            'failed': failed_count
-        })
-        
-        print(f"   ✅ Stored {stored_count} chunks ({failed_count} failed)")
+                # Embedding failed before anything was upserted
+                log_agent_action('memory', 'embed_failed', {'error': str(e)})
+                stored_count = 0
+                failed_count = len(chunks)
+                chunk_reports = []
+            
+            log_agent_action('memory', 'batch_complete', {
+                'stored': stored_count,
+                'failed': failed_count,
+                'chunks': len(chunk_reports)
+            })
+            
+            transcript_summary = {
+                'segments': len(transcript_data['segments']),
+                'duration': transcript_data['duration'],
+                'preview': transcript_data['text'][:200]
+            }
+            print(f"   ✅ Stored {stored_count} chunks ({failed_count} failed)")
         
         # Step 4: Update Firestore
         print("\n[4/4] 📊 Updating session...")
@@ -357,11 +669,22 @@ def upload_and_process_audio(audio_path: str) -> dict:
             'status': 'completed',
             'file_id': file_id,
             'gcs_url': gcs_url,
-            'duration': transcript_data['duration'],
+            'duration': transcript_summary['duration'],
+            'segments_transcribed': transcript_summary['segments'],
             'segments_stored': stored_count,
             'segments_failed': failed_count,
             'completed_at': datetime.now().isoformat()
         })
+        # Partially stored files stay claimable, so re-uploading them retries the ingest
+        update_content_hash(content_hash, {
+            'status': 'completed' if not failed_count else 'failed',
+            'gcs_url': gcs_url,
+            'duration': transcript_summary['duration'],
+            'segments_stored': stored_count
+        })
+        if not failed_count:
+            # Counted once per file: partial ingests are re-run and counted then
+            aggregate.record()
         
         print(f"\n✅ Processing complete!")
         print(f"{'='*60}\n")
@@ -370,12 +693,15 @@ def upload_and_process_audio(audio_path: str) -> dict:
             "status": "success",
             "session_id": session_id,
             "file_id": file_id,
+            "content_hash": content_hash,
             "gcs_url": gcs_url,
             "audio_path": audio_path,
-            "duration": transcript_data['duration'],
+            "duration": transcript_summary['duration'],
+            "segments_transcribed": transcript_summary['segments'],
             "segments_stored": stored_count,
             "segments_failed": failed_count,
-            "transcript_preview": transcript_data['text'][:200] + "..."
+            "upsert_chunks": chunk_reports,
+            "transcript_preview": transcript_summary['preview'] + "..."
         }
         
     except Exception as e:
@@ -389,14 +715,173 @@ def upload_and_process_audio(audio_path: str) -> dict:
             'error': str(e),
             'failed_at': datetime.now().isoformat()
         })
+        update_content_hash(content_hash, {'status': 'failed'})
         
         return {"error": f"Processing failed: {str(e)}"}
 
+def build_topics(job_id: str, k: int = None) -> dict:
+    """
+    Offline topic clustering over every stored memory (run as a job).
+    Progress and the outcome are recorded in the job's session document.
+    """
+    save_session(job_id, {'status': 'processing', 'started_at': datetime.now().isoformat()})
+    log_agent_action('topics', 'build_started', {'job_id': job_id, 'k': k})
+    
+    summary = topic_map.build(db, k=k)
+    
+    log_agent_action('topics', 'build_complete', {
+        'job_id': job_id,
+        'topics': summary['k'],
+        'vectors': summary['total_vectors'],
+        'seconds': summary['build_seconds']
+    })
+    save_session(job_id, {
+        'status': 'completed',
+        'topics': summary['k'],
+        'total_vectors': summary['total_vectors'],
+        'completed_at': datetime.now().isoformat()
+    })
+    print(f"✅ Clustered {summary['total_vectors']} memories into {summary['k']} topics")
+    return summary
+
+def rebuild_lexical_index(job_id: str) -> int:
+    """
+    Re-index every stored memory for BM25 (run as a job), e.g. on a new
+    instance whose local index is behind the shared vector store.
+    """
+    save_session(job_id, {'status': 'processing', 'started_at': datetime.now().isoformat()})
+    documents = lexical_index.rebuild(db)
+    log_agent_action('lexical_index', 'rebuild_complete', {'job_id': job_id, 'documents': documents})
+    save_session(job_id, {
+        'status': 'completed',
+        'documents': documents,
+        'completed_at': datetime.now().isoformat()
+    })
+    print(f"✅ Indexed {documents} memories for lexical search")
+    return documents
+
+def build_analysis_prompt(query: str) -> str:
+    """Prompt asking Gemini for search parameters."""
+    return f"""Analyze this query and suggest optimal search parameters:
+Query: "{query}"
+
+Provide JSON response:
+{{
+    "search_depth": <number 3-10>,
+    "query_type": "factual|temporal|analytical",
+    "requires_synthesis": true|false
+}}
+"""
+
+def parse_analysis_response(analysis_text: str) -> dict:
+    """Extract the JSON parameters from Gemini's analysis response."""
+    analysis_text = analysis_text.strip()
+    if '```json' in analysis_text:
+        analysis_text = analysis_text.split('```json')[1].split('```')[0].strip()
+    
+    return json.loads(analysis_text)
+
+def analyze_query_llm(query: str) -> dict:
+    """Ask Gemini for search parameters (search_depth, query_type, requires_synthesis)."""
+    analysis_response = gemini_model.generate_content(build_analysis_prompt(query))
+    return parse_analysis_response(analysis_response.text)
+
+async def async_analyze_query_llm(query: str) -> dict:
+    """Async variant of analyze_query_llm."""
+    analysis_response = await gemini_model.generate_content_async(build_analysis_prompt(query))
+    return parse_analysis_response(analysis_response.text)
+
+def analyze_query(query: str, analyzer: str = None) -> dict:
+    """
+    Choose search parameters for a query.
+    
+    The local classifier answers in microseconds; Gemini is only called when
+    analyzer is "llm" or the classifier can't decide. If Gemini fails or returns
+    malformed JSON, the classifier's best guess is used instead of raising;
+    invalid or out-of-range fields fall back to it individually.
+    The path taken is recorded under "analyzer".
+    """
+    analyzer = analyzer or QUERY_ANALYZER
+    params, confident = classify_query(query)
+    
+    if analyzer == "heuristic" and confident:
+        return {**params, "analyzer": "heuristic"}
+    
+    try:
+        llm_params = analyze_query_llm(query)
+        return {**sanitize_query_params(llm_params, params), "analyzer": "llm" if analyzer == "llm" else "llm_fallback"}
+    except Exception as e:
+        log_agent_action('query_analyzer', 'llm_failed', {'error': str(e)})
+        return {**params, "analyzer": "heuristic_fallback"}
+
+def trim_search_results(search_data: dict, top_k: int) -> dict:
+    """Keep the top_k best results of a deeper search."""
+    results = search_data['results'][:top_k]
+    return {**search_data, "results": results, "count": len(results)}
+
+def analyze_and_search_concurrently(query: str) -> tuple:
+    """
+    Run query analysis and a speculative max-depth search at the same time.
+    
+    The query embedding doesn't depend on the analysis, so the search starts
+    immediately at MAX_SEARCH_DEPTH and is trimmed to the chosen search_depth
+    once analysis returns. Latency is max(analysis, search) instead of the sum.
+    
+    Returns:
+        (params, search_data)
+    """
+    print(f"\n[1-2/3] 🤔🔍 Analyzing query while searching {MAX_SEARCH_DEPTH} memories...")
+    search_future = query_executor.submit(search_memory, query, MAX_SEARCH_DEPTH)
+    
+    try:
+        params = analyze_query(query)
+    except Exception:
+        search_future.cancel()
+        raise
+    
+    log_agent_action('query_analyzer', 'analysis_complete', params)
+    print(f"   📊 Query type: {params['query_type']}, Depth: {params['search_depth']} ({params['analyzer']})")
+    
+    search_data = search_future.result()
+    if params['search_depth'] > MAX_SEARCH_DEPTH:
+        # Speculative search wasn't deep enough
+        search_data = search_memory(query, top_k=params['search_depth'])
+    
+    return params, trim_search_results(search_data, params['search_depth'])
+
+def retrieve_for_query(query: str) -> tuple:
+    """
+    Steps 1+2 of a query: choose search parameters and fetch memories.
+    
+    Returns:
+        (params, search_data)
+    """
+    if QUERY_EXECUTION_MODE == "concurrent":
+        params, search_data = analyze_and_search_concurrently(query)
+    else:
+        print("\n[1/3] 🤔 Analyzing query...")
+        params = analyze_query(query)
+        log_agent_action('query_analyzer', 'analysis_complete', params)
+        print(f"   📊 Query type: {params['query_type']}, Depth: {params['search_depth']} ({params['analyzer']})")
+        
+        print(f"\n[2/3] 🔍 Searching {params['search_depth']} memories...")
+        search_data = search_memory(query, top_k=params['search_depth'])
+    
+    log_agent_action('memory', 'search_complete', {
+        'results': search_data['count'],
+        'top_score': search_data['results'][0]['score'] if search_data['results'] else 0
+    })
+    
+    print(f"   ✅ Found {search_data['count']} relevant memories")
+    return params, search_data
+
 def query_memory_tool(query: str, session_id: str = None) -> dict:
     """
     Enhanced query with session tracking and agent decision-making.
+    Repeated queries are answered from query_cache until new memories are stored.
     """
     query_id = f"query_{uuid.uuid4().hex[:8]}"
+    generation = get_index_generation()
     
     log_agent_action('orchestrator', 'query_start', {
         'query_id': query_id,
@@ -409,46 +894,222 @@ def query_memory_tool(query: str, session_id: str = None) -> dict:
     print(f"{'='*60}")
     
     try:
-        # Step 1: Determine optimal search parameters using Gemini
-        print("\n[1/3] 🤔 Analyzing query...")
+        cached = query_cache.get(query)
+        if cached is not None:
+            log_agent_action('query_cache', 'hit', {'query_id': query_id})
+            print("   ⚡ Answered from cache")
+            result = {"query_id": query_id, "query": query, **cached, "cache": "hit"}
+            if session_id:
+                record_session_query(session_id, query_id, query)
+            return result
         
-        analysis_prompt = f"""Analyze this query and suggest optimal search parameters:
-Query: "{query}"
-
-Provide JSON response:
-{{
-    "search_depth": <number 3-10>,
-    "query_type": "factual|temporal|analytical",
-    "requires_synthesis": true|false
-}}
-"""
+        # Steps 1+2: Analyze the query and search memories
+        params, search_data = retrieve_for_query(query)
         
-        analysis_response = gemini_model.generate_content(analysis_prompt)
-        analysis_text = analysis_response.text.strip()
+        # Step 3: Generate answer
+        print("\n[3/3] 💬 Generating answer...")
+        synthesis_data = answer_question(query, search_data['results'])
         
-        # Extract JSON from response
-        if '```json' in analysis_text:
-            analysis_text = analysis_text.split('```json')[1].split('```')[0].strip()
+        log_agent_action('synthesis', 'answer_generated', {
+            'query_id': query_id,
+            'sources_used': len(synthesis_data['sources'])
+        })
         
-        params = json.loads(analysis_text)
+        print(f"   ✅ Answer generated with {len(synthesis_data['sources'])} sources")
+        print(f"{'='*60}\n")
         
-        log_agent_action('query_analyzer', 'analysis_complete', params)
-        print(f"   📊 Query type: {params['query_type']}, Depth: {params['search_depth']}")
+        result = {
+            "query_id": query_id,
+            "query": query,
+            "answer": synthesis_data['answer'],
+            "sources": synthesis_data['sources'],
+            "memories_used": search_data['count'],
+            "query_analysis": params,
+            "cache": "miss"
+        }
         
-        # Step 2: Search with optimized parameters
-        print(f"\n[2/3] 🔍 Searching {params['search_depth']} memories...")
-        search_data = search_memory(query, top_k=params['search_depth'])
+        query_cache.put(query, {
+            k: v for k, v in result.items() if k not in ("query_id", "query", "cache")
+        }, generation)
         
-        log_agent_action('memory', 'search_complete', {
-            'results': search_data['count'],
-            'top_score': search_data['results'][0]['score'] if search_data['results'] else 0
+        # Save query to Firestore if session provided
+        if session_id:
+            record_session_query(session_id, query_id, query)
+        
+        return result
+        
+    except Exception as e:
+        log_agent_action('orchestrator', 'query_failed', {
+            'query_id': query_id,
+            'error': str(e)
         })
         
-        print(f"   ✅ Found {search_data['count']} relevant memories")
+        return {"error": f"Query failed: {str(e)}"}
+    
+def query_memory_stream(query: str, session_id: str = None):
+    """
+    Streaming query: sources are sent as soon as retrieval finishes,
+    then answer chunks as Gemini generates them.
+    
+    Yields:
+        {"type": "sources"}, {"type": "token"} per chunk, then {"type": "done"}
+        with query_id/query_analysis, or {"type": "error"} on failure
+    """
+    query_id = f"query_{uuid.uuid4().hex[:8]}"
+    generation = get_index_generation()
+    
+    log_agent_action('orchestrator', 'query_stream_start', {
+        'query_id': query_id,
+        'query': query,
+        'session_id': session_id
+    })
+    
+    try:
+        cached = query_cache.get(query)
+        if cached is not None:
+            yield {"type": "sources", "sources": cached['sources']}
+            yield {"type": "token", "text": cached['answer']}
+            yield {
+                "type": "done",
+                "query_id": query_id,
+                "memories_used": cached['memories_used'],
+                "query_analysis": cached['query_analysis'],
+                "cache": "hit"
+            }
+        else:
+            params, search_data = retrieve_for_query(query)
+            
+            print("\n[3/3] 💬 Streaming answer...")
+            answer = ""
+            sources = []
+            for event in answer_question_stream(query, search_data['results']):
+                if event["type"] == "sources":
+                    sources = event["sources"]
+                else:
+                    answer += event["text"]
+                yield event
+            
+            log_agent_action('synthesis', 'answer_streamed', {
+                'query_id': query_id,
+                'sources_used': len(sources)
+            })
+            
+            query_cache.put(query, {
+                "answer": answer,
+                "sources": sources,
+                "memories_used": search_data['count'],
+                "query_analysis": params
+            }, generation)
+            
+            yield {
+                "type": "done",
+                "query_id": query_id,
+                "memories_used": search_data['count'],
+                "query_analysis": params,
+                "cache": "miss"
+            }
+        
+        if session_id:
+            record_session_query(session_id, query_id, query)
+            # The response body outlives the request middleware's flush
+            flush_session_writes()
+        
+    except Exception as e:
+        log_agent_action('orchestrator', 'query_failed', {
+            'query_id': query_id,
+            'error': str(e)
+        })
+        
+        yield {"type": "error", "error": f"Query failed: {str(e)}"}
+
+# ==================== ASYNC QUERY PATH ====================
+# Same pipeline as query_memory_tool, but every network call is awaited on an
+# async client, so one worker holds hundreds of in-flight queries instead of a
+# threadpool thread per request.
+
+async def async_analyze_query(query: str, analyzer: str = None) -> dict:
+    """Async variant of analyze_query."""
+    analyzer = analyzer or QUERY_ANALYZER
+    params, confident = classify_query(query)
+    
+    if analyzer == "heuristic" and confident:
+        return {**params, "analyzer": "heuristic"}
+    
+    try:
+        llm_params = await async_analyze_query_llm(query)
+        return {**sanitize_query_params(llm_params, params), "analyzer": "llm" if analyzer == "llm" else "llm_fallback"}
+    except Exception as e:
+        log_agent_action('query_analyzer', 'llm_failed', {'error': str(e)})
+        return {**params, "analyzer": "heuristic_fallback"}
+
+async def async_retrieve_for_query(query: str) -> tuple:
+    """
+    Async variant of retrieve_for_query.
+    In "concurrent" mode the analysis and the speculative max-depth search are
+    awaited together with asyncio.gather.
+    
+    Returns:
+        (params, search_data)
+    """
+    if QUERY_EXECUTION_MODE == "concurrent":
+        print(f"\n[1-2/3] 🤔🔍 Analyzing query while searching {MAX_SEARCH_DEPTH} memories...")
+        params, search_data = await asyncio.gather(
+            async_analyze_query(query),
+            async_search_memory(query, MAX_SEARCH_DEPTH)
+        )
+        if params['search_depth'] > MAX_SEARCH_DEPTH:
+            search_data = await async_search_memory(query, top_k=params['search_depth'])
+        search_data = trim_search_results(search_data, params['search_depth'])
+    else:
+        print("\n[1/3] 🤔 Analyzing query...")
+        params = await async_analyze_query(query)
+        print(f"\n[2/3] 🔍 Searching {params['search_depth']} memories...")
+        search_data = await async_search_memory(query, top_k=params['search_depth'])
+    
+    log_agent_action('query_analyzer', 'analysis_complete', params)
+    print(f"   📊 Query type: {params['query_type']}, Depth: {params['search_depth']} ({params['analyzer']})")
+    log_agent_action('memory', 'search_complete', {
+        'results': search_data['count'],
+        'top_score': search_data['results'][0]['score'] if search_data['results'] else 0
+    })
+    
+    print(f"   ✅ Found {search_data['count']} relevant memories")
+    return params, search_data
+
+async def async_query_memory_tool(query: str, session_id: str = None) -> dict:
+    """
+    Async variant of query_memory_tool, used by the /query endpoint.
+    Returns the same result shape, including query_cache hits.
+    """
+    query_id = f"query_{uuid.uuid4().hex[:8]}"
+    generation = get_index_generation()
+    
+    log_agent_action('orchestrator', 'query_start', {
+        'query_id': query_id,
+        'query': query,
+        'session_id': session_id
+    })
+    
+    print(f"\n{'='*60}")
+    print(f"❓ QUERY: {query}")
+    print(f"{'='*60}")
+    
+    try:
+        cached = query_cache.get(query)
+        if cached is not None:
+            log_agent_action('query_cache', 'hit', {'query_id': query_id})
+            print("   ⚡ Answered from cache")
+            result = {"query_id": query_id, "query": query, **cached, "cache": "hit"}
+            if session_id:
+                record_session_query(session_id, query_id, query)
+            return result
+        
+        # Steps 1+2: Analyze the query and search memories
+        params, search_data = await async_retrieve_for_query(query)
         
         # Step 3: Generate answer
         print("\n[3/3] 💬 Generating answer...")
-        synthesis_data = answer_question(query, search_data['results'])
+        synthesis_data = await async_answer_question(query, search_data['results'])
         
         log_agent_action('synthesis', 'answer_generated', {
             'query_id': query_id,
@@ -464,20 +1125,16 @@ Provide JSON response:
             "answer": synthesis_data['answer'],
             "sources": synthesis_data['sources'],
             "memories_used": search_data['count'],
-            "query_analysis": params
+            "query_analysis": params,
+            "cache": "miss"
         }
         
-        # Save query to Firestore if session provided
+        query_cache.put(query, {
+            k: v for k, v in result.items() if k not in ("query_id", "query", "cache")
+        }, generation)
+        
         if session_id:
-            session = get_session(session_id)
-            if session:
-                queries = session.get('queries', [])
-                queries.append({
-                    'query_id': query_id,
-                    'query': query,
-                    'timestamp': datetime.now().isoformat()
-                })
-                save_session(session_id, {'queries': queries})
+            record_session_query(session_id, query_id, query)
         
         return result
         
@@ -488,7 +1145,7 @@ Provide JSON response:
         })
         
         return {"error": f"Query failed: {str(e)}"}
-    
+
 def intelligent_query(query: str) -> dict:
     """
     Use coordinator to plan and execute intelligent multi-agent query.
@@ -497,7 +1154,8 @@ def intelligent_query(query: str) -> dict:
     plan = plan_execution(f"Answer this query: {query}")
     
     # Step 2: Check if insights needed
-    if 'insights' in plan['agents_required'] or 'pattern' in query.lower() or 'across' in query.lower():
+    needs_insights = plan['task_type'] == 'insight' or 'insights_agent' in plan['agents_required']
+    if needs_insights or 'pattern' in query.lower() or 'across' in query.lower():
         insights = find_cross_conversation_patterns(query)
         return {
             'type': 'insights',
@@ -515,13 +1173,22 @@ def intelligent_query(query: str) -> dict:
     
     return result
 
-# Create the orchestrator agent
-orchestrator = Agent(
-    model='gemini-2.0-flash-exp',
-    name='recallos_orchestrator',
-    description='Advanced multi-agent orchestrator with Cloud Storage, Firestore, and intelligent agent coordination',
-    tools=[upload_and_process_audio, query_memory_tool]
-)
+def create_orchestrator_agent():
+    """Build the ADK orchestrator agent (google.adk is only imported when needed)"""
+    from google.adk import Agent
+    return Agent(
+        model='gemini-2.0-flash-exp',
+        name='recallos_orchestrator',
+        description='Advanced multi-agent orchestrator with Cloud Storage, Firestore, and intelligent agent coordination',
+        tools=[upload_and_process_audio, query_memory_tool]
+    )
+
+def __getattr__(name):
+    # `from main import orchestrator` still works, but the API server never pays for it
+    if name == "orchestrator":
+        globals()["orchestrator"] = create_orchestrator_agent()
+        return globals()["orchestrator"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 print("✅ Enhanced RecallOS Orchestrator initialized")
 print("   📦 Google Services: Speech-to-Text, Storage, Firestore, Logging")
@@ -1,10 +1,24 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from agents.orchestrator.main import upload_and_process_audio, query_memory_tool
+from agents.orchestrator.main import (
+    upload_and_process_audio, duplicate_upload, async_query_memory_tool, query_memory_stream,
+    intelligent_query, find_cross_conversation_patterns, get_full_insights,
+    get_corpus_distribution, build_topics, rebuild_lexical_index, query_cache
+)
+from shared.jobs import submit_job, get_job, get_queue_stats, JobQueueFull
+from shared.connection_pool import get_pool_stats
+from shared.embeddings import get_embedding_cache_stats
+from shared.streaming_upload import stream_to_storage, UPLOAD_READ_CHUNK
+from shared.google_services import claim_content_hash, update_content_hash
+from shared.session_store import session_store
+from shared.topics import topic_map
+from shared.lexical_index import lexical_index
 import os
-import tempfile
-from main import intelligent_query, find_cross_conversation_patterns
+import uuid
+import json
 
 app = FastAPI(title="RecallOS API")
 
@@ -17,6 +31,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def flush_session_writes(request: Request, call_next):
+    """
+    Commit the request's buffered session writes (query history, job status)
+    before it completes: on Cloud Run, CPU is throttled between requests, so
+    the write-behind timer alone could delay them indefinitely.
+    """
+    response = await call_next(request)
+    if session_store.get_stats()["pending"]:
+        try:
+            await run_in_threadpool(session_store.flush)
+        except Exception as e:
+            print(f"❌ Session flush failed (will retry): {str(e)}")
+    return response
+
 # Add session_id to query request
 class QueryRequest(BaseModel):
     query: str
@@ -30,8 +59,15 @@ def root():
         "version": "1.0.0",
         "endpoints": {
             "upload": "/upload",
+            "upload_stream": "/upload/stream",
+            "jobs": "/jobs/{job_id}",
             "query": "/query",
-            "health": "/health"
+            "query_stream": "/query/stream",
+            "insights_full": "/insights/full",
+            "insights_stats": "/insights/stats",
+            "topics": "/topics",
+            "health": "/health",
+            "metrics": "/metrics"
         }
     }
 
@@ -39,38 +75,153 @@ def root():
 def health():
     return {"status": "healthy"}
 
-@app.post("/upload")
-async def upload_audio(file: UploadFile = File(...)):
-    """Upload and process audio file"""
+@app.get("/metrics")
+def metrics():
+    """Connection pool saturation, cache hit rates, session write batching, lexical index size and job queue depth"""
+    return {
+        "pools": get_pool_stats(),
+        "embedding_cache": get_embedding_cache_stats(),
+        "query_cache": query_cache.get_stats(),
+        "session_writes": session_store.get_stats(),
+        "lexical_index": lexical_index.get_stats(),
+        "jobs": get_queue_stats()
+    }
+
+async def _read_upload(file: UploadFile):
+    """Read an UploadFile in bounded chunks"""
+    while True:
+        chunk = await file.read(UPLOAD_READ_CHUNK)
+        if not chunk:
+            return
+        yield chunk
+
+async def _process_upload(chunks, wait: bool) -> dict:
+    """
+    Stream an upload to disk and GCS, then process it inline or as a queued job.
+    The content hash is claimed as soon as the upload is complete, so a
+    duplicate is answered right away, without storing or queueing anything.
+    """
+    job_id = f"session_{uuid.uuid4().hex[:8]}"
+    claimed = []
+    
+    def claim(content_hash):
+        existing = claim_content_hash(content_hash, job_id)
+        if existing is None:
+            claimed.append(content_hash)
+        return existing
+    
+    def release_claim():
+        if claimed:
+            update_content_hash(claimed[0], {'status': 'failed'})
+    
     try:
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
-            tmp_path = tmp_file.name
-        
-        # Process audio
-        result = upload_and_process_audio(tmp_path)
-        
-        # Clean up
+        received = await stream_to_storage(chunks, claim=claim)
+    except Exception:
+        await run_in_threadpool(release_claim)
+        raise
+    if "duplicate" in received:
+        return await run_in_threadpool(duplicate_upload, job_id, received["content_hash"], received["duplicate"])
+    
+    tmp_path = received["path"]
+    process_kwargs = {
+        "session_id": job_id,
+        "content_hash": received["content_hash"],
+        "gcs_url": received["gcs_url"],
+        "claimed": True
+    }
+    
+    if wait:
+        # Process on the threadpool so the event loop keeps serving queries
+        try:
+            return await run_in_threadpool(upload_and_process_audio, tmp_path, **process_kwargs)
+        finally:
+            os.unlink(tmp_path)
+    
+    try:
+        await run_in_threadpool(
+            submit_job, job_id, upload_and_process_audio, tmp_path,
+            on_done=lambda: os.unlink(tmp_path),
+            **process_kwargs
+        )
+    except Exception:
         os.unlink(tmp_path)
-        
-        return result
-        
+        await run_in_threadpool(release_claim)
+        raise
+    
+    return {
+        "job_id": job_id,
+        "session_id": job_id,
+        "status": "queued",
+        "status_url": f"/jobs/{job_id}",
+        "size": received["size"]
+    }
+
+@app.post("/upload")
+async def upload_audio(file: UploadFile = File(...), wait: bool = False):
+    """
+    Upload audio and queue it for processing.
+    Returns a job id immediately; poll /jobs/{job_id} for progress.
+    Pass ?wait=true to block until processing finishes.
+    """
+    try:
+        return await _process_upload(_read_upload(file), wait)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Upload queue full: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/upload/stream")
+async def upload_audio_stream(request: Request, wait: bool = False):
+    """
+    Upload audio as the raw request body (e.g. curl --data-binary @file.mp3).
+    Unlike multipart /upload, the body is never spooled by the framework:
+    it goes straight from the socket to the temp file and GCS.
+    """
+    try:
+        return await _process_upload(request.stream(), wait)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Upload queue full: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    """Get processing status for an upload job"""
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    return {
+        "job_id": job_id,
+        **job,
+        "queue": get_queue_stats()
+    }
 
 @app.post("/query")
-def query(request: QueryRequest):
-    """Query memories and get answer"""
+async def query(request: QueryRequest):
+    """Query memories and get answer (awaits async clients; no threadpool thread is held)"""
     try:
-        result = query_memory_tool(request.query, request.session_id)
+        result = await async_query_memory_tool(request.query, request.session_id)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/query/stream")
+def query_stream(request: QueryRequest):
+    """
+    Query memories and stream the answer as Server-Sent Events.
+    Events: sources (once), token (per answer chunk), then done or error.
+    """
+    def event_stream():
+        for event in query_memory_stream(request.query, request.session_id):
+            yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/intelligent-query")
 def intelligent_query_endpoint(request: QueryRequest):
     """
@@ -94,6 +245,76 @@ def cross_conversation_insights(request: QueryRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/insights/full")
+def full_insights(request: QueryRequest):
+    """
+    Cross-conversation patterns and topic evolution from one search,
+    with both analyses generated concurrently.
+    """
+    try:
+        return get_full_insights(request.query)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/insights/stats")
+def corpus_stats():
+    """
+    Corpus-wide speaker, file, time and duration distributions,
+    read from the aggregates maintained at ingest time.
+    """
+    try:
+        return get_corpus_distribution()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/topics")
+def topics():
+    """Precomputed recurring topics (sizes, speaker/file breakdowns, representative segments)"""
+    summary = topic_map.get()
+    if summary is None:
+        raise HTTPException(status_code=404, detail="No topic map yet; POST /topics/rebuild to build one")
+    return summary
+
+@app.post("/topics/rebuild")
+def rebuild_topics(k: int = None):
+    """
+    Queue the offline clustering job over all stored memories.
+    Poll /jobs/{job_id}; /topics serves the new map once it completes.
+    """
+    job_id = f"topics_{uuid.uuid4().hex[:8]}"
+    try:
+        submit_job(job_id, build_topics, job_id, k=k)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Job queue full: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/jobs/{job_id}"
+    }
+
+@app.post("/search/reindex")
+def reindex_lexical():
+    """
+    Queue a rebuild of the BM25 index from every stored memory.
+    Poll /jobs/{job_id} for progress.
+    """
+    job_id = f"reindex_{uuid.uuid4().hex[:8]}"
+    try:
+        submit_job(job_id, rebuild_lexical_index, job_id)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Job queue full: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/jobs/{job_id}"
+    }
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.environ.get("PORT", 8080))
@@ -4,25 +4,14 @@ root_dir = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(root_dir))
 
 from google.adk import Agent
-import google.generativeai as genai
+from shared.clients import LazyClient, get_gemini_model
 from dotenv import load_dotenv
-import os
 
 load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-gemini_model = genai.GenerativeModel('gemini-2.0-flash-exp')
+gemini_model = LazyClient(get_gemini_model)
 
-def answer_question(query: str, context: list) -> dict:
-    """
-    Generate intelligent answer from query and context memories.
-    
-    Args:
-        query: User's question
-        context: List of memory chunks with scores
-    
-    Returns:
-        Dictionary with answer and sources
-    """
+def build_answer_prompt(query: str, context: list) -> str:
+    """Build the synthesis prompt from query and context memories."""
     # Format context
     context_text = ""
     for i, memory in enumerate(context, 1):
@@ -50,16 +39,33 @@ INSTRUCTIONS:
 5. Be natural and conversational
 
 ANSWER:"""
+    return prompt
 
-    response = gemini_model.generate_content(prompt)
-    answer = response.text
-    
-    sources = [{
+def format_sources(context: list) -> list:
+    """Source list returned alongside an answer."""
+    return [{
         "id": m.get('id'),
         "text": m.get('text', '')[:100],
         "score": m.get('score', 0),
         "metadata": m.get('metadata', {})
     } for m in context]
+
+def answer_question(query: str, context: list) -> dict:
+    """
+    Generate intelligent answer from query and context memories.
+    
+    Args:
+        query: User's question
+        context: List of memory chunks with scores
+    
+    Returns:
+        Dictionary with answer and sources
+    """
+    prompt = build_answer_prompt(query, context)
+    response = gemini_model.generate_content(prompt)
+    answer = response.text
+    
+    sources = format_sources(context)
     
     print(f"💬 Generated answer for: '{query[:50]}...'")
     return {
@@ -68,6 +74,23 @@ ANSWER:"""
         "query": query
     }
 
+def answer_question_stream(query: str, context: list):
+    """
+    Streaming variant of answer_question.
+    Yields the source list first, then answer text chunks as Gemini generates them.
+    
+    Yields:
+        {"type": "sources", "sources": [...]}, then {"type": "token", "text": "..."} per chunk
+    """
+    yield {"type": "sources", "sources": format_sources(context)}
+    
+    prompt = build_answer_prompt(query, context)
+    for chunk in gemini_model.generate_content(prompt, stream=True):
+        if chunk.parts:
+            yield {"type": "token", "text": chunk.text}
+    
+    print(f"💬 Streamed answer for: '{query[:50]}...'")
+
 # Create the agent
 synthesis_agent = Agent(
     model='gemini-2.0-flash-exp',
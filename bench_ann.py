@@ -0,0 +1,86 @@
+"""
+Recall@k vs latency: IVF-flat index against exact search on the local vector store.
+
+Offline benchmark, no API keys needed. Data is synthetic and clustered
+(like real segment embeddings), queries are perturbed stored vectors.
+
+    python bench_ann.py --n 200000 --dim 768 --nprobe 1 4 8 16 32
+"""
+import argparse
+import tempfile
+import time
+import numpy as np
+from shared.local_vector_store import LocalVectorStore
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--n", type=int, default=100000, help="Vectors stored")
+parser.add_argument("--dim", type=int, default=768)
+parser.add_argument("--clusters", type=int, default=500, help="Topics in the synthetic data")
+parser.add_argument("--queries", type=int, default=200)
+parser.add_argument("--k", type=int, default=10)
+parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+parser.add_argument("--batch", type=int, default=10000, help="Vectors per store_batch call")
+args = parser.parse_args()
+
+rng = np.random.default_rng(0)
+
+def synthetic_batch(size: int) -> np.ndarray:
+    topics = rng.integers(0, args.clusters, size=size)
+    return (centers[topics] + 1.0 * rng.normal(size=(size, args.dim)) / np.sqrt(args.dim)).astype(np.float32)
+
+centers = rng.normal(size=(args.clusters, args.dim)) / np.sqrt(args.dim)
+
+print("=" * 70)
+print(f"📐 ANN BENCHMARK: {args.n} vectors, dim {args.dim}, recall@{args.k}")
+print("=" * 70)
+
+exact = LocalVectorStore(tempfile.mkdtemp(), dimension=args.dim, index_type="flat")
+ivf = LocalVectorStore(tempfile.mkdtemp(), dimension=args.dim, index_type="ivf")
+ivf._ann.train_threshold = min(args.n, 10000)
+
+# Incremental inserts: the IVF index trains in the background once the
+# threshold is reached, later batches are assigned to existing buckets
+stored = []
+ivf_insert_time = 0.0
+for start in range(0, args.n, args.batch):
+    batch = synthetic_batch(min(args.batch, args.n - start))
+    vectors = [{"id": f"v{start + i}", "embedding": v, "metadata": {"text": ""}} for i, v in enumerate(batch)]
+    exact.store_batch(vectors)
+    t = time.perf_counter()
+    ivf.store_batch(vectors)
+    ivf_insert_time += time.perf_counter() - t
+    stored.append(batch)
+stored = np.concatenate(stored)
+
+# Wait for (or run) the training on every stored row, so the queries below hit the index
+t = time.perf_counter()
+ivf.train_index()
+train_time = time.perf_counter() - t
+
+print(f"\n⏱️  IVF inserts: {ivf_insert_time:.2f}s, final training: {train_time:.2f}s, {len(ivf._ann.centroids)} buckets")
+
+picks = rng.integers(0, args.n, size=args.queries)
+queries = stored[picks] + 0.5 * rng.normal(size=(args.queries, args.dim)).astype(np.float32) / np.sqrt(args.dim)
+
+def run(store, **kwargs):
+    latencies, results = [], []
+    for q in queries:
+        t = time.perf_counter()
+        matches = store.search(q, top_k=args.k, **kwargs)
+        latencies.append(time.perf_counter() - t)
+        results.append({m.id for m in matches})
+    return results, np.array(latencies) * 1000
+
+truth, exact_ms = run(exact)
+print(f"\n{'index':<16}{'recall@' + str(args.k):>12}{'p50 ms':>10}{'p95 ms':>10}")
+print(f"{'exact':<16}{1.0:>12.3f}{np.percentile(exact_ms, 50):>10.2f}{np.percentile(exact_ms, 95):>10.2f}")
+
+for n_probe in args.nprobe:
+    results, ms = run(ivf, n_probe=n_probe)
+    recall = np.mean([len(r & t) / len(t) for r, t in zip(results, truth)])
+    print(f"{'ivf nprobe=' + str(n_probe):<16}{recall:>12.3f}{np.percentile(ms, 50):>10.2f}{np.percentile(ms, 95):>10.2f}")
+
+# Reload from disk and check the index comes back trained
+reloaded = LocalVectorStore(ivf.path, dimension=args.dim, index_type="ivf")
+assert reloaded._ann.is_trained and reloaded.count == args.n
+print(f"\n✅ Reloaded IVF index from {ivf.path}")
@@ -0,0 +1,69 @@
+"""
+Cold-start benchmark for the API server.
+
+Each run is a fresh Python process that measures:
+  - import time of agents.orchestrator.server
+  - first GET /health (no clients should be built)
+  - optionally the first POST /query (builds Gemini/embedding/vector clients; needs API keys)
+
+    python bench_startup.py --runs 5
+    python bench_startup.py --runs 3 --query "What role is Amit applying for?"
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent
+
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from agents.orchestrator.server import app
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(app)
+t2 = time.perf_counter()
+client.get("/health")
+t3 = time.perf_counter()
+timings = {"import_s": t1 - t0, "first_health_s": t3 - t2}
+query = sys.argv[1]
+if query:
+    t4 = time.perf_counter()
+    client.post("/query", json={"query": query})
+    timings["first_query_s"] = time.perf_counter() - t4
+from shared import clients
+timings["clients_built"] = sorted(clients._clients)
+print("BENCH " + json.dumps(timings))
+"""
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--runs", type=int, default=5)
+parser.add_argument("--query", default="", help="Also time the first /query (needs credentials)")
+args = parser.parse_args()
+
+print("=" * 70)
+print(f"🚀 STARTUP BENCHMARK: {args.runs} cold runs")
+print("=" * 70)
+
+runs = []
+for i in range(args.runs):
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, args.query],
+        cwd=ROOT, capture_output=True, text=True, env={**os.environ, "PYTHONPATH": str(ROOT)}
+    )
+    line = next((l for l in output.stdout.splitlines() if l.startswith("BENCH ")), None)
+    if line is None:
+        print(f"❌ Run {i + 1} failed:\n{output.stderr[-2000:]}")
+        sys.exit(1)
+    runs.append(json.loads(line[len("BENCH "):]))
+
+for key in ["import_s", "first_health_s", "first_query_s"]:
+    values = [r[key] for r in runs if key in r]
+    if values:
+        print(f"{key:<16} median {statistics.median(values) * 1000:8.1f} ms   min {min(values) * 1000:8.1f} ms")
+
+print(f"\nClients built by the end of a run: {runs[-1]['clients_built'] or 'none'}")
@@ -0,0 +1,110 @@
+from shared.session_store import session_store
+from datetime import datetime
+
+# Corpus-wide counters, maintained at ingest time; per-file stats are one
+# document each under the files subcollection, so the corpus document stays bounded
+AGGREGATES_PATH = ('aggregates', 'corpus')
+FILE_STATS_PATH = AGGREGATES_PATH + ('files',)
+# Largest files returned with the corpus stats
+TOP_FILES = 20
+
+# Upper bounds (seconds) of the memory duration histogram buckets
+DURATION_BUCKETS = [5, 15, 30, 60, 120]
+
+def duration_bucket(seconds: float) -> str:
+    for bound in DURATION_BUCKETS:
+        if seconds < bound:
+            return f"<{bound}s"
+    return f"{DURATION_BUCKETS[-1]}s+"
+
+class IngestAggregate:
+    """
+    Per-file statistics accumulated while its chunks are stored.
+
+    Counts and seconds per speaker, per time bucket (ingest day) and per
+    duration bucket; record() folds them into the corpus document with
+    server-side increments and writes the file's own stats document.
+    """
+
+    def __init__(self, file_id: str, session_id: str):
+        self.file_id = file_id
+        self.session_id = session_id
+        self.bucket = datetime.now().strftime("%Y-%m-%d")
+        self.segments = 0
+        self.seconds = 0.0
+        self.speakers = {}
+        self.durations = {}
+
+    def add(self, chunk: dict):
+        """Count one stored memory chunk ({start, end, speaker})"""
+        seconds = max(0.0, chunk['end'] - chunk['start'])
+        speaker = self.speakers.setdefault(chunk.get('speaker', 'Unknown'), {"segments": 0, "seconds": 0.0})
+        speaker["segments"] += 1
+        speaker["seconds"] += seconds
+        bucket = duration_bucket(seconds)
+        self.durations[bucket] = self.durations.get(bucket, 0) + 1
+        self.segments += 1
+        self.seconds += seconds
+
+    def record(self):
+        """Add this file's counts to the corpus aggregates (two coalesced writes)"""
+        from google.cloud.firestore_v1.transforms import Increment
+
+        if not self.segments:
+            return
+        session_store.write(AGGREGATES_PATH, {
+            'total_segments': Increment(self.segments),
+            'total_seconds': Increment(self.seconds),
+            'total_files': Increment(1),
+            'speakers': {
+                name: {'segments': Increment(s["segments"]), 'seconds': Increment(s["seconds"])}
+                for name, s in self.speakers.items()
+            },
+            'time_buckets': {
+                self.bucket: {'segments': Increment(self.segments), 'seconds': Increment(self.seconds), 'files': Increment(1)}
+            },
+            'durations': {bucket: Increment(n) for bucket, n in self.durations.items()},
+            'updated_at': datetime.now()
+        })
+        session_store.write(FILE_STATS_PATH + (self.file_id,), {
+            'file_id': self.file_id,
+            'session_id': self.session_id,
+            'segments': self.segments,
+            'seconds': self.seconds,
+            'speakers': {name: s["segments"] for name, s in self.speakers.items()},
+            'bucket': self.bucket
+        })
+
+def get_file_stats(file_id: str) -> dict:
+    """One file's segments, seconds and speaker counts (None if not recorded)"""
+    return session_store.read(FILE_STATS_PATH + (file_id,))
+
+def get_corpus_stats(top_files: int = TOP_FILES) -> dict:
+    """
+    Corpus-wide distributions: one document read, plus one query for the
+    top_files largest files (skipped when top_files is 0).
+
+    Returns:
+        Dictionary with totals, speaker_distribution, file_distribution (largest
+        files only), time_buckets and duration_histogram (empty when nothing is
+        ingested yet)
+    """
+    from google.cloud.firestore_v1 import Query
+
+    doc = session_store.read(AGGREGATES_PATH) or {}
+    speakers = doc.get('speakers', {})
+    files = []
+    if top_files:
+        files = session_store.collection_ref(FILE_STATS_PATH).order_by(
+            'segments', direction=Query.DESCENDING
+        ).limit(top_files).stream()
+    return {
+        'total_segments': doc.get('total_segments', 0),
+        'total_seconds': doc.get('total_seconds', 0.0),
+        'total_files': doc.get('total_files', 0),
+        'speaker_distribution': {name: s.get('segments', 0) for name, s in speakers.items()},
+        'speaker_seconds': {name: s.get('seconds', 0.0) for name, s in speakers.items()},
+        'file_distribution': {f.id: f.to_dict().get('segments', 0) for f in files},
+        'time_buckets': dict(sorted(doc.get('time_buckets', {}).items())),
+        'duration_histogram': doc.get('durations', {})
+    }
@@ -0,0 +1,193 @@
+from shared.kmeans import kmeans, assign
+import numpy as np
+import json
+import os
+
+class IVFIndex:
+    def __init__(self, path: str, dimension: int = 768, n_lists: int = None, n_probe: int = 8,
+                 train_threshold: int = 10000):
+        """
+        IVF-flat approximate index over the rows of a LocalVectorStore matrix.
+
+        Rows are bucketed by their nearest k-means centroid; a search only scores
+        rows in the n_probe closest buckets. Vectors themselves stay in the store,
+        the index only keeps centroids and a row -> bucket assignment.
+
+        Args:
+            path: Directory for ivf_centroids.npy and ivf_assignments.i32
+            dimension: Vector dimension
+            n_lists: Number of buckets (defaults to ~sqrt(n) at each training)
+            n_probe: Buckets scored per query; higher means better recall, more latency
+            train_threshold: Rows needed before the index is first trained
+        """
+        self.path = path
+        self.dimension = dimension
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.train_threshold = train_threshold
+        self._centroids_path = os.path.join(path, "ivf_centroids.npy")
+        self._assignments_path = os.path.join(path, "ivf_assignments.i32")
+        self._meta_path = os.path.join(path, "ivf_meta.json")
+
+        self.centroids = None
+        self.count = 0
+        # Rows the current centroids were trained on
+        self.trained_rows = 0
+        self._assignments = None
+        self._lists = []
+        self._list_arrays = []
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def exists(self) -> bool:
+        """Whether a trained index was saved at path"""
+        return os.path.exists(self._centroids_path) and os.path.exists(self._assignments_path)
+
+    def _open_assignments(self, capacity: int):
+        with open(self._assignments_path, "ab") as f:
+            f.truncate(max(os.path.getsize(self._assignments_path), capacity * 4))
+        self._assignments = np.memmap(self._assignments_path, dtype=np.int32, mode="r+", shape=(capacity,))
+
+    def _ensure_capacity(self, needed: int):
+        if needed <= len(self._assignments):
+            return
+        capacity = len(self._assignments)
+        while capacity < needed:
+            capacity *= 2
+        self._assignments.flush()
+        del self._assignments
+        self._open_assignments(capacity)
+
+    def _rebuild_lists(self, count: int):
+        labels = np.asarray(self._assignments[:count])
+        order = np.argsort(labels, kind="stable")
+        bounds = np.searchsorted(labels[order], np.arange(len(self.centroids) + 1))
+        self._lists = [order[bounds[i]:bounds[i + 1]].tolist() for i in range(len(self.centroids))]
+        self._list_arrays = [None] * len(self.centroids)
+
+    def needs_training(self, count: int, growth: float) -> bool:
+        """Whether count rows call for a first training, or a retrain after growing by growth x"""
+        if not self.is_trained:
+            return count >= self.train_threshold
+        return count >= growth * self.trained_rows
+
+    def fit(self, vectors: np.ndarray, iterations: int = 20, seed: int = 0) -> tuple:
+        """
+        Fit centroids on rows and assign every row, without touching the index.
+
+        Args:
+            vectors: (n, d) normalized rows, row i of the store is vectors[i]
+
+        Returns:
+            (centroids, labels) for install()
+        """
+        n = len(vectors)
+        n_lists = self.n_lists or max(1, int(np.sqrt(n)))
+
+        # Train on ~64 points per bucket; assignments still cover every row
+        sample_size = min(n, 64 * n_lists)
+        if sample_size < n:
+            sample = np.sort(np.random.default_rng(seed).choice(n, size=sample_size, replace=False))
+            training = np.asarray(vectors[sample], dtype=np.float32)
+        else:
+            training = np.asarray(vectors, dtype=np.float32)
+
+        centroids = kmeans(training, n_lists, iterations=iterations, seed=seed)
+        return centroids, assign(vectors, centroids)
+
+    def install(self, centroids: np.ndarray, labels: np.ndarray):
+        """Replace the centroids and the assignment of rows 0..len(labels)-1"""
+        n = len(labels)
+        self.centroids = centroids
+        np.save(self._centroids_path, centroids)
+
+        if self._assignments is None:
+            self._open_assignments(max(n, 1024))
+        self._ensure_capacity(n)
+        self._assignments[:n] = labels
+        self._assignments.flush()
+        self.count = n
+        self.trained_rows = n
+        with open(self._meta_path, "w") as f:
+            json.dump({"trained_rows": n}, f)
+        self._rebuild_lists(n)
+
+    def train(self, vectors: np.ndarray, iterations: int = 20, seed: int = 0):
+        """
+        Fit centroids on the current rows and (re)assign all of them.
+
+        Args:
+            vectors: (n, d) normalized rows, row i of the store is vectors[i]
+        """
+        self.install(*self.fit(vectors, iterations=iterations, seed=seed))
+
+    def add(self, rows: list, vectors: np.ndarray):
+        """Assign newly stored (or overwritten) rows to their nearest bucket"""
+        if not self.is_trained:
+            return
+
+        labels = assign(vectors, self.centroids)
+        self._ensure_capacity(max(rows) + 1)
+        for row, label in zip(rows, labels):
+            if row < self.count:
+                # Overwritten row: drop it from its old bucket first
+                previous = int(self._assignments[row])
+                self._lists[previous].remove(row)
+                self._list_arrays[previous] = None
+            else:
+                self.count = row + 1
+            self._assignments[row] = label
+            self._lists[label].append(row)
+            self._list_arrays[label] = None
+        self._assignments.flush()
+
+    def delete(self, row: int, last_row: int):
+        """Mirror LocalVectorStore.delete: drop row, then move last_row into its slot"""
+        if not self.is_trained:
+            return
+
+        label = int(self._assignments[row])
+        self._lists[label].remove(row)
+        self._list_arrays[label] = None
+
+        if row != last_row:
+            moved_label = int(self._assignments[last_row])
+            members = self._lists[moved_label]
+            members[members.index(last_row)] = row
+            self._list_arrays[moved_label] = None
+            self._assignments[row] = moved_label
+        self.count = last_row
+        self._assignments.flush()
+
+    def candidates(self, query: np.ndarray, n_probe: int = None) -> np.ndarray:
+        """Rows in the n_probe buckets closest to the (normalized) query"""
+        n_probe = min(n_probe or self.n_probe, len(self.centroids))
+        centroid_scores = self.centroids @ query
+        probe = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+
+        arrays = []
+        for label in probe:
+            if self._list_arrays[label] is None:
+                self._list_arrays[label] = np.asarray(self._lists[label], dtype=np.int64)
+            arrays.append(self._list_arrays[label])
+        return np.concatenate(arrays) if arrays else np.empty(0, dtype=np.int64)
+
+    def load(self, count: int):
+        """
+        Load centroids and assignments saved by a previous process.
+
+        Args:
+            count: Number of rows in the owning store
+        """
+        self.centroids = np.load(self._centroids_path)
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as f:
+                self.trained_rows = json.load(f)["trained_rows"]
+        else:
+            self.trained_rows = len(self.centroids) ** 2  # Saved before trained_rows was recorded
+        rows = os.path.getsize(self._assignments_path) // 4
+        self._open_assignments(max(rows, count, 1))
+        self.count = count
+        self._rebuild_lists(count)
@@ -0,0 +1,201 @@
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+import os
+import shutil
+import subprocess
+import tempfile
+
+load_dotenv()
+
+# Window length and overlap (seconds) for chunked transcription
+TRANSCRIPTION_WINDOW_S = float(os.getenv("TRANSCRIPTION_WINDOW_S", "240"))
+TRANSCRIPTION_OVERLAP_S = float(os.getenv("TRANSCRIPTION_OVERLAP_S", "10"))
+# Windows transcribed at once (each is one Speech API operation)
+TRANSCRIPTION_MAX_WORKERS = int(os.getenv("TRANSCRIPTION_MAX_WORKERS", "4"))
+
+def probe_duration(audio_path: str) -> float:
+    """Audio duration in seconds (needs ffprobe)"""
+    output = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", audio_path],
+        capture_output=True, text=True, check=True
+    )
+    return float(output.stdout.strip())
+
+def plan_windows(duration: float, window_s: float = None, overlap_s: float = None) -> list:
+    """
+    Overlapping (offset, length) windows covering [0, duration].
+
+    Each window starts window_s - overlap_s after the previous one, so
+    consecutive windows share overlap_s seconds of audio.
+    """
+    window_s = window_s or TRANSCRIPTION_WINDOW_S
+    overlap_s = TRANSCRIPTION_OVERLAP_S if overlap_s is None else overlap_s
+    if overlap_s >= window_s:
+        raise ValueError("overlap_s must be shorter than window_s")
+
+    windows = []
+    offset = 0.0
+    while True:
+        windows.append((offset, min(window_s, duration - offset)))
+        if offset + window_s >= duration:
+            return windows
+        offset += window_s - overlap_s
+
+def cut_window(audio_path: str, offset: float, length: float, out_dir: str) -> str:
+    """Copy one window of the audio to its own file (stream copy, no re-encode)"""
+    extension = os.path.splitext(audio_path)[1] or ".mp3"
+    out_path = os.path.join(out_dir, f"window_{offset:010.3f}{extension}")
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-y", "-ss", f"{offset:.3f}", "-t", f"{length:.3f}",
+         "-i", audio_path, "-c", "copy", out_path],
+        check=True
+    )
+    return out_path
+
+def _overlaps(a: dict, b: dict) -> float:
+    return max(0.0, min(a["end"], b["end"]) - max(a["start"], b["start"]))
+
+def map_speakers(previous: list, current: list, overlap_start: float, overlap_end: float,
+                 known: set) -> dict:
+    """
+    Map a window's local speaker labels onto the global labels.
+
+    Speech diarization numbers speakers per request, so "Speaker 1" in one
+    window need not be "Speaker 1" in the next. Inside the shared overlap both
+    windows heard the same audio: each local label is matched to the global
+    label it overlaps most in time there. Labels never heard in the overlap
+    get a fresh global label.
+
+    Args:
+        previous: Previous window's segments, already in global time and labels
+        current: This window's segments in global time, local labels
+        overlap_start, overlap_end: The audio both windows share
+        known: Global labels already in use; fresh labels are added to it
+
+    Returns:
+        Dict of local label -> global label
+    """
+    votes = {}
+    for seg in current:
+        if seg["end"] <= overlap_start or seg["start"] >= overlap_end:
+            continue
+        for prev in previous:
+            shared = _overlaps(seg, prev)
+            if shared > 0:
+                key = (seg["speaker"], prev["speaker"])
+                votes[key] = votes.get(key, 0.0) + shared
+
+    mapping = {}
+    taken = set()
+    for (local, global_label), _ in sorted(votes.items(), key=lambda item: -item[1]):
+        if local not in mapping and global_label not in taken:
+            mapping[local] = global_label
+            taken.add(global_label)
+
+    for seg in current:
+        if seg["speaker"] not in mapping:
+            n = 1
+            while f"Speaker {n}" in known:
+                n += 1
+            mapping[seg["speaker"]] = f"Speaker {n}"
+            known.add(f"Speaker {n}")
+    return mapping
+
+def iter_stitched_segments(audio_path: str, transcribe_window, duration: float = None,
+                           window_s: float = None, overlap_s: float = None, max_workers: int = None):
+    """
+    Transcribe overlapping windows concurrently and yield stitched segments in order.
+
+    Windows are cut with ffmpeg and handed to transcribe_window on a bounded
+    worker pool. Each window's segments are shifted by the window offset, the
+    overlap is de-duplicated by cutting at its midpoint (a segment belongs to
+    the window its midpoint falls in), and speaker labels are reconciled
+    across windows. Segments of window i are yielded as soon as windows 0..i
+    have finished, so callers can start on early audio while later windows
+    are still being transcribed.
+
+    Args:
+        audio_path: Local audio file
+        transcribe_window: Callable(path) -> {"segments": [{text, start, end, speaker}], ...}
+            with times relative to the window; raise or return {"error"} on failure
+        duration: Audio duration in seconds (probed with ffprobe if omitted)
+        window_s, overlap_s, max_workers: Override the TRANSCRIPTION_* settings
+
+    Yields:
+        Segments with global start/end and reconciled speaker labels
+    """
+    duration = probe_duration(audio_path) if duration is None else duration
+    windows = plan_windows(duration, window_s, overlap_s)
+    # Midpoints of each shared region; window i keeps segments between cuts[i] and cuts[i + 1]
+    cuts = [0.0] + [
+        (offset + prev_offset + prev_length) / 2
+        for (prev_offset, prev_length), (offset, _) in zip(windows, windows[1:])
+    ] + [float("inf")]
+
+    work_dir = tempfile.mkdtemp(prefix="recallos_windows_")
+    executor = ThreadPoolExecutor(
+        max_workers=min(max_workers or TRANSCRIPTION_MAX_WORKERS, len(windows)),
+        thread_name_prefix="recallos-transcribe"
+    )
+
+    def run(offset, length):
+        path = cut_window(audio_path, offset, length, work_dir)
+        try:
+            result = transcribe_window(path)
+        finally:
+            os.remove(path)
+        if "error" in result:
+            raise RuntimeError(f"Window at {offset:.1f}s failed: {result['error']}")
+        return result
+
+    try:
+        futures = [executor.submit(run, offset, length) for offset, length in windows]
+
+        known = set()
+        previous = []
+
+        for i, ((offset, _), future) in enumerate(zip(windows, futures)):
+            current = [{
+                **seg,
+                "start": seg["start"] + offset,
+                "end": seg["end"] + offset
+            } for seg in future.result()["segments"]]
+
+            if i > 0:
+                prev_offset, prev_length = windows[i - 1]
+                mapping = map_speakers(previous, current, offset, prev_offset + prev_length, known)
+            else:
+                # The first window's labels become the global labels
+                mapping = {seg["speaker"]: seg["speaker"] for seg in current}
+                known.update(mapping.values())
+            for seg in current:
+                seg["speaker"] = mapping[seg["speaker"]]
+
+            for seg in current:
+                midpoint = (seg["start"] + seg["end"]) / 2
+                if cuts[i] <= midpoint < cuts[i + 1]:
+                    yield seg
+            previous = current
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def transcribe_chunked(audio_path: str, transcribe_window, **kwargs) -> dict:
+    """
+    Chunked transcription with the same result shape as transcribe_audio.
+
+    Args:
+        audio_path: Local audio file
+        transcribe_window: See iter_stitched_segments
+        **kwargs: duration, window_s, overlap_s, max_workers
+
+    Returns:
+        {"text", "segments", "language", "duration"}
+    """
+    segments = list(iter_stitched_segments(audio_path, transcribe_window, **kwargs))
+    return {
+        "text": " ".join(seg["text"] for seg in segments),
+        "segments": segments,
+        "language": "en",
+        "duration": segments[-1]["end"] if segments else 0
+    }
@@ -0,0 +1,117 @@
+from dotenv import load_dotenv
+import math
+import os
+import re
+
+load_dotenv()
+
+# Target size of one memory chunk, and the longest pause merged across (seconds)
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "200"))
+CHUNK_MAX_GAP_S = float(os.getenv("CHUNK_MAX_GAP_S", "10"))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 1.3 tokens per English word), no tokenizer needed"""
+    return math.ceil(len(text.split()) * 1.3)
+
+def _pack(parts: list, max_tokens: int) -> list:
+    """Greedily join consecutive parts while they fit in max_tokens"""
+    packed = []
+    current = []
+    for part in parts:
+        if current and estimate_tokens(" ".join(current + [part])) > max_tokens:
+            packed.append(" ".join(current))
+            current = []
+        current.append(part)
+    if current:
+        packed.append(" ".join(current))
+    return packed
+
+def split_segment(segment: dict, index: int, max_tokens: int) -> list:
+    """
+    Split one overlong segment on sentence boundaries.
+
+    A single sentence over the budget is split on words. Timestamps of the
+    pieces are interpolated by character position within the segment.
+    """
+    text = segment["text"].strip()
+    if estimate_tokens(text) <= max_tokens:
+        pieces = [text]
+    else:
+        parts = []
+        words_per_piece = max(1, int(max_tokens / 1.3))
+        for sentence in _SENTENCE_END.split(text):
+            if estimate_tokens(sentence) <= max_tokens:
+                parts.append(sentence)
+            else:
+                words = sentence.split()
+                parts.extend(" ".join(words[i:i + words_per_piece]) for i in range(0, len(words), words_per_piece))
+        pieces = _pack(parts, max_tokens)
+
+    duration = segment["end"] - segment["start"]
+    total_chars = sum(len(p) for p in pieces) or 1
+    result = []
+    consumed = 0
+    for piece in pieces:
+        start = segment["start"] + duration * consumed / total_chars
+        consumed += len(piece)
+        result.append({
+            "text": piece,
+            "start": start,
+            "end": segment["start"] + duration * consumed / total_chars,
+            "speaker": segment.get("speaker", "Unknown"),
+            "segment_start": index,
+            "segment_end": index
+        })
+    return result
+
+def iter_chunks(segments, max_tokens: int = None, max_gap: float = None):
+    """
+    Streaming form of chunk_segments: yields each chunk as soon as the next
+    segment shows it can't grow any further.
+
+    Args:
+        segments: Iterable of transcript segments in time order (may be a generator)
+        max_tokens, max_gap: See chunk_segments
+    """
+    max_tokens = max_tokens or CHUNK_MAX_TOKENS
+    max_gap = CHUNK_MAX_GAP_S if max_gap is None else max_gap
+
+    last = None
+    for index, segment in enumerate(segments):
+        if not segment["text"].strip():
+            continue
+        for piece in split_segment(segment, index, max_tokens):
+            if (last
+                    and last["speaker"] == piece["speaker"]
+                    and piece["start"] - last["end"] <= max_gap
+                    and estimate_tokens(last["text"] + " " + piece["text"]) <= max_tokens):
+                last["text"] += " " + piece["text"]
+                last["end"] = max(last["end"], piece["end"])
+                last["segment_end"] = piece["segment_end"]
+            else:
+                if last:
+                    yield last
+                last = piece
+    if last:
+        yield last
+
+def chunk_segments(segments: list, max_tokens: int = None, max_gap: float = None) -> list:
+    """
+    Turn transcript segments into memory-sized chunks.
+
+    Adjacent segments from the same speaker are merged while the chunk stays
+    within max_tokens and the pause between them is at most max_gap seconds;
+    segments over the budget are first split on sentence boundaries.
+
+    Args:
+        segments: Transcript segments ({text, start, end, speaker}) in time order
+        max_tokens: Token budget per chunk (defaults to CHUNK_MAX_TOKENS)
+        max_gap: Longest pause merged across (defaults to CHUNK_MAX_GAP_S)
+
+    Returns:
+        Chunks as {text, start, end, speaker, segment_start, segment_end}, where
+        segment_start/segment_end are the inclusive range of source segment indices
+    """
+    return list(iter_chunks(segments, max_tokens, max_gap))
@@ -0,0 +1,105 @@
+from shared.connection_pool import PooledClient, get_pool
+from dotenv import load_dotenv
+import os
+import threading
+
+load_dotenv()
+
+GEMINI_MODEL_NAME = 'gemini-2.0-flash-exp'
+FIRESTORE_PROJECT = 'recallos-476300'
+
+# Concurrency caps and per-call timeouts (seconds) for the shared clients
+GEMINI_POOL_SIZE = int(os.getenv("GEMINI_POOL_SIZE", "16"))
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "60"))
+GCS_POOL_SIZE = int(os.getenv("GCS_POOL_SIZE", "8"))
+GCS_TIMEOUT = float(os.getenv("GCS_TIMEOUT", "120"))
+
+# One instance per client, shared by every agent module in the process
+_clients = {}
+_lock = threading.RLock()  # factories may build other clients (gemini -> genai)
+
+def _get_or_create(name: str, factory):
+    """Build a client on first use; later calls (from any thread) reuse it"""
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = factory()
+                _clients[name] = client
+    return client
+
+def get_memory_store():
+    """Shared vector store (Pinecone or local, per VECTOR_BACKEND)"""
+    def factory():
+        from shared.vector_store import get_vector_store
+        return get_vector_store()
+    return _get_or_create('memory_store', factory)
+
+def get_genai():
+    """google.generativeai, imported and configured once"""
+    def factory():
+        import google.generativeai as genai
+        genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+        return genai
+    return _get_or_create('genai', factory)
+
+def get_gemini_model(model_name: str = GEMINI_MODEL_NAME):
+    """Shared Gemini model handle; calls go through the "gemini" pool with a per-call timeout"""
+    def factory():
+        model = get_genai().GenerativeModel(model_name)
+        return PooledClient(model, get_pool("gemini", GEMINI_POOL_SIZE), default_kwargs={
+            "generate_content": {"request_options": {"timeout": GEMINI_TIMEOUT}},
+            "generate_content_async": {"request_options": {"timeout": GEMINI_TIMEOUT}}
+        })
+    return _get_or_create(f'gemini:{model_name}', factory)
+
+def get_speech_client():
+    """Shared Google Speech-to-Text client"""
+    def factory():
+        from google.cloud import speech
+        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", "/app/speech-key.json")
+        return speech.SpeechClient()
+    return _get_or_create('speech', factory)
+
+def get_transcriber():
+    """Shared transcription backend (Google Speech or offline, per TRANSCRIPTION_BACKEND)"""
+    def factory():
+        from shared.transcription import get_transcription_backend
+        return get_transcription_backend()
+    return _get_or_create('transcriber', factory)
+
+def get_storage_client():
+    """Shared Cloud Storage client with a keep-alive HTTP pool of GCS_POOL_SIZE connections"""
+    def factory():
+        from google.cloud import storage
+        from google.auth.transport.requests import AuthorizedSession
+        from requests.adapters import HTTPAdapter
+        import google.auth
+
+        credentials, project = google.auth.default(scopes=storage.Client.SCOPE)
+        session = AuthorizedSession(credentials)
+        session.mount("https://", HTTPAdapter(pool_connections=GCS_POOL_SIZE, pool_maxsize=GCS_POOL_SIZE))
+        return storage.Client(project=project, credentials=credentials, _http=session)
+    return _get_or_create('storage', factory)
+
+def get_firestore_client():
+    """Shared Firestore client"""
+    def factory():
+        from google.cloud import firestore
+        return firestore.Client(project=FIRESTORE_PROJECT, database='(default)')
+    return _get_or_create('firestore', factory)
+
+class LazyClient:
+    """
+    Module-level stand-in for a client that is only built when first used.
+
+    db = LazyClient(get_memory_store) behaves like the store itself:
+    db.search(...) builds (or reuses) the shared instance and forwards the call.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+
+    def __getattr__(self, name):
+        return getattr(self._factory(), name)
@@ -0,0 +1,265 @@
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+from dotenv import load_dotenv
+import asyncio
+import inspect
+import os
+import threading
+import time
+
+load_dotenv()
+
+# How long a caller may wait for a free slot before failing fast
+POOL_ACQUIRE_TIMEOUT = float(os.getenv("POOL_ACQUIRE_TIMEOUT", "30"))
+# Minimum seconds between saturation log lines per pool
+POOL_SATURATION_LOG_INTERVAL = 10.0
+
+class PoolExhausted(Exception):
+    """Raised when no pool slot frees up within the acquire timeout"""
+
+class ConnectionPool:
+    def __init__(self, name: str, size: int, acquire_timeout: float = POOL_ACQUIRE_TIMEOUT):
+        """
+        Bounded slot pool in front of a shared client.
+
+        Each in-flight call holds one slot, so at most `size` requests share the
+        client's underlying connections at once; extra callers wait here, where
+        the wait is measured, instead of queueing invisibly inside the HTTP/gRPC
+        client. Thread-safe; threads and asyncio tasks on any event loop share
+        the same slots and wait in one FIFO queue, and async callers wait on a
+        future of their own loop, so they never tie up an executor thread.
+
+        Args:
+            name: Pool name used in metrics
+            size: Maximum concurrent calls (match the client's connection pool size)
+            acquire_timeout: Seconds to wait for a slot before PoolExhausted
+        """
+        self.name = name
+        self.size = size
+        self.acquire_timeout = acquire_timeout
+        self._available = size
+        # FIFO of waiting callers: a threading.Event (thread) or an asyncio future (task)
+        self._waiters = deque()
+        self._lock = threading.Lock()
+        self._last_saturation_log = 0.0
+        self.stats = {
+            "acquired": 0,
+            "waited": 0,
+            "timeouts": 0,
+            "in_use": 0,
+            "peak_in_use": 0,
+            "total_wait_s": 0.0,
+            "max_wait_s": 0.0
+        }
+
+    def _record_acquired(self, wait: float):
+        with self._lock:
+            self.stats["acquired"] += 1
+            self.stats["in_use"] += 1
+            self.stats["peak_in_use"] = max(self.stats["peak_in_use"], self.stats["in_use"])
+            self.stats["total_wait_s"] += wait
+            self.stats["max_wait_s"] = max(self.stats["max_wait_s"], wait)
+            if wait > 0.001:
+                self.stats["waited"] += 1
+            should_log = wait > 0.001 and time.monotonic() - self._last_saturation_log > POOL_SATURATION_LOG_INTERVAL
+            if should_log:
+                self._last_saturation_log = time.monotonic()
+
+        if should_log:
+            print(f"⚠️  [{self.name} pool] saturated: waited {wait * 1000:.0f}ms for a slot ({self.size} slots)")
+
+    def _record_timeout(self):
+        with self._lock:
+            self.stats["timeouts"] += 1
+        raise PoolExhausted(f"{self.name} pool: no free slot after {self.acquire_timeout}s ({self.size} in use)")
+
+    def _release_slot(self):
+        """Give a slot to the longest waiting caller, or back to the pool"""
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if isinstance(waiter, threading.Event):
+                    waiter.set()
+                    return
+                if waiter.done():
+                    continue
+                try:
+                    waiter.get_loop().call_soon_threadsafe(self._hand_over, waiter)
+                    return
+                except RuntimeError:
+                    continue  # Its event loop is closed
+            self._available += 1
+
+    def _hand_over(self, future):
+        """Runs on the waiter's loop; a waiter that gave up meanwhile passes the slot on"""
+        if future.done():
+            self._release_slot()
+        else:
+            future.set_result(True)
+
+    def _release(self):
+        with self._lock:
+            self.stats["in_use"] -= 1
+        self._release_slot()
+
+    @contextmanager
+    def acquire(self):
+        """Hold one slot for the duration of a call"""
+        start = time.monotonic()
+        with self._lock:
+            if self._available > 0:
+                self._available -= 1
+                event = None
+            else:
+                event = threading.Event()
+                self._waiters.append(event)
+
+        if event is not None and not event.wait(self.acquire_timeout):
+            with self._lock:
+                gave_up = event in self._waiters
+                if gave_up:
+                    self._waiters.remove(event)
+            # Otherwise the slot was handed over just as the wait timed out
+            if gave_up:
+                self._record_timeout()
+        self._record_acquired(time.monotonic() - start)
+
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def acquire_async(self):
+        """Async variant of acquire: waits on an event-loop future, never on a thread"""
+        start = time.monotonic()
+        with self._lock:
+            if self._available > 0:
+                self._available -= 1
+                future = None
+            else:
+                future = asyncio.get_running_loop().create_future()
+                self._waiters.append(future)
+
+        if future is not None:
+            try:
+                await asyncio.wait_for(future, self.acquire_timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                with self._lock:
+                    queued = future in self._waiters
+                    if queued:
+                        self._waiters.remove(future)
+                if not queued and future.done() and not future.cancelled():
+                    # Granted just as we gave up: pass the slot on
+                    self._release_slot()
+                # A grant still in flight sees the cancelled future and passes it on itself
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                self._record_timeout()
+        self._record_acquired(time.monotonic() - start)
+
+        try:
+            yield
+        finally:
+            self._release()
+
+    def get_stats(self) -> dict:
+        """Saturation metrics for sizing the pool against QPS"""
+        with self._lock:
+            acquired = self.stats["acquired"]
+            return {
+                **self.stats,
+                "size": self.size,
+                "utilization": self.stats["in_use"] / self.size,
+                "wait_ratio": self.stats["waited"] / acquired if acquired else 0.0,
+                "avg_wait_ms": self.stats["total_wait_s"] / acquired * 1000 if acquired else 0.0
+            }
+
+class _PooledStream:
+    """
+    A streaming response (stream=True) that keeps its pool slot while chunks
+    are still arriving: released once iterated to the end, closed, or
+    garbage collected. Other attributes pass through to the response.
+    """
+
+    _response = None
+    _release = None
+
+    def __init__(self, response, release):
+        self._response = response
+        self._release = release
+
+    def __iter__(self):
+        try:
+            yield from self._response
+        finally:
+            self.close()
+
+    def close(self):
+        release, self._release = self._release, None
+        if release is not None:
+            release()
+
+    def __del__(self):
+        self.close()
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+class PooledClient:
+    """
+    Wraps a client so every method call runs inside a pool slot.
+
+    default_kwargs maps method names to keyword arguments added to each call
+    (e.g. per-call timeouts) unless the caller passes them explicitly.
+    Coroutine methods hold the slot until they complete; stream=True calls
+    hold it until the returned stream is consumed or closed.
+    """
+
+    def __init__(self, client, pool: ConnectionPool, default_kwargs: dict = None):
+        self._client = client
+        self._pool = pool
+        self._default_kwargs = default_kwargs or {}
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        defaults = self._default_kwargs.get(name, {})
+
+        if inspect.iscoroutinefunction(attr):
+            async def pooled_async(*args, **kwargs):
+                async with self._pool.acquire_async():
+                    return await attr(*args, **{**defaults, **kwargs})
+            return pooled_async
+
+        def pooled(*args, **kwargs):
+            if kwargs.get("stream"):
+                slot = self._pool.acquire()
+                slot.__enter__()
+                try:
+                    response = attr(*args, **{**defaults, **kwargs})
+                except BaseException:
+                    slot.__exit__(None, None, None)
+                    raise
+                return _PooledStream(response, lambda: slot.__exit__(None, None, None))
+            with self._pool.acquire():
+                return attr(*args, **{**defaults, **kwargs})
+        return pooled
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(name: str, size: int) -> ConnectionPool:
+    """Shared pool by name; size applies when the pool is first created"""
+    with _pools_lock:
+        if name not in _pools:
+            _pools[name] = ConnectionPool(name, size)
+        return _pools[name]
+
+def get_pool_stats() -> dict:
+    """Metrics for every pool created in this process"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.name: pool.get_stats() for pool in pools}
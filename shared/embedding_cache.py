@@ -0,0 +1,141 @@
+from collections import OrderedDict
+from array import array
+from dotenv import load_dotenv
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+load_dotenv()
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "/tmp/recallos_embeddings.sqlite")
+# Row cap for the SQLite tier; the oldest rows are evicted down to 90% of it once exceeded
+EMBEDDING_CACHE_MAX_ROWS = int(os.getenv("EMBEDDING_CACHE_MAX_ROWS", "500000"))
+# Seconds a persisted embedding stays valid (0 disables expiry)
+EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", str(30 * 24 * 3600)))
+
+def cache_key(model: str, task_type: str, text: str) -> str:
+    """Content-addressed key: same model, task type and text map to the same entry"""
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{model}:{task_type}:{text_hash}"
+
+class EmbeddingCache:
+    def __init__(self, max_size: int = EMBEDDING_CACHE_SIZE, path: str = EMBEDDING_CACHE_PATH,
+                 max_rows: int = EMBEDDING_CACHE_MAX_ROWS, ttl: float = EMBEDDING_CACHE_TTL):
+        """
+        Two-tier embedding cache.
+
+        Args:
+            max_size: Number of embeddings kept in the in-process LRU
+            path: SQLite file for the persistent tier ("" disables it)
+            max_rows: Row cap for the persistent tier
+            ttl: Seconds before a persisted embedding expires (0 disables expiry)
+        """
+        self.max_size = max_size
+        self.path = path
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._rows = 0
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, stored_at REAL NOT NULL DEFAULT 0)"
+            )
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")]
+            if "stored_at" not in columns:
+                # Files from before the cap: their rows count as oldest and are evicted first
+                self._conn.execute("ALTER TABLE embeddings ADD COLUMN stored_at REAL NOT NULL DEFAULT 0")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_stored_at ON embeddings (stored_at)")
+            self._conn.commit()
+            with self._lock:
+                self._evict()
+
+    def _remember(self, key: str, embedding: list):
+        """Insert into the LRU tier, evicting the oldest entry when full"""
+        self._memory[key] = tuple(embedding)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str):
+        """Return a copy of the cached embedding, or None"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return list(self._memory[key])
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT vector, stored_at FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and self.ttl and row[1] < time.time() - self.ttl:
+                    self._conn.execute("DELETE FROM embeddings WHERE key = ?", (key,))
+                    self._conn.commit()
+                    self._rows -= 1
+                    row = None
+                if row is not None:
+                    embedding = array("f", row[0]).tolist()
+                    self._remember(key, embedding)
+                    self.stats["disk_hits"] += 1
+                    return embedding
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key: str, embedding: list):
+        """Store an embedding in both tiers"""
+        self.put_many([(key, embedding)])
+
+    def put_many(self, items: list):
+        """Store (key, embedding) pairs in both tiers with a single disk commit"""
+        with self._lock:
+            for key, embedding in items:
+                self._remember(key, embedding)
+
+            if self._conn is not None and items:
+                now = time.time()
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, stored_at) VALUES (?, ?, ?)",
+                    [(key, array("f", embedding).tobytes(), now) for key, embedding in items]
+                )
+                self._conn.commit()
+                # Upper bound (replaced keys are counted again); recounted when it crosses the cap
+                self._rows += len(items)
+                if self._rows > self.max_rows:
+                    self._evict()
+
+    def _evict(self):
+        """Drop expired rows, then the oldest ones down to 90% of the row cap (lock held)"""
+        if self.ttl:
+            self._conn.execute("DELETE FROM embeddings WHERE stored_at < ?", (time.time() - self.ttl,))
+        self._rows = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        if self._rows > self.max_rows:
+            excess = self._rows - int(self.max_rows * 0.9)
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY stored_at, rowid LIMIT ?)", (excess,)
+            )
+            self._rows -= excess
+        self._conn.commit()
+
+    def get_stats(self) -> dict:
+        """Hit/miss counters plus current LRU occupancy"""
+        with self._lock:
+            lookups = sum(self.stats.values())
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            return {
+                **self.stats,
+                "memory_entries": len(self._memory),
+                "disk_entries": self._rows,
+                "hit_rate": hits / lookups if lookups else 0.0
+            }
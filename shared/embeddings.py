@@ -1,32 +1,142 @@
-import google.generativeai as genai
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from shared.clients import LazyClient, get_genai, GEMINI_POOL_SIZE, GEMINI_TIMEOUT
+from shared.connection_pool import get_pool
+from shared.embedding_cache import EmbeddingCache, cache_key
+import asyncio
 import os
 
 load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+# Imported and configured on the first embedding call
+genai = LazyClient(get_genai)
+
+EMBEDDING_MODEL = "models/text-embedding-004"
+
+# batchEmbedContents accepts at most 100 texts per request
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+EMBEDDING_MAX_WORKERS = int(os.getenv("EMBEDDING_MAX_WORKERS", "4"))
+
+# Shared cache in front of every embedding call
+embedding_cache = EmbeddingCache()
 
 def get_embedding(text: str, task_type: str = "retrieval_document") -> list:
     """
     Get embedding from Google GenAI
-    
+
     Args:
         text: Text to embed
         task_type: "retrieval_document" for storing, "retrieval_query" for querying
-    
+
     Returns:
         List of floats (768 dimensions)
     """
-    result = genai.embed_content(
-        model="models/text-embedding-004",
-        content=text,
-        task_type=task_type
-    )
+    key = cache_key(EMBEDDING_MODEL, task_type, text)
+    cached = embedding_cache.get(key)
+    if cached is not None:
+        return cached
+
+    with get_pool("embeddings", GEMINI_POOL_SIZE).acquire():
+        result = genai.embed_content(
+            model=EMBEDDING_MODEL,
+            content=text,
+            task_type=task_type,
+            request_options={"timeout": GEMINI_TIMEOUT}
+        )
+    embedding_cache.put(key, result['embedding'])
     return result['embedding']
 
+async def async_get_embedding(text: str, task_type: str = "retrieval_document") -> list:
+    """Async variant of get_embedding; the request never blocks the event loop"""
+    key = cache_key(EMBEDDING_MODEL, task_type, text)
+    # The cache is SQLite-backed, so lookups and writes run off the event loop
+    cached = await asyncio.to_thread(embedding_cache.get, key)
+    if cached is not None:
+        return cached
+
+    async with get_pool("embeddings", GEMINI_POOL_SIZE).acquire_async():
+        result = await genai.embed_content_async(
+            model=EMBEDDING_MODEL,
+            content=text,
+            task_type=task_type,
+            request_options={"timeout": GEMINI_TIMEOUT}
+        )
+    await asyncio.to_thread(embedding_cache.put, key, result['embedding'])
+    return result['embedding']
+
+def _embed_batch(texts: list, task_type: str) -> list:
+    """Embed one provider-sized batch in a single request"""
+    with get_pool("embeddings", GEMINI_POOL_SIZE).acquire():
+        result = genai.embed_content(
+            model=EMBEDDING_MODEL,
+            content=texts,
+            task_type=task_type,
+            request_options={"timeout": GEMINI_TIMEOUT}
+        )
+    return result['embedding']
+
+def get_embeddings(texts: list, task_type: str = "retrieval_document") -> list:
+    """
+    Embed many texts with one request per batch, batches run concurrently.
+
+    Args:
+        texts: Texts to embed
+        task_type: "retrieval_document" for storing, "retrieval_query" for querying
+
+    Returns:
+        List of embeddings in the same order as texts
+    """
+    if not texts:
+        return []
+
+    keys = [cache_key(EMBEDDING_MODEL, task_type, text) for text in texts]
+    embeddings = [embedding_cache.get(key) for key in keys]
+
+    # Only embed texts that missed the cache, each distinct text once
+    missing = list(dict.fromkeys(text for text, e in zip(texts, embeddings) if e is None))
+    if missing:
+        fresh = dict(zip(missing, _embed_uncached(missing, task_type)))
+        embedding_cache.put_many([(cache_key(EMBEDDING_MODEL, task_type, t), e) for t, e in fresh.items()])
+        embeddings = [e if e is not None else fresh[t] for t, e in zip(texts, embeddings)]
+
+    return embeddings
+
+def _embed_uncached(texts: list, task_type: str) -> list:
+    """Embed texts in provider-sized batches on a bounded worker pool"""
+    batches = [texts[i:i + EMBEDDING_BATCH_SIZE] for i in range(0, len(texts), EMBEDDING_BATCH_SIZE)]
+
+    if len(batches) == 1:
+        return _embed_batch(batches[0], task_type)
+
+    workers = min(EMBEDDING_MAX_WORKERS, len(batches))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # map() yields results in submission order, so output order matches input
+        results = executor.map(lambda batch: _embed_batch(batch, task_type), batches)
+        embeddings = []
+        for batch_embeddings in results:
+            embeddings.extend(batch_embeddings)
+
+    return embeddings
+
 def get_document_embedding(text: str) -> list:
     """Convenience function for document embeddings"""
     return get_embedding(text, task_type="retrieval_document")
 
 def get_query_embedding(text: str) -> list:
     """Convenience function for query embeddings"""
-    return get_embedding(text, task_type="retrieval_query")
\ No newline at end of file
+    return get_embedding(text, task_type="retrieval_query")
+
+async def async_get_query_embedding(text: str) -> list:
+    """Convenience function for query embeddings on the asyncio path"""
+    return await async_get_embedding(text, task_type="retrieval_query")
+
+def get_embedding_cache_stats() -> dict:
+    """Hit/miss counters for the embedding cache"""
+    return embedding_cache.get_stats()
+
+def get_document_embeddings(texts: list) -> list:
+    """Convenience function for batched document embeddings"""
+    return get_embeddings(texts, task_type="retrieval_document")
+
+def get_query_embeddings(texts: list) -> list:
+    """Convenience function for batched query embeddings"""
+    return get_embeddings(texts, task_type="retrieval_query")
@@ -1,19 +1,91 @@
-from google.cloud import storage, firestore
-from datetime import datetime
+from shared.clients import LazyClient, get_storage_client, get_firestore_client, GCS_POOL_SIZE, GCS_TIMEOUT
+from shared.connection_pool import get_pool
+from shared.session_store import session_store
+from datetime import datetime, timezone
+import hashlib
 import os
 
-# Initialize clients
-storage_client = storage.Client()
-firestore_client = firestore.Client(project='recallos-476300', database='(default)')
+# Clients are built on first use
+storage_client = LazyClient(get_storage_client)
+firestore_client = LazyClient(get_firestore_client)
 
 BUCKET_NAME = 'recallos-audio-files'
 
+# One document per distinct audio file, keyed by its SHA-256
+AUDIO_HASHES_COLLECTION = 'audio_hashes'
+# A 'processing' claim older than this (seconds) is assumed abandoned and may be taken over
+INGEST_CLAIM_TTL = float(os.getenv("INGEST_CLAIM_TTL", "3600"))
+
+def hash_file(file_path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file, read in blocks so memory stays constant"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _claim_is_stale(record: dict) -> bool:
+    """Whether an existing claim failed or was abandoned and may be taken over"""
+    claimed_at = record.get('claimed_at')
+    abandoned = (
+        record.get('status') == 'processing'
+        and claimed_at is not None
+        and (datetime.now(timezone.utc) - claimed_at).total_seconds() > INGEST_CLAIM_TTL
+    )
+    return record.get('status') == 'failed' or abandoned
+
+def claim_content_hash(content_hash: str, session_id: str) -> dict:
+    """
+    Register session_id as the ingest for this audio content.
+
+    A new claim is an atomic create, and taking over a failed or abandoned
+    claim is a read-check-write in one transaction, so two concurrent
+    uploads of the same file can't both process it.
+
+    Returns:
+        None if this session now owns the content, otherwise the existing
+        record ({session_id, status, ...}) of the session that does
+    """
+    from google.api_core.exceptions import AlreadyExists
+    from google.cloud import firestore
+    
+    doc_ref = firestore_client.collection(AUDIO_HASHES_COLLECTION).document(content_hash)
+    record = {
+        'session_id': session_id,
+        'status': 'processing',
+        'claimed_at': datetime.now(timezone.utc)
+    }
+    try:
+        doc_ref.create(record)
+        return None
+    except AlreadyExists:
+        pass
+    
+    @firestore.transactional
+    def take_over(transaction):
+        existing = doc_ref.get(transaction=transaction).to_dict() or {}
+        if _claim_is_stale(existing):
+            transaction.set(doc_ref, record)
+            return None
+        return existing
+    
+    return take_over(firestore_client.transaction())
+
+def update_content_hash(content_hash: str, data: dict) -> None:
+    """Update the ingest record for this audio content (e.g. status on completion)"""
+    firestore_client.collection(AUDIO_HASHES_COLLECTION).document(content_hash).set(data, merge=True)
+
+def storage_path_for(content_hash: str) -> str:
+    """Content-addressed Cloud Storage path for an uploaded audio file"""
+    return f"uploads/audio_{content_hash[:16]}.mp3"
+
 def upload_to_storage(file_path: str, destination_name: str) -> str:
     """Upload file to Cloud Storage and return public URL"""
     try:
         bucket = storage_client.bucket(BUCKET_NAME)
         blob = bucket.blob(destination_name)
-        blob.upload_from_filename(file_path)
+        with get_pool("gcs", GCS_POOL_SIZE).acquire():
+            blob.upload_from_filename(file_path, timeout=GCS_TIMEOUT)
         
         print(f"✅ Uploaded {destination_name} to Cloud Storage")
         return f"gs://{BUCKET_NAME}/{destination_name}"
@@ -22,30 +94,25 @@ def upload_to_storage(file_path: str, destination_name: str) -> str:
         raise
 
 def save_session(session_id: str, data: dict) -> None:
-    """Save session metadata to Firestore"""
-    try:
-        doc_ref = firestore_client.collection('sessions').document(session_id)
-        data['updated_at'] = datetime.now()
-        doc_ref.set(data, merge=True)
-        
-        print(f"✅ Saved session {session_id} to Firestore")
-    except Exception as e:
-        print(f"❌ Firestore save failed: {str(e)}")
-        raise
+    """Save session metadata to Firestore (coalesced into batch commits by session_store)"""
+    session_store.save(session_id, data)
 
 def get_session(session_id: str) -> dict:
     """Get session data from Firestore"""
     try:
-        doc_ref = firestore_client.collection('sessions').document(session_id)
-        doc = doc_ref.get()
-        
-        if doc.exists:
-            return doc.to_dict()
-        return None
+        return session_store.get(session_id)
     except Exception as e:
         print(f"❌ Firestore read failed: {str(e)}")
         return None
 
+def record_session_query(session_id: str, query_id: str, query: str) -> None:
+    """Append a query to the session's history (one write, no read)"""
+    session_store.record_query(session_id, query_id, query)
+
+def flush_session_writes() -> None:
+    """Commit buffered session writes now (for work that outlives its request, e.g. streams)"""
+    session_store.flush()
+
 def log_agent_action(agent_name: str, action: str, details: dict):
     """Log agent actions (using print for now)"""
     print(f"📊 [{agent_name}] {action}: {details}")
\ No newline at end of file
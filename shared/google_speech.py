@@ -0,0 +1,122 @@
+from shared.transcription import TranscriptionBackend
+from shared.chunked_transcription import transcribe_chunked, iter_stitched_segments, probe_duration, TRANSCRIPTION_WINDOW_S
+from shared.clients import get_speech_client
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+# "chunked": split long audio into overlapping windows transcribed in parallel; "single": one request per file
+TRANSCRIPTION_MODE = os.getenv("TRANSCRIPTION_MODE", "single")
+TRANSCRIPTION_TIMEOUT = float(os.getenv("TRANSCRIPTION_TIMEOUT", "300"))
+TRANSCRIPTION_WINDOW_TIMEOUT = float(os.getenv("TRANSCRIPTION_WINDOW_TIMEOUT", "300"))
+
+def build_recognition_config():
+    """Speech-to-Text config shared by whole-file and windowed transcription"""
+    from google.cloud import speech
+
+    diarization_config = speech.SpeakerDiarizationConfig(
+        enable_speaker_diarization=True,
+        min_speaker_count=1,
+        max_speaker_count=4,
+    )
+
+    return speech.RecognitionConfig(
+        encoding=speech.RecognitionConfig.AudioEncoding.MP3,
+        language_code="en-US",
+        enable_word_time_offsets=True,
+        enable_automatic_punctuation=True,
+        diarization_config=diarization_config,
+        model="latest_long",
+    )
+
+def parse_speech_response(response) -> dict:
+    """Turn a Speech-to-Text response into {"text", "segments", "language", "duration"}"""
+    full_text = ""
+    segments = []
+
+    for result in response.results:
+        alternative = result.alternatives[0]
+        full_text += alternative.transcript + " "
+
+        if alternative.words:
+            speaker_tag = getattr(alternative.words[0], 'speaker_tag', 1)
+            segments.append({
+                "text": alternative.transcript,
+                "start": alternative.words[0].start_time.total_seconds(),
+                "end": alternative.words[-1].end_time.total_seconds(),
+                "speaker": f"Speaker {speaker_tag}"
+            })
+
+    return {
+        "text": full_text.strip(),
+        "segments": segments,
+        "language": "en",
+        "duration": segments[-1]["end"] if segments else 0
+    }
+
+class GoogleSpeechBackend(TranscriptionBackend):
+    def __init__(self, mode: str = None):
+        """
+        Google Cloud Speech-to-Text with speaker diarization.
+
+        Args:
+            mode: "single" or "chunked" (defaults to TRANSCRIPTION_MODE)
+        """
+        self.mode = mode or TRANSCRIPTION_MODE
+        self.client = get_speech_client()
+
+    def transcribe(self, audio_path: str, gcs_uri: str = None, mode: str = None) -> dict:
+        """
+        Transcribe a file. If gcs_uri is provided, use a long-running operation
+        for large files. In "chunked" mode, audio longer than one window is
+        split into overlapping windows that are transcribed concurrently and
+        stitched back together.
+        """
+        from google.cloud import speech
+
+        if (mode or self.mode) == "chunked":
+            duration = probe_duration(audio_path)
+            if duration > TRANSCRIPTION_WINDOW_S:
+                print(f"   Chunked transcription of {duration:.0f}s audio...")
+                return transcribe_chunked(audio_path, self.transcribe_window, duration=duration)
+
+        # If GCS URI provided, use long-running operation (no size limit)
+        if gcs_uri:
+            print(f"   Using GCS URI: {gcs_uri}")
+            audio = speech.RecognitionAudio(uri=gcs_uri)
+
+            print("   Starting long-running transcription...")
+            operation = self.client.long_running_recognize(config=build_recognition_config(), audio=audio)
+            print("   Waiting for operation to complete...")
+            response = operation.result(timeout=TRANSCRIPTION_TIMEOUT)
+        else:
+            # For small files, use synchronous recognition
+            with open(audio_path, "rb") as audio_file:
+                audio = speech.RecognitionAudio(content=audio_file.read())
+
+            print("   Sending to Google Speech API...")
+            response = self.client.recognize(config=build_recognition_config(), audio=audio)
+
+        return parse_speech_response(response)
+
+    def iter_segments(self, audio_path: str, gcs_uri: str = None, mode: str = None):
+        """In "chunked" mode, yield each window's segments as soon as it is stitched"""
+        if (mode or self.mode) == "chunked":
+            duration = probe_duration(audio_path)
+            if duration > TRANSCRIPTION_WINDOW_S:
+                print(f"   Chunked transcription of {duration:.0f}s audio...")
+                yield from iter_stitched_segments(audio_path, self.transcribe_window, duration=duration)
+                return
+
+        yield from self.transcribe(audio_path, gcs_uri=gcs_uri, mode="single")["segments"]
+
+    def transcribe_window(self, window_path: str) -> dict:
+        """Transcribe one chunked-mode window; raises on failure so the whole file fails"""
+        from google.cloud import speech
+
+        with open(window_path, "rb") as audio_file:
+            audio = speech.RecognitionAudio(content=audio_file.read())
+
+        operation = self.client.long_running_recognize(config=build_recognition_config(), audio=audio)
+        return parse_speech_response(operation.result(timeout=TRANSCRIPTION_WINDOW_TIMEOUT))
@@ -0,0 +1,33 @@
+from shared.google_services import log_agent_action
+from shared.lexical_index import lexical_index
+from shared.topics import topic_map
+
+def index_stored_vectors(vectors: list, reports: list, batch_size: int) -> None:
+    """
+    Add successfully upserted vectors to the BM25 index and the precomputed
+    topic map. Best effort: an index problem never fails the ingest.
+
+    Args:
+        vectors: list of dicts with keys: id, embedding, metadata
+        reports: per-chunk store reports ({"chunk", "stored", ...})
+        batch_size: vectors per reported chunk
+    """
+    stored = [
+        v for report in reports if report["stored"]
+        for v in vectors[report["chunk"] * batch_size:(report["chunk"] + 1) * batch_size]
+    ]
+    try:
+        lexical_index.add([(v["id"], v["metadata"].get("text", "")) for v in stored])
+    except Exception as e:
+        log_agent_action('lexical_index', 'add_failed', {'error': str(e)})
+    try:
+        topic_map.assign(stored)
+    except Exception as e:
+        log_agent_action('topics', 'assign_failed', {'error': str(e)})
+
+def unindex_vectors(ids: list) -> None:
+    """Remove deleted vectors from the BM25 index. Best effort, like index_stored_vectors."""
+    try:
+        lexical_index.delete(ids)
+    except Exception as e:
+        log_agent_action('lexical_index', 'delete_failed', {'error': str(e)})
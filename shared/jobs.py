@@ -0,0 +1,92 @@
+from concurrent.futures import ThreadPoolExecutor
+from shared.google_services import save_session, get_session, log_agent_action
+from shared.session_store import session_store
+from dotenv import load_dotenv
+from datetime import datetime
+import os
+import threading
+
+load_dotenv()
+
+# Number of jobs processed at once, and how many may wait behind them
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "2"))
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "50"))
+
+executor = ThreadPoolExecutor(max_workers=JOB_CONCURRENCY, thread_name_prefix="recallos-job")
+_pending = 0
+_pending_lock = threading.Lock()
+
+class JobQueueFull(Exception):
+    """Raised when JOB_MAX_PENDING jobs are already queued or running"""
+
+def _run_job(job_id: str, fn, args: tuple, kwargs: dict, on_done):
+    """Run a job on a worker thread and record unexpected failures in its session"""
+    global _pending
+    try:
+        fn(*args, **kwargs)
+    except Exception as e:
+        log_agent_action('jobs', 'job_failed', {'job_id': job_id, 'error': str(e)})
+        save_session(job_id, {
+            'status': 'failed',
+            'error': str(e),
+            'failed_at': datetime.now().isoformat()
+        })
+    finally:
+        # The final status must not wait for the write-behind timer (CPU may be
+        # throttled once no request is in flight, e.g. on Cloud Run)
+        try:
+            session_store.flush()
+        except Exception as e:
+            print(f"❌ Session flush after job {job_id} failed: {str(e)}")
+        with _pending_lock:
+            _pending -= 1
+        if on_done:
+            on_done()
+
+def submit_job(job_id: str, fn, *args, on_done=None, **kwargs) -> str:
+    """
+    Queue fn(*args, **kwargs) on the bounded worker pool.
+
+    The job's status lives in the Firestore session document with the same id,
+    so fn is expected to update it as it progresses.
+
+    Args:
+        job_id: Session id used as the job id
+        fn: Callable to run in the background
+        on_done: Optional callback run after fn finishes (e.g. temp file cleanup)
+
+    Returns:
+        The job id
+    """
+    global _pending
+    with _pending_lock:
+        if _pending >= JOB_MAX_PENDING:
+            raise JobQueueFull(f"{_pending} jobs already pending")
+        _pending += 1
+
+    try:
+        save_session(job_id, {
+            'status': 'queued',
+            'queued_at': datetime.now().isoformat()
+        })
+        executor.submit(_run_job, job_id, fn, args, kwargs, on_done)
+    except Exception:
+        with _pending_lock:
+            _pending -= 1
+        raise
+
+    log_agent_action('jobs', 'job_queued', {'job_id': job_id, 'pending': _pending})
+    return job_id
+
+def get_job(job_id: str) -> dict:
+    """Get job status from its Firestore session document"""
+    return get_session(job_id)
+
+def get_queue_stats() -> dict:
+    """Current worker pool occupancy"""
+    with _pending_lock:
+        return {
+            'concurrency': JOB_CONCURRENCY,
+            'pending': _pending,
+            'max_pending': JOB_MAX_PENDING
+        }
@@ -0,0 +1,132 @@
+import numpy as np
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def assign(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+    """
+    Nearest centroid (by cosine) for each row.
+
+    Args:
+        vectors: (n, d) normalized vectors
+        centroids: (k, d) normalized centroids
+        chunk_size: Rows scored per matrix multiply, bounds peak memory
+
+    Returns:
+        (n,) int32 array of centroid indices
+    """
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), chunk_size):
+        block = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+        labels[start:start + chunk_size] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+def kmeans_plus_plus(vectors: np.ndarray, k: int, rng: np.random.Generator, sample_size: int = 20000) -> np.ndarray:
+    """
+    k-means++ seeding (cosine distance) on a random sample of the rows.
+
+    Returns:
+        (k,) sorted row indices into vectors
+    """
+    n = len(vectors)
+    sample = np.sort(rng.choice(n, size=min(n, sample_size), replace=False))
+    data = np.asarray(vectors[sample], dtype=np.float32)
+
+    # Squared distance to the nearest chosen seed
+    chosen = [int(rng.integers(len(data)))]
+    distances = np.maximum(1.0 - data @ data[chosen[0]], 0.0) ** 2
+    for _ in range(1, k):
+        total = distances.sum()
+        if total <= 0:
+            remaining = np.setdiff1d(np.arange(len(data)), chosen)
+            chosen.extend(rng.choice(remaining, size=k - len(chosen), replace=False).tolist())
+            break
+        chosen.append(int(rng.choice(len(data), p=distances / total)))
+        distances = np.minimum(distances, np.maximum(1.0 - data @ data[chosen[-1]], 0.0) ** 2)
+
+    return np.sort(sample[chosen])
+
+def kmeans(vectors: np.ndarray, k: int, iterations: int = 20, batch_size: int = None, seed: int = 0,
+           init: str = "random") -> np.ndarray:
+    """
+    Spherical k-means over normalized vectors.
+
+    Args:
+        vectors: (n, d) normalized vectors (a memmap works)
+        k: Number of clusters (capped at n)
+        iterations: Full passes, or mini-batch steps when batch_size is set
+        batch_size: Use mini-batch k-means with this many samples per step
+        seed: Random seed for initialization and sampling
+        init: "random" rows or "k-means++" seeding (slower, avoids merged clusters)
+
+    Returns:
+        (k, d) float32 array of normalized centroids
+    """
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    k = min(k, n)
+
+    if init == "k-means++":
+        rows = kmeans_plus_plus(vectors, k, rng)
+    elif init == "random":
+        rows = np.sort(rng.choice(n, size=k, replace=False))
+    else:
+        raise ValueError(f"Unknown init: {init}")
+    centroids = _normalize(np.asarray(vectors[rows], dtype=np.float32))
+
+    if batch_size:
+        # Mini-batch updates with a per-centroid learning rate of 1/count
+        counts = np.zeros(k, dtype=np.int64)
+        for _ in range(iterations):
+            sample = np.sort(rng.choice(n, size=min(batch_size, n), replace=False))
+            batch = np.asarray(vectors[sample], dtype=np.float32)
+            labels = np.argmax(batch @ centroids.T, axis=1)
+
+            for c in np.unique(labels):
+                members = batch[labels == c]
+                counts[c] += len(members)
+                rate = len(members) / counts[c]
+                centroids[c] = (1 - rate) * centroids[c] + rate * members.mean(axis=0)
+
+            # A centroid that wins nothing in a batch is starved (typically two seeds
+            # in one cluster): it takes half of the batch's largest cluster, split
+            # along its members' principal direction
+            sizes = np.bincount(labels, minlength=k)
+            empty = np.flatnonzero(sizes == 0)
+            largest = int(np.argmax(sizes))
+            members = batch[labels == largest]
+            if len(empty) and len(members) > 1:
+                centered = members - members.mean(axis=0)
+                direction = np.linalg.svd(centered, full_matrices=False)[2][0]
+                offset = np.std(centered @ direction) * direction
+                centroids[empty[0]] = centroids[largest] + offset
+                centroids[largest] = centroids[largest] - offset
+                counts[empty[0]] = counts[largest] = counts[largest] // 2
+            centroids = _normalize(centroids)
+        return centroids
+
+    data = np.asarray(vectors, dtype=np.float32)
+    for _ in range(iterations):
+        labels = assign(data, centroids)
+
+        # Per-cluster sums via one sort + reduceat instead of a scatter-add
+        order = np.argsort(labels, kind="stable")
+        sizes = np.bincount(labels, minlength=k)
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        sums = np.zeros_like(centroids)
+        nonempty = sizes > 0
+        sums[nonempty] = np.add.reduceat(data[order], starts[nonempty], axis=0)
+
+        # Re-seed empty clusters with random points
+        empty = ~nonempty
+        if empty.any():
+            sums[empty] = data[rng.choice(n, size=int(empty.sum()), replace=False)]
+
+        updated = _normalize(sums)
+        if np.allclose(updated, centroids, atol=1e-6):
+            break
+        centroids = updated
+
+    return centroids
@@ -0,0 +1,374 @@
+from array import array
+from collections import Counter
+from dotenv import load_dotenv
+import numpy as np
+import json
+import math
+import os
+import re
+import threading
+
+load_dotenv()
+
+# Where the BM25 index (snapshot + journal) is persisted
+LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", "/tmp/recallos_lexical")
+# A background compaction starts once the journal holds this fraction of the
+# snapshot's documents, and at least BM25_COMPACT_MIN entries
+BM25_COMPACT_RATIO = float(os.getenv("BM25_COMPACT_RATIO", "0.25"))
+BM25_COMPACT_MIN = int(os.getenv("BM25_COMPACT_MIN", "1000"))
+# Entries added during a compaction that are re-applied under the lock at the swap
+BM25_SWAP_TAIL = 256
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Words, numbers, and tokens like "3.5", "v2.0" or "o'brien" kept whole
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.'][a-z0-9]+)*")
+STOPWORDS = frozenset("""
+a an and are as at be but by did do does for from had has have he her his i if in into is it its
+me my of on or our she so than that the their them then there these they this to was we were
+what when where which who why will with would you your
+""".split())
+
+def tokenize(text: str) -> list:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+def reciprocal_rank_fusion(rankings: list, k: int = 60) -> list:
+    """
+    Fuse ranked id lists: score(id) = sum over lists of 1 / (k + rank).
+
+    Returns:
+        List of (id, score), best first
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, id in enumerate(ranking, 1):
+            scores[id] = scores.get(id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+class BM25Index:
+    def __init__(self, path: str = LEXICAL_INDEX_PATH, k1: float = BM25_K1, b: float = BM25_B):
+        """
+        Incrementally maintained BM25 inverted index over memory text.
+
+        Postings are per-term int32 arrays of (doc number, term frequency),
+        scored with vectorized NumPy. Writes append one JSON line per
+        document to path/bm25.log. Once the journal reaches
+        BM25_COMPACT_RATIO of the snapshot size, a background thread writes
+        the live documents as a compact CSR snapshot (path/bm25.npz): the
+        journal is rotated to bm25.log.compacting, the snapshot is written
+        outside the lock while adds and searches continue, and the entries
+        added meanwhile are re-applied on top of it. Re-adding an id
+        replaces its document; deletes are journaled as [id, null].
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._snapshot_path = os.path.join(path, "bm25.npz")
+        self._journal_path = os.path.join(path, "bm25.log")
+        self._rotated_path = self._journal_path + ".compacting"
+        self._lock = threading.RLock()
+        # Serializes compactions; taken before _lock
+        self._compact_lock = threading.Lock()
+        self._loaded = False
+        self._pending = None
+        self._reset()
+
+    def _reset(self):
+        self._ids = []
+        self._doc_of = {}
+        self._lengths = array("i")
+        self._alive = bytearray()
+        self._postings = {}
+        self._total_length = 0
+        self._journal_entries = 0
+        self._snapshot_docs = 0
+
+    @property
+    def count(self) -> int:
+        """Number of live documents"""
+        self._ensure_loaded()
+        return len(self._doc_of)
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+
+    def _load(self):
+        self._reset()
+        self._load_snapshot()
+        # A rotated journal is left behind when a compaction was interrupted
+        for path in (self._rotated_path, self._journal_path):
+            if os.path.exists(path):
+                with open(path, "rb+") as f:
+                    valid = 0
+                    for line in f:
+                        try:
+                            if not line.endswith(b"\n"):
+                                raise ValueError("unterminated line")
+                            id, counts = json.loads(line)
+                        except ValueError:
+                            # Torn final line from an interrupted write: cut it off so
+                            # later appends start on a line of their own
+                            f.truncate(valid)
+                            break
+                        valid += len(line)
+                        self._apply(id, counts)
+                        self._journal_entries += 1
+
+    def _load_snapshot(self):
+        if not os.path.exists(self._snapshot_path):
+            return
+        with np.load(self._snapshot_path) as snapshot:
+            ids = snapshot["ids"].tolist()
+            lengths = snapshot["lengths"]
+            terms = snapshot["terms"].tolist()
+            offsets = snapshot["offsets"]
+            docs = snapshot["docs"]
+            tfs = snapshot["tfs"].astype(np.int32)
+
+        self._ids = ids
+        self._doc_of = {id: i for i, id in enumerate(ids)}
+        self._lengths = array("i", lengths.astype(np.int32).tobytes())
+        self._alive = bytearray(b"\x01" * len(ids))
+        self._total_length = int(lengths.sum())
+        self._snapshot_docs = len(ids)
+        for i, term in enumerate(terms):
+            start, end = offsets[i], offsets[i + 1]
+            self._postings[term] = (array("i", docs[start:end].tobytes()), array("i", tfs[start:end].tobytes()))
+
+    def _apply(self, id: str, counts: dict):
+        """Index counts under id, replacing its previous document; counts None deletes it"""
+        old = self._doc_of.pop(id, None)
+        if old is not None:
+            self._alive[old] = 0
+            self._total_length -= self._lengths[old]
+        if counts is None:
+            return
+
+        doc = len(self._ids)
+        length = sum(counts.values())
+        self._ids.append(id)
+        self._doc_of[id] = doc
+        self._lengths.append(length)
+        self._alive.append(1)
+        self._total_length += length
+        for term, tf in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array("i"), array("i"))
+            postings[0].append(doc)
+            postings[1].append(tf)
+
+    def add(self, documents: list):
+        """
+        Index (or re-index) documents.
+
+        Args:
+            documents: list of (id, text)
+        """
+        if not documents:
+            return
+        self._write([(id, dict(Counter(tokenize(text)))) for id, text in documents])
+
+    def delete(self, ids: list):
+        """Remove documents (journaled like add; unknown ids are ignored)"""
+        if not ids:
+            return
+        self._write([(id, None) for id in ids])
+
+    def _write(self, entries: list):
+        """Journal and apply (id, counts) entries; counts None is a delete"""
+        self._ensure_loaded()
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            with open(self._journal_path, "a") as f:
+                f.write("".join(json.dumps(entry) + "\n" for entry in entries))
+            for id, counts in entries:
+                self._apply(id, counts)
+            self._journal_entries += len(entries)
+            if self._pending is not None:
+                self._pending.extend(entries)
+            elif self._needs_compaction():
+                threading.Thread(target=self._compact_in_background, daemon=True, name="recallos-bm25-compact").start()
+
+    def search(self, query: str, top_k: int = 10) -> list:
+        """
+        BM25 top matches for query.
+
+        Returns:
+            List of (id, score), best first; documents sharing no term with the query are left out
+        """
+        self._ensure_loaded()
+        terms = set(tokenize(query))
+        with self._lock:
+            n = len(self._doc_of)
+            if not terms or not n:
+                return []
+
+            avg_length = self._total_length / n
+            lengths = np.frombuffer(self._lengths, dtype=np.int32)
+            alive = np.frombuffer(self._alive, dtype=np.uint8)
+            scores = np.zeros(len(self._ids), dtype=np.float32)
+
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                docs = np.frombuffer(postings[0], dtype=np.int32)
+                tfs = np.frombuffer(postings[1], dtype=np.int32)
+                live = alive[docs] == 1
+                docs, tfs = docs[live], tfs[live].astype(np.float32)
+                if not len(docs):
+                    continue
+
+                idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * lengths[docs] / avg_length)
+                scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + norm)
+
+            matched = np.flatnonzero(scores)
+            if len(matched) > top_k:
+                matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+            matched = matched[np.argsort(-scores[matched])]
+            return [(self._ids[doc], float(scores[doc])) for doc in matched]
+
+    def _needs_compaction(self) -> bool:
+        return self._journal_entries >= max(BM25_COMPACT_MIN, BM25_COMPACT_RATIO * self._snapshot_docs)
+
+    def _compact_in_background(self):
+        if not self._compact_lock.acquire(blocking=False):
+            return
+        try:
+            # Threads started while a previous compaction ran find nothing to do
+            if self._needs_compaction():
+                self._compact()
+        except Exception as e:
+            print(f"⚠️ BM25 compaction failed: {e}")
+        finally:
+            self._compact_lock.release()
+
+    def save(self):
+        """Write a compact snapshot of the live documents and truncate the journal"""
+        self._ensure_loaded()
+        with self._compact_lock:
+            self._compact()
+
+    def _compact(self):
+        """Snapshot under the lock, write outside it, then swap in the compacted numbering"""
+        with self._lock:
+            # New adds go to a fresh journal (and _pending) from here on
+            if os.path.exists(self._journal_path):
+                if os.path.exists(self._rotated_path):
+                    with open(self._journal_path) as src, open(self._rotated_path, "a") as dst:
+                        dst.write(src.read())
+                    os.remove(self._journal_path)
+                else:
+                    os.replace(self._journal_path, self._rotated_path)
+            self._pending = []
+
+            live = np.flatnonzero(np.frombuffer(self._alive, dtype=np.uint8))
+            ids = [self._ids[doc] for doc in live]
+            lengths = np.frombuffer(self._lengths, dtype=np.int32)[live]
+            renumber = np.full(len(self._ids), -1, dtype=np.int32)
+            renumber[live] = np.arange(len(live), dtype=np.int32)
+            postings = {term: (renumber[np.frombuffer(docs, dtype=np.int32)], np.array(tfs, dtype=np.int32))
+                        for term, (docs, tfs) in self._postings.items()}
+
+        try:
+            terms, offsets, docs, tfs = [], [0], [], []
+            for term in sorted(postings):
+                term_docs, term_tfs = postings[term]
+                keep = term_docs >= 0
+                if not keep.any():
+                    continue
+                terms.append(term)
+                docs.append(term_docs[keep])
+                tfs.append(term_tfs[keep])
+                offsets.append(offsets[-1] + int(keep.sum()))
+            del postings
+
+            os.makedirs(self.path, exist_ok=True)
+            tmp = self._snapshot_path + ".tmp.npz"
+            np.savez_compressed(
+                tmp,
+                ids=np.array(ids, dtype=str),
+                lengths=lengths,
+                terms=np.array(terms, dtype=str),
+                offsets=np.array(offsets, dtype=np.int64),
+                docs=np.concatenate(docs) if docs else np.zeros(0, dtype=np.int32),
+                tfs=np.minimum(np.concatenate(tfs), 65535).astype(np.uint16) if tfs else np.zeros(0, dtype=np.uint16)
+            )
+            os.replace(tmp, self._snapshot_path)
+            if os.path.exists(self._rotated_path):
+                os.remove(self._rotated_path)
+
+            compacted = BM25Index(self.path, self.k1, self.b)
+            compacted._load_snapshot()
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        self._swap_in(compacted)
+
+    def _swap_in(self, replacement):
+        """
+        Catch replacement up with the writes recorded in _pending, outside the
+        lock until only a short tail is left, then make its state this index's.
+        """
+        caught_up = 0
+        while True:
+            with self._lock:
+                tail = self._pending[caught_up:]
+                if len(tail) <= BM25_SWAP_TAIL:
+                    for id, counts in tail:
+                        replacement._apply(id, counts)
+                    for name in ("_ids", "_doc_of", "_lengths", "_alive", "_postings", "_total_length", "_snapshot_docs"):
+                        setattr(self, name, getattr(replacement, name))
+                    self._journal_entries = len(self._pending)
+                    self._pending = None
+                    return
+            for id, counts in tail:
+                replacement._apply(id, counts)
+            caught_up += len(tail)
+
+    def rebuild(self, store, batch_size: int = 1000) -> int:
+        """
+        Re-index every memory in store (e.g. a fresh instance in front of a shared Pinecone index).
+
+        The store is scanned into a separate index without holding the lock,
+        so searches and adds continue meanwhile; adds and deletes made during
+        the scan are replayed on top of it before it is swapped in and saved.
+        """
+        self._ensure_loaded()
+        with self._compact_lock:
+            with self._lock:
+                self._pending = []
+            try:
+                fresh = BM25Index(self.path, self.k1, self.b)
+                fresh._loaded = True
+                for batch in store.iter_vectors(batch_size):
+                    for v in batch:
+                        fresh._apply(v["id"], dict(Counter(tokenize(v["metadata"].get("text", "")))))
+            except Exception:
+                with self._lock:
+                    self._pending = None
+                raise
+            self._swap_in(fresh)
+            self._compact()
+            return self.count
+
+    def get_stats(self) -> dict:
+        self._ensure_loaded()
+        with self._lock:
+            return {
+                "documents": len(self._doc_of),
+                "terms": len(self._postings),
+                "journal_entries": self._journal_entries,
+                "compacting": self._pending is not None
+            }
+
+lexical_index = BM25Index()
@@ -0,0 +1,333 @@
+from shared.vector_store import VectorStore, VectorMatch
+from shared.ann_index import IVFIndex
+from shared.kmeans import assign
+from dotenv import load_dotenv
+import numpy as np
+import json
+import os
+import sqlite3
+import threading
+
+load_dotenv()
+
+# "flat" for exact search, "ivf" for the approximate IVF-flat index
+LOCAL_VECTOR_INDEX = os.getenv("LOCAL_VECTOR_INDEX", "flat")
+IVF_N_PROBE = int(os.getenv("IVF_N_PROBE", "8"))
+IVF_N_LISTS = int(os.getenv("IVF_N_LISTS", "0")) or None
+IVF_TRAIN_THRESHOLD = int(os.getenv("IVF_TRAIN_THRESHOLD", "10000"))
+# The IVF index is retrained (n_lists ~ sqrt(n) again) once the store grows by this factor
+IVF_RETRAIN_GROWTH = float(os.getenv("IVF_RETRAIN_GROWTH", "2"))
+
+def _matches_condition(value, condition) -> bool:
+    """Evaluate one Pinecone-style condition against a metadata value"""
+    if not isinstance(condition, dict):
+        return value == condition
+
+    for op, operand in condition.items():
+        if op == "$eq" and not value == operand:
+            return False
+        if op == "$ne" and not value != operand:
+            return False
+        if op == "$in" and value not in operand:
+            return False
+        if op == "$nin" and value in operand:
+            return False
+        if op == "$exists" and (value is not None) != operand:
+            return False
+        if op in ("$gt", "$gte", "$lt", "$lte"):
+            if value is None:
+                return False
+            if op == "$gt" and not value > operand:
+                return False
+            if op == "$gte" and not value >= operand:
+                return False
+            if op == "$lt" and not value < operand:
+                return False
+            if op == "$lte" and not value <= operand:
+                return False
+    return True
+
+def matches_filter(metadata: dict, filter: dict) -> bool:
+    """
+    Check metadata against a Pinecone metadata filter.
+    Supports field equality, $eq/$ne/$in/$nin/$gt/$gte/$lt/$lte/$exists, $and and $or.
+    """
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, f) for f in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, f) for f in condition):
+                return False
+        elif not _matches_condition(metadata.get(key), condition):
+            return False
+    return True
+
+class LocalVectorStore(VectorStore):
+    def __init__(self, path: str, dimension: int = 768, initial_capacity: int = 1024,
+                 index_type: str = LOCAL_VECTOR_INDEX):
+        """
+        In-process vector store with cosine search.
+
+        Vectors live in a contiguous float32 matrix of normalized rows, memory-mapped
+        from path/vectors.f32. Ids and metadata live in path/metadata.sqlite.
+        index_type "flat" scans every row; "ivf" only scores the closest
+        buckets of an IVFIndex. The index is trained on a background thread
+        once IVF_TRAIN_THRESHOLD rows exist and retrained whenever the row
+        count grows by IVF_RETRAIN_GROWTH; searches use the previous index
+        (or a flat scan) until the new one is swapped in.
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.dimension = dimension
+        self._lock = threading.RLock()
+        self._vectors_path = os.path.join(path, "vectors.f32")
+
+        self._conn = sqlite3.connect(os.path.join(path, "metadata.sqlite"), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS vectors (id TEXT PRIMARY KEY, row INTEGER NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+        rows = self._conn.execute("SELECT id, row, metadata FROM vectors ORDER BY row").fetchall()
+        self.count = len(rows)
+        self._ids = [r[0] for r in rows]
+        self._metadata = [json.loads(r[2]) for r in rows]
+        self._row_of = {id: i for i, id in enumerate(self._ids)}
+
+        existing_rows = 0
+        if os.path.exists(self._vectors_path):
+            existing_rows = os.path.getsize(self._vectors_path) // (4 * dimension)
+        self._open_matrix(max(initial_capacity, existing_rows, self.count))
+
+        self._ann = None
+        # Serializes index training; rows changed while it runs are re-assigned at the swap
+        self._train_lock = threading.Lock()
+        self._changed_rows = None
+        if index_type == "ivf":
+            self._ann = IVFIndex(path, dimension, n_lists=IVF_N_LISTS, n_probe=IVF_N_PROBE,
+                                 train_threshold=IVF_TRAIN_THRESHOLD)
+            if self._ann.exists():
+                self._ann.load(self.count)
+        elif index_type != "flat":
+            raise ValueError(f"Unknown index_type: {index_type}")
+
+    def _open_matrix(self, capacity: int):
+        """(Re)map the vector file with room for capacity rows"""
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(max(os.path.getsize(self._vectors_path), capacity * self.dimension * 4))
+        self.capacity = capacity
+        self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+
+    def _ensure_capacity(self, needed: int):
+        if needed <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        self._matrix.flush()
+        del self._matrix
+        self._open_matrix(capacity)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def store(self, id: str, embedding: list, metadata: dict):
+        """Store a single vector"""
+        self.store_batch([{"id": id, "embedding": embedding, "metadata": metadata}])
+
+    def store_batch(self, vectors: list):
+        """
+        Store multiple vectors (existing ids are overwritten)
+        vectors: list of dicts with keys: id, embedding, metadata
+        """
+        if not vectors:
+            return []
+
+        embeddings = self._normalize(np.asarray([v["embedding"] for v in vectors], dtype=np.float32))
+
+        with self._lock:
+            rows = []
+            new_count = self.count
+            for v in vectors:
+                row = self._row_of.get(v["id"])
+                if row is None:
+                    row = new_count
+                    new_count += 1
+                    self._row_of[v["id"]] = row
+                    self._ids.append(v["id"])
+                    self._metadata.append(v["metadata"])
+                else:
+                    self._metadata[row] = v["metadata"]
+                rows.append(row)
+
+            self._ensure_capacity(new_count)
+            self._matrix[rows] = embeddings
+            self._matrix.flush()
+            self.count = new_count
+
+            if self._ann is not None:
+                self._ann.add(rows, embeddings)
+                if self._changed_rows is not None:
+                    self._changed_rows.update(rows)
+                elif self._ann.needs_training(self.count, IVF_RETRAIN_GROWTH):
+                    threading.Thread(target=self._train_in_background, daemon=True,
+                                     name="recallos-ivf-train").start()
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vectors (id, row, metadata) VALUES (?, ?, ?)",
+                [(v["id"], row, json.dumps(v["metadata"])) for v, row in zip(vectors, rows)]
+            )
+            self._conn.commit()
+
+        return rows
+
+    def _train_in_background(self):
+        if not self._train_lock.acquire(blocking=False):
+            return
+        try:
+            # Threads started while a previous training ran find nothing to do
+            if self._ann.needs_training(self.count, IVF_RETRAIN_GROWTH):
+                self._train()
+        except Exception as e:
+            print(f"⚠️ IVF training failed: {e}")
+        finally:
+            self._train_lock.release()
+
+    def train_index(self):
+        """(Re)train the approximate index on every stored row"""
+        if self._ann is None:
+            return
+        with self._train_lock:
+            self._train()
+
+    def _train(self):
+        """Fit on a snapshot of the rows outside the lock, then swap the new index in"""
+        with self._lock:
+            count = self.count
+            if not count:
+                return
+            matrix = self._matrix
+            self._changed_rows = set()
+
+        try:
+            centroids, labels = self._ann.fit(matrix[:count])
+        except Exception:
+            with self._lock:
+                self._changed_rows = None
+            raise
+
+        with self._lock:
+            # Rows written, overwritten or moved by a delete during the fit, plus rows appended since
+            stale = sorted(row for row in self._changed_rows if row < min(count, self.count))
+            stale += range(count, self.count)
+            self._changed_rows = None
+
+            labels = labels[:self.count]
+            if self.count > count:
+                labels = np.concatenate([labels, np.zeros(self.count - count, dtype=labels.dtype)])
+            if stale:
+                labels[stale] = assign(self._matrix[stale], centroids)
+            self._ann.install(centroids, labels)
+
+    def search(self, query_embedding: list, top_k: int = 5, filter: dict = None, n_probe: int = None):
+        """
+        Search for similar vectors
+        n_probe overrides IVF_N_PROBE for this query (ignored for flat search)
+        """
+        query = self._normalize(np.asarray(query_embedding, dtype=np.float32))
+
+        with self._lock:
+            if self.count == 0:
+                return []
+
+            if self._ann is not None and self._ann.is_trained:
+                rows = self._ann.candidates(query, n_probe)
+                scores = self._matrix[rows] @ query
+            else:
+                rows = None
+                scores = self._matrix[:self.count] @ query
+
+            if filter:
+                metadata = self._metadata if rows is None else [self._metadata[r] for r in rows]
+                mask = np.fromiter(
+                    (matches_filter(m, filter) for m in metadata),
+                    dtype=bool, count=len(scores)
+                )
+                scores = np.where(mask, scores, -np.inf)
+                candidates = int(mask.sum())
+            else:
+                candidates = len(scores)
+
+            return self._top_k(scores, min(top_k, candidates), rows)
+
+    def _top_k(self, scores: np.ndarray, k: int, rows: np.ndarray = None) -> list:
+        """Turn a score per candidate into the k best matches, best first"""
+        if k <= 0:
+            return []
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+
+        row_ids = top if rows is None else rows[top]
+        return [VectorMatch(self._ids[r], float(scores[i]), self._metadata[r]) for i, r in zip(top, row_ids)]
+
+    def fetch(self, ids: list) -> list:
+        """Look up vectors by id (unknown ids are skipped)"""
+        with self._lock:
+            rows = [(id, self._row_of[id]) for id in ids if id in self._row_of]
+            return [{
+                "id": id,
+                "embedding": np.array(self._matrix[row]),
+                "metadata": self._metadata[row]
+            } for id, row in rows]
+
+    def iter_vectors(self, batch_size: int = 1000):
+        """Stream every stored vector in row order, a snapshot of batch_size rows at a time"""
+        start = 0
+        while True:
+            with self._lock:
+                end = min(start + batch_size, self.count)
+                if start >= end:
+                    return
+                embeddings = np.array(self._matrix[start:end])
+                batch = [{
+                    "id": self._ids[row],
+                    "embedding": embeddings[row - start],
+                    "metadata": self._metadata[row]
+                } for row in range(start, end)]
+            yield batch
+            start = end
+
+    def delete(self, id: str):
+        """Delete a vector by ID (the last row is moved into its slot)"""
+        with self._lock:
+            row = self._row_of.pop(id, None)
+            if row is None:
+                return
+
+            last = self.count - 1
+            if self._ann is not None:
+                self._ann.delete(row, last)
+            if self._changed_rows is not None:
+                self._changed_rows.add(row)
+            if row != last:
+                moved_id = self._ids[last]
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = moved_id
+                self._metadata[row] = self._metadata[last]
+                self._row_of[moved_id] = row
+                self._conn.execute("UPDATE vectors SET row = ? WHERE id = ?", (row, moved_id))
+
+            self._ids.pop()
+            self._metadata.pop()
+            self.count = last
+            self._matrix.flush()
+
+            self._conn.execute("DELETE FROM vectors WHERE id = ?", (id,))
+            self._conn.commit()
@@ -0,0 +1,117 @@
+from shared.transcription import TranscriptionBackend
+from dotenv import load_dotenv
+import hashlib
+import json
+import os
+import random
+import shutil
+import subprocess
+import time
+
+load_dotenv()
+
+# Optional directory of <sha256 of audio>.json transcripts, for uploads whose temp path has no sidecar
+OFFLINE_TRANSCRIPT_DIR = os.getenv("OFFLINE_TRANSCRIPT_DIR", "")
+# Seconds slept per second of audio, to mimic ASR latency (0 = return immediately)
+OFFLINE_REALTIME_FACTOR = float(os.getenv("OFFLINE_REALTIME_FACTOR", "0"))
+
+# Bytes per second of 128 kbps MP3, used when ffprobe isn't available
+_MP3_BYTES_PER_SECOND = 16000
+
+_SPEAKERS = ["Speaker 1", "Speaker 2", "Speaker 3"]
+_SUBJECTS = ["the roadmap", "the budget", "our hiring plan", "the launch", "customer feedback",
+             "the migration", "the vector index", "the quarterly review", "onboarding", "pricing"]
+_VERBS = ["we should revisit", "I'm worried about", "let's finalize", "can you summarize",
+          "we agreed to postpone", "I think we underestimated", "we need numbers on", "I like"]
+_TAILS = ["before Friday.", "for the next sprint.", "with the whole team.", "by end of month.",
+          "since last week.", "compared to last quarter.", "once legal signs off.", "today."]
+
+def _file_digest(audio_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(audio_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _estimate_duration(audio_path: str) -> float:
+    if shutil.which("ffprobe"):
+        output = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", audio_path],
+            capture_output=True, text=True
+        )
+        if output.returncode == 0 and output.stdout.strip():
+            return float(output.stdout.strip())
+    return max(1.0, os.path.getsize(audio_path) / _MP3_BYTES_PER_SECOND)
+
+def synthesize_segments(seed: str, duration: float) -> list:
+    """Deterministic conversation-like segments covering duration seconds"""
+    rng = random.Random(seed)
+    speakers = _SPEAKERS[:rng.randint(1, len(_SPEAKERS))]
+    speaker = speakers[0]
+    segments = []
+    start = 0.0
+
+    while start < duration:
+        end = min(duration, start + rng.uniform(2.0, 14.0))
+        sentences = max(1, round((end - start) / 4))
+        text = " ".join(
+            f"{rng.choice(_VERBS).capitalize()} {rng.choice(_SUBJECTS)} {rng.choice(_TAILS)}"
+            for _ in range(sentences)
+        )
+        segments.append({
+            "text": text,
+            "start": round(start, 3),
+            "end": round(end, 3),
+            "speaker": speaker
+        })
+        if len(speakers) > 1 and rng.random() < 0.6:
+            speaker = rng.choice([s for s in speakers if s != speaker])
+        start = end + rng.uniform(0.1, 1.0)
+
+    return segments
+
+class OfflineTranscriptionBackend(TranscriptionBackend):
+    """
+    Deterministic stand-in for Speech-to-Text, for load tests and offline runs.
+
+    Looks for a sidecar transcript next to the audio (<audio>.json or
+    <audio without extension>.json), then <sha256>.json in
+    OFFLINE_TRANSCRIPT_DIR. Sidecars hold either the full result
+    ({"segments": [...], ...}) or just the segment list. Without a sidecar,
+    segments are synthesized from the file's hash, so the same file always
+    yields the same transcript.
+    """
+
+    def _find_sidecar(self, audio_path: str, digest: str) -> str:
+        candidates = [audio_path + ".json", os.path.splitext(audio_path)[0] + ".json"]
+        if OFFLINE_TRANSCRIPT_DIR:
+            candidates.append(os.path.join(OFFLINE_TRANSCRIPT_DIR, f"{digest}.json"))
+        return next((path for path in candidates if path != audio_path and os.path.exists(path)), None)
+
+    def transcribe(self, audio_path: str, gcs_uri: str = None, mode: str = None) -> dict:
+        """Same result shape as the Google backend; gcs_uri and mode are ignored"""
+        digest = _file_digest(audio_path)
+        sidecar = self._find_sidecar(audio_path, digest)
+
+        if sidecar:
+            print(f"   Using sidecar transcript: {sidecar}")
+            with open(sidecar) as f:
+                data = json.load(f)
+            segments = data if isinstance(data, list) else data["segments"]
+            duration = data.get("duration") if isinstance(data, dict) else None
+            duration = duration or (segments[-1]["end"] if segments else 0)
+        else:
+            duration = _estimate_duration(audio_path)
+            segments = synthesize_segments(digest, duration)
+
+        segments = [{**seg, "speaker": seg.get("speaker", "Speaker 1")} for seg in segments]
+
+        if OFFLINE_REALTIME_FACTOR:
+            time.sleep(duration * OFFLINE_REALTIME_FACTOR)
+
+        return {
+            "text": " ".join(seg["text"] for seg in segments),
+            "segments": segments,
+            "language": "en",
+            "duration": duration
+        }
@@ -1,23 +1,44 @@
 from pinecone import Pinecone
 from dotenv import load_dotenv
+from shared.vector_store import VectorStore
+from shared.connection_pool import get_pool
+import asyncio
 import os
+import threading
 
 load_dotenv()
 
-class PineconeClient:
+# Concurrent requests sharing the index's HTTP connections, and per-attempt timeout (seconds)
+PINECONE_POOL_SIZE = int(os.getenv("PINECONE_POOL_SIZE", "16"))
+PINECONE_TIMEOUT = float(os.getenv("PINECONE_TIMEOUT", "10"))
+
+class PineconeClient(VectorStore):
     def __init__(self, index_name: str = "recallos-memories"):
-        """Initialize Pinecone client"""
-        self.pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+        """
+        Initialize Pinecone client.
+        One keep-alive connection pool of PINECONE_POOL_SIZE is shared by every
+        caller in the process; the "pinecone" ConnectionPool caps in-flight calls
+        at the same size and records saturation.
+        """
+        self.pc = Pinecone(
+            api_key=os.getenv("PINECONE_API_KEY"),
+            timeout=PINECONE_TIMEOUT,
+            connection_pool_maxsize=PINECONE_POOL_SIZE
+        )
         self.index_name = index_name
         self.index = self.pc.Index(index_name)
+        self.pool = get_pool("pinecone", PINECONE_POOL_SIZE)
+        self._async_index = None
+        self._async_index_lock = threading.Lock()
     
     def store(self, id: str, embedding: list, metadata: dict):
         """Store a single vector"""
-        self.index.upsert(vectors=[{
-            "id": id,
-            "values": embedding,
-            "metadata": metadata
-        }])
+        with self.pool.acquire():
+            self.index.upsert(vectors=[{
+                "id": id,
+                "values": embedding,
+                "metadata": metadata
+            }])
     
     def store_batch(self, vectors: list):
         """
@@ -29,18 +50,63 @@ class PineconeClient:
             "values": v["embedding"],
             "metadata": v["metadata"]
         } for v in vectors]
-        self.index.upsert(vectors=formatted)
+        with self.pool.acquire():
+            self.index.upsert(vectors=formatted)
     
     def search(self, query_embedding: list, top_k: int = 5, filter: dict = None):
         """Search for similar vectors"""
-        results = self.index.query(
-            vector=query_embedding,
-            top_k=top_k,
-            include_metadata=True,
-            filter=filter
-        )
+        with self.pool.acquire():
+            results = self.index.query(
+                vector=query_embedding,
+                top_k=top_k,
+                include_metadata=True,
+                filter=filter
+            )
+        return results.matches
+    
+    async def async_search(self, query_embedding: list, top_k: int = 5, filter: dict = None):
+        """Search for similar vectors without blocking the event loop"""
+        if self._async_index is None:
+            await asyncio.to_thread(self._create_async_index)
+        
+        async with self.pool.acquire_async():
+            results = await self._async_index.query(
+                vector=query_embedding,
+                top_k=top_k,
+                include_metadata=True,
+                filter=filter
+            )
         return results.matches
     
+    def fetch(self, ids: list) -> list:
+        """Look up vectors by id (unknown ids are skipped)"""
+        if not ids:
+            return []
+        with self.pool.acquire():
+            result = self.index.fetch(ids=ids)
+        return [{
+            "id": id,
+            "embedding": vector.values,
+            "metadata": vector.metadata or {}
+        } for id, vector in result.vectors.items()]
+    
+    def _create_async_index(self):
+        """Resolve the index host (a blocking control-plane call) and build the async client once"""
+        with self._async_index_lock:
+            if self._async_index is None:
+                host = self.pc.describe_index(self.index_name).host
+                self._async_index = self.pc.IndexAsyncio(host=host)
+    
     def delete(self, id: str):
         """Delete a vector by ID"""
-        self.index.delete(ids=[id])
\ No newline at end of file
+        with self.pool.acquire():
+            self.index.delete(ids=[id])
+    
+    def iter_vectors(self, batch_size: int = 1000):
+        """
+        Stream every stored vector: pages of ids from list(), values and
+        metadata from one fetch() per page (serverless indexes). Pages hold
+        at most 100 ids, which keeps fetch requests within URL limits.
+        """
+        for ids in self.index.list(limit=min(batch_size, 100)):
+            yield self.fetch(ids)
\ No newline at end of file
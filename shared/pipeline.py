@@ -0,0 +1,111 @@
+from dotenv import load_dotenv
+import os
+import queue
+import threading
+
+load_dotenv()
+
+# Items that may wait between two stages before the upstream stage blocks
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "4"))
+
+_DONE = object()
+
+class _Stopped(Exception):
+    """Another stage failed; unwind this one quietly"""
+
+def _put(q: queue.Queue, item, stop: threading.Event):
+    while True:
+        if stop.is_set():
+            raise _Stopped()
+        try:
+            q.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            pass
+
+def _get(q: queue.Queue, stop: threading.Event):
+    while True:
+        if stop.is_set():
+            raise _Stopped()
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            pass
+
+def run_pipeline(source, stages: list, queue_size: int = None) -> list:
+    """
+    Run source -> stage 1 -> ... -> stage n with one thread per step.
+
+    Steps are connected by bounded queues, so a slow stage applies
+    backpressure upstream instead of letting items pile up in memory, and
+    total time approaches the slowest stage rather than the sum of all of
+    them. The first exception in any step stops the others and is re-raised.
+
+    Args:
+        source: Iterable producing the items (consumed on its own thread)
+        stages: Callables applied in order, each taking the previous output
+        queue_size: Capacity of each queue (defaults to PIPELINE_QUEUE_SIZE)
+
+    Returns:
+        Outputs of the last stage, in source order
+    """
+    queue_size = queue_size or PIPELINE_QUEUE_SIZE
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+    stop = threading.Event()
+    errors = []
+    results = []
+
+    def produce():
+        try:
+            for item in source:
+                _put(queues[0], item, stop)
+            _put(queues[0], _DONE, stop)
+        except _Stopped:
+            pass
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    def consume(i, fn):
+        try:
+            while True:
+                item = _get(queues[i], stop)
+                if item is _DONE:
+                    if i + 1 < len(stages):
+                        _put(queues[i + 1], _DONE, stop)
+                    return
+                output = fn(item)
+                if i + 1 < len(stages):
+                    _put(queues[i + 1], output, stop)
+                else:
+                    results.append(output)
+        except _Stopped:
+            pass
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    threads = [threading.Thread(target=produce, name="recallos-pipeline-source", daemon=True)]
+    threads += [
+        threading.Thread(target=consume, args=(i, fn), name=f"recallos-pipeline-{i + 1}", daemon=True)
+        for i, fn in enumerate(stages)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+    return results
+
+def batched(items, size: int):
+    """Group an iterable into lists of up to size items"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,88 @@
+from collections import OrderedDict
+from dotenv import load_dotenv
+import copy
+import os
+import re
+import threading
+import time
+
+load_dotenv()
+
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1000"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "300"))
+
+# Bumped on every vector write; cached answers from older generations never match
+_index_generation = 0
+_generation_lock = threading.Lock()
+
+def bump_index_generation() -> int:
+    """Invalidate cached query results after new vectors are written"""
+    global _index_generation
+    with _generation_lock:
+        _index_generation += 1
+        return _index_generation
+
+def get_index_generation() -> int:
+    return _index_generation
+
+def normalize_query(query: str) -> str:
+    """Case-, whitespace- and trailing-punctuation-insensitive form of a query"""
+    return re.sub(r"\s+", " ", query).strip().lower().rstrip("?!. ")
+
+class QueryCache:
+    def __init__(self, max_size: int = QUERY_CACHE_SIZE, ttl: float = QUERY_CACHE_TTL,
+                 track_index_generation: bool = True):
+        """
+        Size-bounded LRU of query results with a per-entry TTL.
+
+        Args:
+            max_size: Maximum number of cached results
+            ttl: Seconds before an entry expires
+            track_index_generation: Invalidate entries when vectors are written;
+                turn off for results that don't depend on stored memories (e.g. plans)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.track_index_generation = track_index_generation
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def _key(self, query: str, generation: int = None) -> tuple:
+        if not self.track_index_generation:
+            generation = 0
+        elif generation is None:
+            generation = get_index_generation()
+        return (normalize_query(query), generation)
+
+    def get(self, query: str):
+        """Return a copy of the cached result or None"""
+        key = self._key(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return copy.deepcopy(entry[1])
+
+            if entry is not None:
+                del self._entries[key]
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, query: str, result: dict, generation: int = None):
+        """
+        Cache a result.
+        Pass the generation read before the query ran, so a write that lands
+        mid-query doesn't get a stale answer cached under the new generation.
+        """
+        key = self._key(query, generation)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), copy.deepcopy(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries), "index_generation": get_index_generation()}
@@ -0,0 +1,114 @@
+import re
+
+# Keyword/regex features per query type; each pattern that matches adds one vote
+QUERY_TYPE_PATTERNS = {
+    "temporal": [
+        r"\bwhen\b", r"\bbefore\b", r"\bafter\b", r"\bsince\b", r"\buntil\b",
+        r"\b(yesterday|today|tomorrow|recently|lately|earlier|later)\b",
+        r"\b(last|next|this|previous) (week|month|year|meeting|call|time)\b",
+        r"\b(first|initially|originally|eventually|finally)\b",
+        r"\b(timeline|over time|evolv\w*|chang\w*|progress\w*|history)\b",
+        r"\b(date|day|month|year|quarter|deadline)s?\b",
+    ],
+    "analytical": [
+        r"^why\b", r"\bwhy\b", r"^how (do|does|did|should|could|would|can)\b",
+        r"\b(compare|comparison|contrast|versus|vs\.?)\b",
+        r"\b(analy[sz]\w*|summar\w*|overview|overall|explain\w*)\b",
+        r"\b(pros and cons|trade-?offs?|implications?|impact|consequences?)\b",
+        r"\b(trend|pattern|theme|relationship|insight)s?\b",
+        r"\b(opinion|think|feel|sentiment|concerns?|disagree\w*|agree\w*)\b",
+    ],
+    "factual": [
+        r"^(who|what|which|where)\b", r"\b(who|whom|whose)\b",
+        r"\bhow (much|many|long|old)\b",
+        r"\b(name|price|cost|number|amount|email|phone|address|role|title)s?\b",
+        r"\b(did|does|was|is) \w+ (say|mention|ask|decide|agree)\b",
+        r"\$\d|\d",
+    ],
+}
+
+# Range of search depths a query analysis may ask for
+MIN_SEARCH_DEPTH = 3
+MAX_SEARCH_DEPTH = 10
+
+_COMPILED = {
+    query_type: [re.compile(p) for p in patterns]
+    for query_type, patterns in QUERY_TYPE_PATTERNS.items()
+}
+
+def _query_features(query: str) -> dict:
+    text = query.lower().strip()
+    return {
+        "text": text,
+        "words": len(text.split()),
+        "votes": {
+            query_type: sum(1 for p in patterns if p.search(text))
+            for query_type, patterns in _COMPILED.items()
+        }
+    }
+
+def classify_query(query: str) -> tuple:
+    """
+    Deterministic local replacement for the Gemini query analysis step.
+
+    Args:
+        query: User's question
+
+    Returns:
+        (params, confident) where params has the same keys the LLM analyzer
+        returns (search_depth, query_type, requires_synthesis) and confident is
+        False when no type clearly wins, so callers can fall back to the LLM
+    """
+    features = _query_features(query)
+    votes = features["votes"]
+    words = features["words"]
+
+    ranked = sorted(votes.items(), key=lambda item: -item[1])
+    (best_type, best), (_, runner_up) = ranked[0], ranked[1]
+    confident = best > 0 and best > runner_up
+
+    # Ties between analytical and something else lean analytical: deeper search is the safe side
+    if best == 0:
+        query_type = "analytical" if words > 12 else "factual"
+    elif best == runner_up and votes["analytical"] == best:
+        query_type = "analytical"
+    else:
+        query_type = best_type
+
+    if query_type == "factual":
+        search_depth = 3 if words <= 6 else 5
+    elif query_type == "temporal":
+        search_depth = 7
+    else:
+        search_depth = 8 if words <= 12 else 10
+
+    params = {
+        "search_depth": max(MIN_SEARCH_DEPTH, min(MAX_SEARCH_DEPTH, search_depth)),
+        "query_type": query_type,
+        "requires_synthesis": query_type != "factual" or words > 12
+    }
+    return params, confident
+
+def sanitize_query_params(llm_params, fallback: dict) -> dict:
+    """
+    Validate search parameters parsed from an LLM response.
+
+    search_depth is coerced to int and clamped to MIN/MAX_SEARCH_DEPTH,
+    query_type must be a known type and requires_synthesis a boolean; any
+    missing or invalid field takes the fallback (classifier) value.
+    """
+    params = dict(fallback)
+    if not isinstance(llm_params, dict):
+        return params
+
+    depth = llm_params.get("search_depth")
+    if not isinstance(depth, bool):
+        try:
+            params["search_depth"] = max(MIN_SEARCH_DEPTH, min(MAX_SEARCH_DEPTH, int(float(depth))))
+        except (TypeError, ValueError, OverflowError):
+            pass
+    if llm_params.get("query_type") in QUERY_TYPE_PATTERNS:
+        params["query_type"] = llm_params["query_type"]
+    if isinstance(llm_params.get("requires_synthesis"), bool):
+        params["requires_synthesis"] = llm_params["requires_synthesis"]
+    return params
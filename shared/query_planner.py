@@ -0,0 +1,135 @@
+from shared.query_classifier import classify_query
+import re
+
+# Keyword features per task type; the first type with a match wins, otherwise the query classifier decides
+TASK_TYPE_PATTERNS = {
+    "upload": [
+        r"\b(upload\w*|transcrib\w*|ingest\w*|import)\b",
+        r"\b(audio|recording|mp3|wav|file)s?\b.*\b(add|process|store)\b",
+    ],
+    "insight": [
+        r"\b(pattern|trend|theme|recurring|recur\w*|common|frequent\w*)s?\b",
+        r"\bacross\b", r"\b(all|every|multiple) (conversation|meeting|call|session)s?\b",
+        r"\b(evolv\w*|evolution|over time)\b",
+    ],
+}
+
+_COMPILED = {
+    task_type: [re.compile(p) for p in patterns]
+    for task_type, patterns in TASK_TYPE_PATTERNS.items()
+}
+
+_TASK_PREFIX = re.compile(r"^(answer|handle|process) this (query|question|task):\s*", re.IGNORECASE)
+
+# Which agent leads, in priority order, when it is part of a plan
+AGENT_PRIORITY = ["transcription_agent", "insights_agent", "memory_agent", "timeline_agent", "synthesis_agent"]
+
+# Values an execution plan may use
+TASK_TYPES = ("upload", "query", "insight", "analysis")
+EXECUTION_STRATEGIES = ("sequential", "parallel", "hybrid")
+COMPLEXITIES = ("low", "medium", "high")
+
+def plan_task(task_description: str) -> tuple:
+    """
+    Deterministic local replacement for the Gemini planning step.
+
+    Args:
+        task_description: Task text, e.g. "Answer this query: ..."
+
+    Returns:
+        (plan, confident) where plan has the keys the LLM planner returns
+        (task_type, agents_required, execution_strategy, estimated_complexity,
+        special_requirements, optimization_hints) and confident is False for
+        very short tasks with no recognizable features, so callers can fall
+        back to the LLM
+    """
+    query = _TASK_PREFIX.sub("", task_description.strip())
+    text = query.lower()
+    params, query_confident = classify_query(query)
+
+    matched = [t for t, patterns in _COMPILED.items() if any(p.search(text) for p in patterns)]
+    if matched:
+        task_type = matched[0]
+    elif params["query_type"] == "analytical":
+        task_type = "analysis"
+    else:
+        task_type = "query"
+
+    if task_type == "upload":
+        agents = ["transcription_agent", "memory_agent"]
+    elif task_type == "insight":
+        agents = ["memory_agent", "insights_agent", "synthesis_agent"]
+    else:
+        agents = ["memory_agent", "synthesis_agent"]
+    if params["query_type"] == "temporal" and task_type != "upload":
+        agents.append("timeline_agent")
+
+    if task_type == "upload" or (params["search_depth"] <= 3 and not params["requires_synthesis"]):
+        complexity = "low"
+    elif task_type == "insight" or params["search_depth"] >= 8:
+        complexity = "high"
+    else:
+        complexity = "medium"
+
+    special_requirements = []
+    if params["query_type"] == "temporal":
+        special_requirements.append("chronological ordering")
+    if task_type == "insight":
+        special_requirements.append("cross-conversation grouping")
+    if params["requires_synthesis"]:
+        special_requirements.append("multi-source synthesis")
+
+    plan = {
+        "task_type": task_type,
+        "agents_required": agents,
+        # Analysis and search run concurrently; synthesis waits for both
+        "execution_strategy": "sequential" if task_type == "upload" else "hybrid",
+        "estimated_complexity": complexity,
+        "special_requirements": special_requirements,
+        "optimization_hints": [f"search_depth={params['search_depth']}", f"query_type={params['query_type']}"]
+    }
+    # Routing only needs insight vs. plain retrieval; anything beyond a few words is specific enough
+    return plan, bool(matched) or query_confident or len(text.split()) >= 4
+
+def sanitize_plan(llm_plan, fallback: dict) -> dict:
+    """
+    Validate an execution plan parsed from an LLM response.
+
+    Enumerated fields must hold a known value and agents_required a non-empty
+    list of known agents; list fields must be lists of strings. Any missing
+    or invalid field takes the fallback (rule plan) value.
+    """
+    plan = dict(fallback)
+    if not isinstance(llm_plan, dict):
+        return plan
+
+    for key, allowed in (("task_type", TASK_TYPES), ("execution_strategy", EXECUTION_STRATEGIES),
+                         ("estimated_complexity", COMPLEXITIES)):
+        if llm_plan.get(key) in allowed:
+            plan[key] = llm_plan[key]
+
+    agents = llm_plan.get("agents_required")
+    if isinstance(agents, list) and agents and all(a in AGENT_PRIORITY for a in agents):
+        plan["agents_required"] = list(agents)
+    for key in ("special_requirements", "optimization_hints"):
+        values = llm_plan.get(key)
+        if isinstance(values, list) and all(isinstance(v, str) for v in values):
+            plan[key] = list(values)
+    return plan
+
+def negotiate_locally(agents: list, task_complexity: str) -> dict:
+    """
+    Deterministic replacement for the Gemini negotiation step, same keys:
+    primary_agent, support_agents, resource_allocation, fallback_chain.
+    """
+    ranked = sorted(agents, key=lambda a: AGENT_PRIORITY.index(a) if a in AGENT_PRIORITY else len(AGENT_PRIORITY))
+    primary = ranked[0] if ranked else "memory_agent"
+    support = [a for a in ranked if a != primary]
+    support_level = task_complexity if task_complexity in ("low", "medium", "high") else "medium"
+
+    return {
+        "primary_agent": primary,
+        "support_agents": support,
+        "resource_allocation": {primary: "high", **{a: support_level for a in support}},
+        "fallback_chain": ranked
+    }
@@ -0,0 +1,226 @@
+from shared.clients import LazyClient, get_firestore_client
+from dotenv import load_dotenv
+from datetime import datetime
+import atexit
+import os
+import threading
+
+load_dotenv()
+
+# Seconds writes may wait to be coalesced into one batch commit (0 = write through)
+SESSION_FLUSH_INTERVAL = float(os.getenv("SESSION_FLUSH_INTERVAL", "0.5"))
+# Firestore accepts at most 500 writes per batch
+SESSION_MAX_BATCH = 500
+# Failed commits of one document before its pending write is dropped (and logged)
+SESSION_MAX_WRITE_ATTEMPTS = int(os.getenv("SESSION_MAX_WRITE_ATTEMPTS", "5"))
+# "array": queries appended to the session document; "subcollection": one document per query
+SESSION_QUERY_HISTORY = os.getenv("SESSION_QUERY_HISTORY", "array")
+
+firestore_client = LazyClient(get_firestore_client)
+
+def _merge(old: dict, new: dict) -> dict:
+    """Combine two pending writes to one document into a single write"""
+    from google.cloud.firestore_v1.transforms import ArrayUnion, Increment
+
+    merged = dict(old)
+    for key, value in new.items():
+        previous = merged.get(key)
+        if isinstance(previous, Increment) and isinstance(value, Increment):
+            merged[key] = Increment(previous.value + value.value)
+        elif isinstance(previous, ArrayUnion) and isinstance(value, ArrayUnion):
+            merged[key] = ArrayUnion(list(previous.values) + list(value.values))
+        elif isinstance(previous, dict) and isinstance(value, dict):
+            merged[key] = _merge(previous, value)
+        else:
+            merged[key] = value
+    return merged
+
+class SessionStore:
+    """
+    Write-behind layer in front of Firestore session documents.
+
+    Writes are merged per document in memory and committed together in
+    Firestore batches every flush_interval seconds, so several updates to a
+    session, or updates to many sessions, cost one commit. Appends and
+    counters use server-side ArrayUnion/Increment transforms, so callers
+    never read a document just to modify it. Reads of a document with
+    pending writes flush first, so callers still see their own writes.
+    """
+
+    def __init__(self, collection: str = 'sessions', flush_interval: float = None):
+        self.collection = collection
+        self.flush_interval = SESSION_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._failures = {}
+        self.stats = {"writes": 0, "documents_written": 0, "commits": 0, "errors": 0, "dropped": 0}
+
+    def _document(self, path: tuple):
+        ref = firestore_client.collection(path[0]).document(path[1])
+        for i in range(2, len(path), 2):
+            ref = ref.collection(path[i]).document(path[i + 1])
+        return ref
+
+    def write(self, path: tuple, data: dict) -> None:
+        """
+        Queue a merge-write to the document at path, e.g. ('sessions', id)
+        or ('sessions', id, 'queries', query_id).
+        """
+        with self._lock:
+            self.stats["writes"] += 1
+            self._pending[path] = _merge(self._pending.get(path, {}), data)
+            full = len(self._pending) >= SESSION_MAX_BATCH
+
+        if self.flush_interval <= 0 or full:
+            self.flush()
+        else:
+            self._ensure_flusher()
+
+    def has_pending(self, path: tuple) -> bool:
+        with self._lock:
+            return path in self._pending
+
+    def flush(self) -> None:
+        """
+        Commit every pending write.
+
+        If a batch fails, its documents are retried one at a time so one bad
+        write can't hold back the others. A document that still fails is
+        re-queued, or dropped and logged after SESSION_MAX_WRITE_ATTEMPTS
+        failed flushes. The last error is re-raised once every batch was tried.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return
+
+            error = None
+            items = list(pending.items())
+            for i in range(0, len(items), SESSION_MAX_BATCH):
+                chunk = items[i:i + SESSION_MAX_BATCH]
+                batch = firestore_client.batch()
+                for path, data in chunk:
+                    batch.set(self._document(path), data, merge=True)
+                try:
+                    batch.commit()
+                except Exception:
+                    with self._lock:
+                        self.stats["errors"] += 1
+                    error = self._commit_each(chunk) or error
+                    continue
+                with self._lock:
+                    self.stats["commits"] += 1
+                    self.stats["documents_written"] += len(chunk)
+                    for path, _ in chunk:
+                        self._failures.pop(path, None)
+
+            if error is not None:
+                raise error
+
+    def _commit_each(self, chunk: list):
+        """Write a failed batch's documents individually; returns the last error, if any"""
+        error = None
+        for path, data in chunk:
+            try:
+                self._document(path).set(data, merge=True)
+            except Exception as e:
+                error = e
+                with self._lock:
+                    failures = self._failures.get(path, 0) + 1
+                    if failures >= SESSION_MAX_WRITE_ATTEMPTS:
+                        self._failures.pop(path, None)
+                        self.stats["dropped"] += 1
+                    else:
+                        self._failures[path] = failures
+                        # Older data goes underneath anything written since
+                        self._pending[path] = _merge(data, self._pending.get(path, {}))
+                if failures >= SESSION_MAX_WRITE_ATTEMPTS:
+                    print(f"❌ Dropped write to {'/'.join(path)} after {failures} failed attempts: {str(e)}")
+                continue
+            with self._lock:
+                self._failures.pop(path, None)
+                self.stats["commits"] += 1
+                self.stats["documents_written"] += 1
+        return error
+
+    def _ensure_flusher(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="recallos-session-flush", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        stop = threading.Event()
+        while not stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"❌ Session flush failed (will retry): {str(e)}")
+
+    def save(self, session_id: str, data: dict) -> None:
+        """Merge fields into a session document"""
+        self.write((self.collection, session_id), {**data, 'updated_at': datetime.now()})
+
+    def read(self, path: tuple) -> dict:
+        """Read the document at path, flushing its pending writes first"""
+        if self.has_pending(path):
+            self.flush()
+        doc = self._document(path).get()
+        return doc.to_dict() if doc.exists else None
+
+    def collection_ref(self, path: tuple):
+        """
+        Query handle for the collection at path, e.g. ('sessions',) or
+        ('aggregates', 'corpus', 'files'), with its pending writes flushed first.
+        """
+        with self._lock:
+            pending = any(p[:len(path)] == path for p in self._pending)
+        if pending:
+            self.flush()
+        parent = self._document(path[:-1]) if len(path) > 1 else firestore_client
+        return parent.collection(path[-1])
+
+    def get(self, session_id: str) -> dict:
+        """Read a session document"""
+        return self.read((self.collection, session_id))
+
+    def record_query(self, session_id: str, query_id: str, query: str) -> None:
+        """
+        Add a query to the session's history with a single document write.
+
+        In "array" mode the entry is appended with ArrayUnion and query_count
+        incremented server-side; in "subcollection" mode it becomes its own
+        document under sessions/{id}/queries, keeping the session document
+        small however many queries it gets.
+        """
+        entry = {
+            'query_id': query_id,
+            'query': query,
+            'timestamp': datetime.now().isoformat()
+        }
+        if SESSION_QUERY_HISTORY == "subcollection":
+            self.write((self.collection, session_id, 'queries', query_id), entry)
+        else:
+            from google.cloud.firestore_v1.transforms import ArrayUnion, Increment
+            self.write((self.collection, session_id), {
+                'queries': ArrayUnion([entry]),
+                'query_count': Increment(1),
+                'updated_at': datetime.now()
+            })
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {**self.stats, "pending": len(self._pending)}
+
+session_store = SessionStore()
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        session_store.flush()
+    except Exception as e:
+        print(f"❌ Session flush at exit failed: {str(e)}")
@@ -0,0 +1,89 @@
+from shared.google_services import storage_client, storage_path_for, BUCKET_NAME
+from shared.clients import GCS_POOL_SIZE, GCS_TIMEOUT
+from shared.connection_pool import get_pool
+from dotenv import load_dotenv
+import asyncio
+import hashlib
+import os
+import tempfile
+import uuid
+
+load_dotenv()
+
+# Bytes read from the request per step
+UPLOAD_READ_CHUNK = int(os.getenv("UPLOAD_READ_CHUNK", str(1 << 20)))
+# Bytes per resumable-upload request; GCS requires a multiple of 256 KiB
+GCS_UPLOAD_CHUNK_SIZE = int(os.getenv("GCS_UPLOAD_CHUNK_SIZE", str(8 << 20)))
+
+async def _gcs_call(fn, *args, **kwargs):
+    """Run one blocking GCS call in a thread, holding a gcs pool slot only for that call"""
+    async with get_pool("gcs", GCS_POOL_SIZE).acquire_async():
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+async def stream_to_storage(chunks, suffix: str = ".mp3", claim=None) -> dict:
+    """
+    Receive an upload without holding it in memory.
+
+    Each chunk from the async iterator is hashed and written to a temp file
+    and to a GCS resumable upload at the same time. Memory stays bounded by
+    one read chunk plus one GCS_UPLOAD_CHUNK_SIZE upload buffer whatever the
+    file size. The object is staged under a random name and then renamed
+    server-side to its content-addressed path (storage_path_for), so nothing
+    is uploaded twice. A gcs pool slot is held per GCS call, not while
+    waiting on the client for the next chunk.
+
+    Args:
+        chunks: Async iterator of bytes (request body or UploadFile reads)
+        suffix: Temp file suffix
+        claim: Optional callable(content_hash), run in a thread once the hash
+            is known and before the rename; a non-None return marks the upload
+            as a duplicate
+
+    Returns:
+        {"path", "content_hash", "size", "gcs_url"}; the caller owns the temp file.
+        For a duplicate: {"content_hash", "size", "duplicate": <claim result>},
+        with the staging object and temp file already removed
+    """
+    digest = hashlib.sha256()
+    size = 0
+    bucket = storage_client.bucket(BUCKET_NAME)
+    staging = bucket.blob(f"uploads/incoming/{uuid.uuid4().hex}{suffix}")
+    tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+
+    try:
+        writer = await _gcs_call(staging.open, "wb", chunk_size=GCS_UPLOAD_CHUNK_SIZE, timeout=GCS_TIMEOUT)
+        async for chunk in chunks:
+            digest.update(chunk)
+            size += len(chunk)
+            await asyncio.gather(
+                asyncio.to_thread(tmp_file.write, chunk),
+                _gcs_call(writer.write, chunk)
+            )
+        # Sends the final partial chunk and completes the resumable session
+        await _gcs_call(writer.close)
+
+        content_hash = digest.hexdigest()
+        existing = await asyncio.to_thread(claim, content_hash) if claim else None
+        if existing is not None:
+            await _gcs_call(staging.delete, timeout=GCS_TIMEOUT)
+            tmp_file.close()
+            os.unlink(tmp_file.name)
+            print(f"♻️  Duplicate upload ({size / 1e6:.1f} MB), staging object removed")
+            return {"content_hash": content_hash, "size": size, "duplicate": existing}
+
+        destination = storage_path_for(content_hash)
+        await _gcs_call(bucket.rename_blob, staging, destination, timeout=GCS_TIMEOUT)
+        tmp_file.close()
+    except Exception:
+        tmp_file.close()
+        if os.path.exists(tmp_file.name):
+            os.unlink(tmp_file.name)
+        raise
+
+    print(f"✅ Streamed {size / 1e6:.1f} MB to gs://{BUCKET_NAME}/{destination}")
+    return {
+        "path": tmp_file.name,
+        "content_hash": content_hash,
+        "size": size,
+        "gcs_url": f"gs://{BUCKET_NAME}/{destination}"
+    }
@@ -0,0 +1,331 @@
+from shared.kmeans import kmeans
+from dotenv import load_dotenv
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+import atexit
+import json
+import os
+import tempfile
+import threading
+import uuid
+
+load_dotenv()
+
+# Where the topic map (centroids + summary) is persisted
+TOPICS_PATH = os.getenv("TOPICS_PATH", "/tmp/recallos_topics")
+# Number of topics, and mini-batch k-means steps / samples per step
+TOPIC_CLUSTERS = int(os.getenv("TOPIC_CLUSTERS", "20"))
+TOPIC_ITERATIONS = int(os.getenv("TOPIC_ITERATIONS", "100"))
+TOPIC_BATCH_SIZE = int(os.getenv("TOPIC_BATCH_SIZE", "1024"))
+# Representative segments kept per topic, and characters of text kept for each
+TOPIC_REPRESENTATIVES = int(os.getenv("TOPIC_REPRESENTATIVES", "3"))
+TOPIC_SNIPPET_CHARS = 300
+# Vectors read from the store per request while streaming
+TOPIC_STREAM_BATCH = 1000
+# assign() persists the map after this many new assignments, or this many seconds after the first unsaved one
+TOPIC_SAVE_EVERY = int(os.getenv("TOPIC_SAVE_EVERY", "1000"))
+TOPIC_SAVE_INTERVAL = float(os.getenv("TOPIC_SAVE_INTERVAL", "30"))
+# Recently assigned ids remembered (in memory) so retried ingests don't count twice
+TOPIC_RECENT_IDS = int(os.getenv("TOPIC_RECENT_IDS", "100000"))
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def _assign_with_scores(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 65536) -> tuple:
+    """Nearest centroid and its cosine similarity for each normalized row"""
+    labels = np.empty(len(vectors), dtype=np.int32)
+    scores = np.empty(len(vectors), dtype=np.float32)
+    for start in range(0, len(vectors), chunk_size):
+        sims = np.asarray(vectors[start:start + chunk_size], dtype=np.float32) @ centroids.T
+        labels[start:start + chunk_size] = np.argmax(sims, axis=1)
+        scores[start:start + chunk_size] = sims[np.arange(len(sims)), labels[start:start + chunk_size]]
+    return labels, scores
+
+def _breakdown(labels: np.ndarray, values: list, k: int) -> list:
+    """Per-cluster {value: count} for one metadata field, via a single bincount"""
+    names, codes = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+    counts = np.bincount(labels * len(names) + codes, minlength=k * len(names)).reshape(k, len(names))
+    return [
+        {str(names[j]): int(row[j]) for j in np.flatnonzero(row)}
+        for row in counts
+    ]
+
+def _representative(v: dict, score: float) -> dict:
+    metadata = v["metadata"]
+    return {
+        "id": v["id"],
+        "text": metadata.get("text", "")[:TOPIC_SNIPPET_CHARS],
+        "speaker": metadata.get("speaker", "Unknown"),
+        "file_id": metadata.get("file_id", "unknown"),
+        "score": round(float(score), 4)
+    }
+
+class TopicMap:
+    def __init__(self, path: str = TOPICS_PATH):
+        """
+        Precomputed recurring topics: k-means clusters over every stored memory.
+
+        build() streams all vectors out of the store into a temporary memmap,
+        runs mini-batch k-means and records per topic its size, speaker and
+        file breakdowns and the segments closest to the centroid. assign()
+        folds newly ingested vectors into the existing topics (counts,
+        representatives and an online centroid update) until the next build;
+        those updates are saved every TOPIC_SAVE_EVERY assignments or
+        TOPIC_SAVE_INTERVAL seconds, and at exit. Centroids live in
+        path/topic_centroids.npy, everything else in path/topics.json.
+        """
+        self.path = path
+        self._centroids_path = os.path.join(path, "topic_centroids.npy")
+        self._summary_path = os.path.join(path, "topics.json")
+        self._lock = threading.RLock()
+        self._loaded = False
+        self.centroids = None
+        self.summary = None
+        # Ids assigned since the build named by _recent_generation, oldest dropped first
+        self._recent = OrderedDict()
+        self._recent_generation = None
+        self._unsaved = 0
+        self._save_timer = None
+        # Vectors passed to assign() while a build runs, folded into the new map at its end
+        self._build_lock = threading.Lock()
+        self._build_log = None
+        atexit.register(self.flush)
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                if os.path.exists(self._centroids_path) and os.path.exists(self._summary_path):
+                    self.centroids = np.load(self._centroids_path)
+                    with open(self._summary_path) as f:
+                        self.summary = json.load(f)
+                    self.summary.pop("assigned_ids", None)  # Written by older versions
+                self._loaded = True
+
+    def _save(self):
+        """Write both files atomically (temp file + rename)"""
+        self._unsaved = 0
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+        os.makedirs(self.path, exist_ok=True)
+        tmp = self._centroids_path + ".tmp.npy"
+        np.save(tmp, self.centroids)
+        os.replace(tmp, self._centroids_path)
+
+        tmp = self._summary_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.summary, f)
+        os.replace(tmp, self._summary_path)
+
+    def flush(self):
+        """Persist assignments not yet saved"""
+        with self._lock:
+            if self._unsaved:
+                self._save()
+
+    def _flush_on_timer(self):
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"❌ Topic map save failed: {str(e)}")
+
+    @property
+    def is_built(self) -> bool:
+        self._ensure_loaded()
+        return self.centroids is not None
+
+    def build(self, store, k: int = None, iterations: int = None, batch_size: int = None, seed: int = 0) -> dict:
+        """
+        Cluster every vector in store and replace the saved map.
+
+        Args:
+            store: VectorStore to read with iter_vectors()
+            k: Number of topics (capped at the number of vectors)
+            iterations: Mini-batch k-means steps
+            batch_size: Vectors sampled per step
+
+        Vectors passed to assign() while the build runs and not seen by its
+        scan are folded into the new map before it is saved.
+
+        Returns:
+            The new summary (see get())
+        """
+        with self._build_lock:
+            with self._lock:
+                self._build_log = []
+            try:
+                return self._build(store, k, iterations, batch_size, seed)
+            finally:
+                with self._lock:
+                    self._build_log = None
+
+    def _build(self, store, k: int, iterations: int, batch_size: int, seed: int) -> dict:
+        started = datetime.now()
+        ids, speakers, files, texts = [], [], [], []
+        dimension = None
+
+        with tempfile.TemporaryDirectory() as tmp:
+            vectors_path = os.path.join(tmp, "vectors.f32")
+            with open(vectors_path, "wb") as f:
+                for batch in store.iter_vectors(TOPIC_STREAM_BATCH):
+                    if not batch:
+                        continue
+                    embeddings = _normalize(np.asarray([v["embedding"] for v in batch], dtype=np.float32))
+                    dimension = embeddings.shape[1]
+                    f.write(embeddings.tobytes())
+                    for v in batch:
+                        metadata = v["metadata"]
+                        ids.append(v["id"])
+                        speakers.append(metadata.get("speaker", "Unknown"))
+                        files.append(metadata.get("file_id", "unknown"))
+                        texts.append(metadata.get("text", "")[:TOPIC_SNIPPET_CHARS])
+
+            n = len(ids)
+            if not n:
+                raise ValueError("No stored memories to cluster")
+
+            vectors = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(n, dimension))
+            k = min(k or TOPIC_CLUSTERS, n)
+            centroids = kmeans(vectors, k, iterations=iterations or TOPIC_ITERATIONS,
+                               batch_size=batch_size or TOPIC_BATCH_SIZE, seed=seed, init="k-means++")
+            labels, scores = _assign_with_scores(vectors, centroids)
+            del vectors
+
+        sizes = np.bincount(labels, minlength=k)
+        by_speaker = _breakdown(labels, speakers, k)
+        by_file = _breakdown(labels, files, k)
+
+        # Best-scoring members first within each cluster
+        order = np.lexsort((-scores, labels))
+        bounds = np.searchsorted(labels[order], np.arange(k + 1))
+
+        topics = []
+        for c in range(k):
+            members = order[bounds[c]:bounds[c] + TOPIC_REPRESENTATIVES]
+            topics.append({
+                "topic_id": c,
+                "size": int(sizes[c]),
+                "speakers": by_speaker[c],
+                "files": by_file[c],
+                "representatives": [{
+                    "id": ids[i],
+                    "text": texts[i],
+                    "speaker": str(speakers[i]),
+                    "file_id": str(files[i]),
+                    "score": round(float(scores[i]), 4)
+                } for i in members]
+            })
+        topics.sort(key=lambda t: -t["size"])
+
+        with self._lock:
+            self._loaded = True
+            self.centroids = centroids
+            self.summary = {
+                "generation": uuid.uuid4().hex,
+                "built_at": started.isoformat(),
+                "build_seconds": round((datetime.now() - started).total_seconds(), 2),
+                "total_vectors": n,
+                "assigned_since_build": 0,
+                "k": k,
+                "dimension": dimension,
+                "topics": topics
+            }
+            self._recent.clear()
+            self._recent_generation = self.summary["generation"]
+
+            # Vectors stored during the build that its scan didn't see
+            scanned = set(ids)
+            missed = {v["id"]: v for v in self._build_log if v["id"] not in scanned}
+            self._build_log = None
+            self._fold(list(missed.values()))
+            self._save()
+            return self.get()
+
+    def assign(self, vectors: list) -> int:
+        """
+        Add newly stored vectors to their nearest existing topics.
+        The last TOPIC_RECENT_IDS ids assigned since the current build are
+        skipped, so retried ingests don't count twice. No-op before the
+        first build.
+
+        Args:
+            vectors: list of dicts with keys: id, embedding, metadata
+
+        Returns:
+            Number of vectors assigned
+        """
+        self._ensure_loaded()
+        with self._lock:
+            if self._build_log is not None:
+                self._build_log.extend(vectors)
+            if self.centroids is None:
+                return 0
+            generation = self.summary.get("generation", self.summary["built_at"])
+            if self._recent_generation != generation:
+                self._recent.clear()
+                self._recent_generation = generation
+            vectors = [v for v in vectors if v["id"] not in self._recent]
+            count = self._fold(vectors)
+
+            self._unsaved += count
+            if self._unsaved >= TOPIC_SAVE_EVERY:
+                self._save()
+            elif count and self._save_timer is None:
+                self._save_timer = threading.Timer(TOPIC_SAVE_INTERVAL, self._flush_on_timer)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+            return count
+
+    def _fold(self, vectors: list) -> int:
+        """Count vectors into their nearest topics and nudge the centroids (lock held)"""
+        if not vectors:
+            return 0
+        embeddings = _normalize(np.asarray([v["embedding"] for v in vectors], dtype=np.float32))
+        if embeddings.shape[1] != self.centroids.shape[1]:
+            return 0
+        labels, scores = _assign_with_scores(embeddings, self.centroids)
+        topics = {t["topic_id"]: t for t in self.summary["topics"]}
+
+        for v, c, score in zip(vectors, labels, scores):
+            topic = topics[int(c)]
+            topic["size"] += 1
+            speaker = str(v["metadata"].get("speaker", "Unknown"))
+            file_id = str(v["metadata"].get("file_id", "unknown"))
+            topic["speakers"][speaker] = topic["speakers"].get(speaker, 0) + 1
+            topic["files"][file_id] = topic["files"].get(file_id, 0) + 1
+
+            representatives = topic["representatives"]
+            if len(representatives) < TOPIC_REPRESENTATIVES or score > representatives[-1]["score"]:
+                representatives.append(_representative(v, score))
+                representatives.sort(key=lambda r: -r["score"])
+                del representatives[TOPIC_REPRESENTATIVES:]
+            self._recent[v["id"]] = None
+        while len(self._recent) > TOPIC_RECENT_IDS:
+            self._recent.popitem(last=False)
+
+        # Online k-means step: each centroid moves toward its new members at rate 1/size
+        for c in np.unique(labels):
+            members = embeddings[labels == c]
+            rate = len(members) / topics[int(c)]["size"]
+            self.centroids[c] = (1 - rate) * self.centroids[c] + rate * members.mean(axis=0)
+        self.centroids = _normalize(self.centroids)
+
+        self.summary["total_vectors"] += len(vectors)
+        self.summary["assigned_since_build"] += len(vectors)
+        self.summary["topics"].sort(key=lambda t: -t["size"])
+        return len(vectors)
+
+    def get(self) -> dict:
+        """The topic summary without centroids, or None before the first build"""
+        self._ensure_loaded()
+        with self._lock:
+            if self.summary is None:
+                return None
+            return json.loads(json.dumps(self.summary))
+
+topic_map = TopicMap()
@@ -0,0 +1,38 @@
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+# "google" (default) for Speech-to-Text or "offline" for the deterministic local stand-in
+TRANSCRIPTION_BACKEND = os.getenv("TRANSCRIPTION_BACKEND", "google")
+
+class TranscriptionBackend:
+    """
+    Shared interface for speech-to-text backends.
+
+    transcribe returns {"text", "segments", "language", "duration"}, where each
+    segment is {"text", "start", "end", "speaker"} with times in seconds, and
+    raises on failure.
+    """
+
+    def transcribe(self, audio_path: str, gcs_uri: str = None, mode: str = None) -> dict:
+        raise NotImplementedError
+
+    def iter_segments(self, audio_path: str, gcs_uri: str = None, mode: str = None):
+        """
+        Yield segments in time order as they become available.
+        Backends that can't produce partial results yield them all at the end.
+        """
+        yield from self.transcribe(audio_path, gcs_uri=gcs_uri, mode=mode)["segments"]
+
+def get_transcription_backend() -> TranscriptionBackend:
+    """Build the transcription backend selected by TRANSCRIPTION_BACKEND"""
+    if TRANSCRIPTION_BACKEND == "offline":
+        from shared.offline_transcription import OfflineTranscriptionBackend
+        return OfflineTranscriptionBackend()
+
+    if TRANSCRIPTION_BACKEND == "google":
+        from shared.google_speech import GoogleSpeechBackend
+        return GoogleSpeechBackend()
+
+    raise ValueError(f"Unknown TRANSCRIPTION_BACKEND: {TRANSCRIPTION_BACKEND}")
@@ -0,0 +1,94 @@
+from collections import namedtuple
+from dotenv import load_dotenv
+import asyncio
+import os
+import time
+
+load_dotenv()
+
+# "pinecone" (default) or "local" for the in-process NumPy index
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")
+LOCAL_VECTOR_STORE_PATH = os.getenv("LOCAL_VECTOR_STORE_PATH", "/tmp/recallos_vectors")
+
+# Same attributes as a Pinecone match so callers don't need to change
+VectorMatch = namedtuple("VectorMatch", ["id", "score", "metadata"])
+
+class VectorStore:
+    """
+    Shared interface for vector backends.
+    Subclasses implement store, store_batch, search, fetch, delete and iter_vectors.
+    """
+    
+    def store(self, id: str, embedding: list, metadata: dict):
+        raise NotImplementedError
+    
+    def store_batch(self, vectors: list):
+        raise NotImplementedError
+    
+    def store_batch_chunked(self, vectors: list, batch_size: int = 100, max_retries: int = 3) -> list:
+        """
+        Store vectors in chunks of batch_size, retrying each chunk independently.
+        vectors: list of dicts with keys: id, embedding, metadata
+
+        Returns one report per chunk: {chunk, stored, failed, attempts, error}
+        """
+        reports = []
+        
+        for chunk_index, start in enumerate(range(0, len(vectors), batch_size)):
+            chunk = vectors[start:start + batch_size]
+            report = {"chunk": chunk_index, "stored": 0, "failed": 0, "attempts": 0, "error": None}
+            
+            for attempt in range(max_retries):
+                report["attempts"] = attempt + 1
+                try:
+                    self.store_batch(chunk)
+                    report["stored"] = len(chunk)
+                    report["error"] = None
+                    break
+                except Exception as e:
+                    report["error"] = str(e)
+                    if attempt < max_retries - 1:
+                        time.sleep(2 ** attempt)  # Exponential backoff
+            
+            if report["stored"] == 0:
+                report["failed"] = len(chunk)
+            reports.append(report)
+        
+        return reports
+    
+    
+    def search(self, query_embedding: list, top_k: int = 5, filter: dict = None):
+        raise NotImplementedError
+    
+    async def async_search(self, query_embedding: list, top_k: int = 5, filter: dict = None):
+        """Async search; backends without an async client run search() on a worker thread"""
+        return await asyncio.to_thread(self.search, query_embedding, top_k, filter)
+    
+    def fetch(self, ids: list) -> list:
+        """
+        Look up vectors by id (unknown ids are skipped).
+        Returns a list of dicts with keys: id, embedding, metadata
+        """
+        raise NotImplementedError
+    
+    def delete(self, id: str):
+        raise NotImplementedError
+    
+    def iter_vectors(self, batch_size: int = 1000):
+        """
+        Stream every stored vector for offline jobs.
+        Yields lists of at most batch_size dicts with keys: id, embedding, metadata
+        """
+        raise NotImplementedError
+
+def get_vector_store(index_name: str = "recallos-memories") -> VectorStore:
+    """Build the vector backend selected by VECTOR_BACKEND"""
+    if VECTOR_BACKEND == "local":
+        from shared.local_vector_store import LocalVectorStore
+        return LocalVectorStore(os.path.join(LOCAL_VECTOR_STORE_PATH, index_name))
+    
+    if VECTOR_BACKEND == "pinecone":
+        from shared.pinecone_client import PineconeClient
+        return PineconeClient(index_name)
+    
+    raise ValueError(f"Unknown VECTOR_BACKEND: {VECTOR_BACKEND}")
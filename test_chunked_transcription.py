@@ -0,0 +1,76 @@
+import os
+import shared.chunked_transcription as chunked
+from shared.chunked_transcription import map_speakers, plan_windows, iter_stitched_segments
+
+# Offline test: no API keys needed
+
+# Speaker labels are matched through the audio both windows heard
+previous = [
+    {"text": "alpha", "start": 82.0, "end": 88.0, "speaker": "Speaker 2"},
+    {"text": "beta", "start": 91.0, "end": 97.0, "speaker": "Speaker 1"}
+]
+current = [
+    {"text": "alpha", "start": 82.0, "end": 88.0, "speaker": "Speaker 1"},
+    {"text": "beta", "start": 91.0, "end": 97.0, "speaker": "Speaker 2"},
+    {"text": "gamma", "start": 110.0, "end": 120.0, "speaker": "Speaker 3"}
+]
+known = {"Speaker 1", "Speaker 2"}
+mapping = map_speakers(previous, current, 80.0, 100.0, known)
+print(f"Speaker mapping: {mapping}")
+assert mapping == {"Speaker 1": "Speaker 2", "Speaker 2": "Speaker 1", "Speaker 3": "Speaker 3"}
+assert known == {"Speaker 1", "Speaker 2", "Speaker 3"}
+
+# A local label heard nowhere in the overlap gets a fresh global label
+mapping = map_speakers(previous, [{"text": "x", "start": 130.0, "end": 135.0, "speaker": "Speaker 1"}],
+                       80.0, 100.0, {"Speaker 1", "Speaker 2"})
+assert mapping == {"Speaker 1": "Speaker 3"}
+
+# Windows share overlap_s seconds and cover the whole file
+assert plan_windows(180, window_s=100, overlap_s=20) == [(0.0, 100), (80.0, 100)]
+assert plan_windows(50, window_s=100, overlap_s=20) == [(0.0, 50)]
+
+# Stitching: segments in the overlap come out once, with reconciled speakers
+def fake_cut_window(audio_path, offset, length, out_dir):
+    path = os.path.join(out_dir, f"window_{offset:010.3f}.mp3")
+    open(path, "w").close()
+    return path
+
+# Times relative to each window; the second window numbers its speakers the other way round
+windows = {
+    0.0: [
+        {"text": "hello", "start": 0.0, "end": 10.0, "speaker": "Speaker 1"},
+        {"text": "alpha", "start": 82.0, "end": 88.0, "speaker": "Speaker 2"},
+        {"text": "beta", "start": 91.0, "end": 97.0, "speaker": "Speaker 1"}
+    ],
+    80.0: [
+        {"text": "alpha", "start": 2.0, "end": 8.0, "speaker": "Speaker 1"},
+        {"text": "beta", "start": 11.0, "end": 17.0, "speaker": "Speaker 2"},
+        {"text": "gamma", "start": 30.0, "end": 40.0, "speaker": "Speaker 3"}
+    ]
+}
+
+def fake_transcribe(path):
+    offset = float(os.path.basename(path)[len("window_"):-len(".mp3")])
+    return {"segments": windows[offset]}
+
+chunked.cut_window = fake_cut_window
+segments = list(iter_stitched_segments("meeting.mp3", fake_transcribe, duration=180, window_s=100, overlap_s=20))
+for seg in segments:
+    print(f"   {seg['start']:6.1f}-{seg['end']:6.1f} {seg['speaker']}: {seg['text']}")
+assert [s["text"] for s in segments] == ["hello", "alpha", "beta", "gamma"]
+assert [s["speaker"] for s in segments] == ["Speaker 1", "Speaker 2", "Speaker 1", "Speaker 3"]
+assert segments[-1]["start"] == 110.0
+
+# A failed window fails the whole transcription
+def failing_transcribe(path):
+    if "080.000" in path:
+        return {"error": "quota exceeded"}
+    return fake_transcribe(path)
+
+try:
+    list(iter_stitched_segments("meeting.mp3", failing_transcribe, duration=180, window_s=100, overlap_s=20))
+    raise AssertionError("expected RuntimeError")
+except RuntimeError as e:
+    print(f"Failed window raised: {e}")
+
+print("\n✅ Chunked transcription stitching working")
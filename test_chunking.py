@@ -0,0 +1,50 @@
+from shared.chunking import estimate_tokens, split_segment, chunk_segments, iter_chunks
+
+# Offline test: no API keys needed
+
+# Overlong segments split on sentence boundaries, timestamps interpolated
+sentence = "This sentence has exactly eight words in it."
+segment = {"text": " ".join([sentence] * 6), "start": 10.0, "end": 70.0, "speaker": "Speaker 1"}
+pieces = split_segment(segment, 3, max_tokens=25)
+print(f"Split into {len(pieces)} pieces")
+assert len(pieces) == 3
+assert all(estimate_tokens(p["text"]) <= 25 for p in pieces)
+assert all(p["text"].endswith(".") for p in pieces)
+assert " ".join(p["text"] for p in pieces) == segment["text"]
+assert pieces[0]["start"] == 10.0 and abs(pieces[-1]["end"] - 70.0) < 1e-9
+assert all(a["end"] == b["start"] for a, b in zip(pieces, pieces[1:]))
+assert all(p["segment_start"] == p["segment_end"] == 3 for p in pieces)
+
+# A single sentence over the budget is split on words
+run_on = {"text": " ".join(f"word{i}" for i in range(100)), "start": 0.0, "end": 30.0, "speaker": "Speaker 1"}
+pieces = split_segment(run_on, 0, max_tokens=20)
+assert all(estimate_tokens(p["text"]) <= 20 for p in pieces)
+assert " ".join(p["text"] for p in pieces).split() == run_on["text"].split()
+
+# Short segments from one speaker merge; speaker changes and long pauses start a new chunk
+segments = [
+    {"text": "Let's review the budget.", "start": 0.0, "end": 2.0, "speaker": "Speaker 1"},
+    {"text": "Marketing is over by ten percent.", "start": 2.5, "end": 5.0, "speaker": "Speaker 1"},
+    {"text": "That matches my numbers.", "start": 5.5, "end": 7.0, "speaker": "Speaker 2"},
+    {"text": "   ", "start": 7.0, "end": 8.0, "speaker": "Speaker 2"},
+    {"text": "Next item is hiring.", "start": 30.0, "end": 32.0, "speaker": "Speaker 2"}
+]
+chunks = chunk_segments(segments, max_tokens=50, max_gap=10)
+for c in chunks:
+    print(f"   [{c['segment_start']}-{c['segment_end']}] {c['speaker']}: {c['text']}")
+assert [c["text"] for c in chunks] == [
+    "Let's review the budget. Marketing is over by ten percent.",
+    "That matches my numbers.",
+    "Next item is hiring."
+]
+assert [(c["segment_start"], c["segment_end"]) for c in chunks] == [(0, 1), (2, 2), (4, 4)]
+assert chunks[0]["start"] == 0.0 and chunks[0]["end"] == 5.0
+
+# The token budget stops merging even within one speaker's turn
+chunks = chunk_segments(segments[:2], max_tokens=8, max_gap=10)
+assert len(chunks) == 2
+
+# The streaming form gives the same chunks from a generator
+assert list(iter_chunks(iter(segments), max_tokens=50, max_gap=10)) == chunk_segments(segments, max_tokens=50, max_gap=10)
+
+print("\n✅ Transcript chunking working")
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import time
+from shared.connection_pool import ConnectionPool, PoolExhausted, PooledClient
+
+# Offline test: no API keys needed
+pool = ConnectionPool("test", size=2, acquire_timeout=5)
+
+async def hold(seconds: float):
+    async with pool.acquire_async():
+        await asyncio.sleep(seconds)
+
+async def main():
+    # 100 async waiters on 2 slots must not occupy executor threads
+    waiters = [asyncio.create_task(hold(0.05)) for _ in range(100)]
+    await asyncio.sleep(0.01)
+    start = time.monotonic()
+    await asyncio.to_thread(lambda: None)
+    latency = time.monotonic() - start
+    print(f"to_thread latency with 100 waiters: {latency * 1000:.1f}ms")
+    assert latency < 0.5
+    await asyncio.gather(*waiters)
+    assert pool.get_stats()["peak_in_use"] == 2
+
+    # Threads and tasks share the same slots
+    def sync_call():
+        with pool.acquire():
+            time.sleep(0.02)
+    threads = [threading.Thread(target=sync_call) for _ in range(10)]
+    for t in threads:
+        t.start()
+    await asyncio.gather(*[hold(0.02) for _ in range(10)])
+    await asyncio.to_thread(lambda: [t.join() for t in threads])
+    assert pool.get_stats()["peak_in_use"] == 2
+
+    # Cancelled and timed-out waiters give no slot away
+    blockers = [asyncio.create_task(hold(0.3)) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    cancelled = asyncio.create_task(hold(0))
+    await asyncio.sleep(0.01)
+    cancelled.cancel()
+    pool.acquire_timeout = 0.05
+    try:
+        await hold(0)
+        raise AssertionError("expected PoolExhausted")
+    except PoolExhausted:
+        print("Timed out waiter raised PoolExhausted")
+    pool.acquire_timeout = 5
+    await asyncio.gather(*blockers)
+    await asyncio.gather(hold(0), hold(0))
+
+asyncio.run(main())
+
+stats = pool.get_stats()
+print(f"Stats: {stats}")
+assert stats["in_use"] == 0 and stats["timeouts"] == 1
+assert pool._available == 2
+
+# Streaming responses keep their slot until consumed or closed
+class FakeModel:
+    def generate_content(self, prompt, stream=False):
+        return iter(["a", "b", "c"]) if stream else "abc"
+
+stream_pool = ConnectionPool("stream", size=1, acquire_timeout=0.05)
+model = PooledClient(FakeModel(), stream_pool)
+assert model.generate_content("x") == "abc"
+assert stream_pool.get_stats()["in_use"] == 0
+
+response = model.generate_content("x", stream=True)
+assert stream_pool.get_stats()["in_use"] == 1
+chunks = iter(response)
+assert next(chunks) == "a"
+assert stream_pool.get_stats()["in_use"] == 1
+assert "".join(chunks) == "bc"
+assert stream_pool.get_stats()["in_use"] == 0
+
+response = model.generate_content("x", stream=True)
+response.close()
+assert stream_pool.get_stats()["in_use"] == 0
+print("Streaming slot held until the stream was exhausted or closed")
+
+print("\n✅ Connection pool working")
@@ -0,0 +1,69 @@
+import os
+import sqlite3
+import tempfile
+import time
+from shared.embedding_cache import EmbeddingCache, cache_key
+
+# Offline test: no API keys needed
+assert cache_key("m", "RETRIEVAL_QUERY", "hi") == cache_key("m", "RETRIEVAL_QUERY", "hi")
+assert cache_key("m", "RETRIEVAL_QUERY", "hi") != cache_key("m", "RETRIEVAL_DOCUMENT", "hi")
+
+# In-process LRU: the least recently used entry is evicted
+memory = EmbeddingCache(max_size=2, path="")
+memory.put("a", [1.0])
+memory.put("b", [2.0])
+assert memory.get("a") == [1.0]  # "a" is now most recent
+memory.put("c", [3.0])
+assert memory.get("b") is None
+assert memory.get("a") == [1.0] and memory.get("c") == [3.0]
+stats = memory.get_stats()
+print(f"LRU stats: {stats}")
+assert stats["memory_entries"] == 2 and stats["misses"] == 1
+
+# Callers get copies: mutating an input or a result does not corrupt the cache
+vector = [0.5, 0.25]
+memory.put("v", vector)
+vector[0] = 9.0
+result = memory.get("v")
+result.append(1.0)
+assert memory.get("v") == [0.5, 0.25]
+
+# SQLite tier: a fresh instance (new process) falls back to disk, then serves from memory
+path = os.path.join(tempfile.mkdtemp(), "embeddings.sqlite")
+disk = EmbeddingCache(max_size=10, path=path)
+disk.put_many([("x", [0.5, 0.25]), ("y", [1.5, -2.0])])
+reopened = EmbeddingCache(max_size=10, path=path)
+assert reopened.get("x") == [0.5, 0.25]
+assert reopened.get("x") == [0.5, 0.25]
+assert reopened.get("missing") is None
+stats = reopened.get_stats()
+assert stats["disk_hits"] == 1 and stats["memory_hits"] == 1 and stats["misses"] == 1
+assert stats["disk_entries"] == 2
+
+# Row cap: the oldest rows are evicted down to 90% of the cap
+capped = EmbeddingCache(max_size=1, path=os.path.join(tempfile.mkdtemp(), "capped.sqlite"), max_rows=10)
+for i in range(11):
+    capped.put(f"k{i}", [float(i)])
+rows = sqlite3.connect(capped.path).execute("SELECT key FROM embeddings").fetchall()
+print(f"Rows after exceeding the cap: {len(rows)}")
+assert len(rows) == 9 and ("k0",) not in rows and ("k1",) not in rows
+assert capped.get("k10") == [10.0] and capped.get("k0") is None
+
+# TTL: expired rows are misses and are purged
+expiring = EmbeddingCache(max_size=1, path=os.path.join(tempfile.mkdtemp(), "ttl.sqlite"), ttl=0.05)
+expiring.put_many([("old", [1.0]), ("filler", [2.0])])  # "old" drops out of the 1-entry LRU
+time.sleep(0.1)
+assert expiring.get("old") is None
+assert sqlite3.connect(expiring.path).execute("SELECT COUNT(*) FROM embeddings WHERE key = 'old'").fetchone()[0] == 0
+
+# Files written before the cap existed are migrated in place
+legacy = os.path.join(tempfile.mkdtemp(), "legacy.sqlite")
+conn = sqlite3.connect(legacy)
+conn.execute("CREATE TABLE embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+conn.commit()
+conn.close()
+migrated = EmbeddingCache(path=legacy, ttl=0)
+migrated.put("z", [4.0])
+assert EmbeddingCache(path=legacy, ttl=0).get("z") == [4.0]
+
+print("\n✅ Embedding cache working")
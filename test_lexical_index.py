@@ -0,0 +1,97 @@
+import os
+import tempfile
+import threading
+import time
+import shared.lexical_index as lexical
+from shared.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+# Offline test: no API keys needed
+path = tempfile.mkdtemp()
+
+assert tokenize("The Q3 budget is v2.0, O'Brien said") == ["q3", "budget", "v2.0", "o'brien", "said"]
+
+index = BM25Index(path)
+index.add([
+    ("m1", "The marketing budget is over by ten percent"),
+    ("m2", "Hiring plan for the engineering team"),
+    ("m3", "Budget review: engineering budget approved")
+])
+hits = index.search("engineering budget", top_k=3)
+print(f"Hits: {hits}")
+assert hits[0][0] == "m3"
+assert {id for id, _ in hits} == {"m1", "m2", "m3"}
+assert index.search("unrelated words", top_k=3) == []
+
+# Journal replay: a fresh instance sees every add, and re-adding an id replaces it
+index.add([("m2", "Lunch menu for Friday")])
+reloaded = BM25Index(path)
+assert reloaded.count == 3
+assert [id for id, _ in reloaded.search("lunch")] == ["m2"]
+assert "m2" not in [id for id, _ in reloaded.search("hiring engineering")]
+assert reloaded.get_stats()["journal_entries"] == 4
+
+# A torn final journal line (interrupted write) is dropped, and later adds still replay
+with open(os.path.join(path, "bm25.log"), "a") as f:
+    f.write('["m9", {"torn')
+recovered = BM25Index(path)
+assert recovered.count == 3
+recovered.add([("m5", "Quarterly roadmap")])
+assert BM25Index(path).count == 4
+reloaded = BM25Index(path)
+
+# Snapshot + journal: compacting keeps results, later adds replay on top of it
+reloaded.save()
+assert reloaded.get_stats()["journal_entries"] == 0
+reloaded.add([("m4", "Friday offsite agenda")])
+again = BM25Index(path)
+assert again.count == 5
+assert {id for id, _ in again.search("friday", top_k=2)} == {"m4", "m2"}
+assert [id for id, _ in again.search("budget")][0] == "m3"
+
+# Background compaction once the journal outgrows the snapshot
+lexical.BM25_COMPACT_MIN = 10
+background = BM25Index(tempfile.mkdtemp())
+for i in range(30):
+    background.add([(f"d{i}", f"document number {i} about topic{i % 3}")])
+for _ in range(100):
+    if not background.get_stats()["compacting"] and os.path.exists(os.path.join(background.path, "bm25.npz")):
+        break
+    time.sleep(0.05)
+time.sleep(0.1)
+stats = background.get_stats()
+print(f"After background compaction: {stats}")
+assert stats["documents"] == 30 and stats["journal_entries"] < 30
+assert BM25Index(background.path).count == 30
+assert len(background.search("topic1", top_k=20)) == 10
+
+# Deletes are journaled like adds
+again.delete(["m4", "unknown"])
+assert [id for id, _ in again.search("friday")] == ["m2"]
+assert BM25Index(path).count == 4
+assert "m4" not in [id for id, _ in BM25Index(path).search("offsite agenda")]
+
+# Rebuild scans the store without blocking searches; writes made meanwhile survive
+class SlowStore:
+    def iter_vectors(self, batch_size):
+        yield [{"id": "s1", "embedding": None, "metadata": {"text": "stored budget notes"}}]
+        searcher = threading.Thread(target=lambda: searches.append(again.search("budget")))
+        searcher.start()
+        searcher.join(timeout=2)
+        assert searches, "search blocked by rebuild"
+        again.add([("late", "added during the rebuild")])
+        again.delete(["s2"])
+        yield [{"id": "s2", "embedding": None, "metadata": {"text": "deleted while scanning"}}]
+
+searches = []
+assert again.rebuild(SlowStore()) == 2
+assert {id for id, _ in again.search("budget rebuild scanning", top_k=5)} == {"s1", "late"}
+assert BM25Index(path).count == 2
+
+# Reciprocal-rank fusion: agreement between rankings beats a single top rank
+fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d", "a"]], k=60)
+print(f"Fused: {fused}")
+assert [id for id, _ in fused] == ["b", "a", "d", "c"]
+assert abs(fused[0][1] - (1 / 62 + 1 / 61)) < 1e-12
+assert reciprocal_rank_fusion([]) == []
+
+print("\n✅ BM25 lexical index working")
@@ -0,0 +1,40 @@
+import numpy as np
+import tempfile
+from shared.local_vector_store import LocalVectorStore
+
+# Offline test: no API keys needed
+path = tempfile.mkdtemp()
+store = LocalVectorStore(path, dimension=8, initial_capacity=2)
+
+rng = np.random.default_rng(0)
+vectors = rng.normal(size=(5, 8)).tolist()
+
+print("Storing vectors...")
+store.store_batch([{
+    "id": f"test-{i}",
+    "embedding": v,
+    "metadata": {"text": f"memory {i}", "speaker": "Speaker 1" if i % 2 else "Speaker 2", "segment_index": i}
+} for i, v in enumerate(vectors)])
+print(f"Stored {store.count} vectors (capacity {store.capacity})")
+
+# Exact match should come back first
+results = store.search(vectors[3], top_k=3)
+print("\nResults:")
+for match in results:
+    print(f"Score: {match.score:.3f} - {match.metadata['text']}")
+assert results[0].id == "test-3"
+
+# Metadata filter
+results = store.search(vectors[3], top_k=5, filter={"speaker": "Speaker 2", "segment_index": {"$gte": 2}})
+print(f"\nFiltered: {[m.id for m in results]}")
+assert results[0].score >= results[1].score
+assert {m.id for m in results} == {"test-2", "test-4"}
+
+# Delete and reload from disk
+store.delete("test-0")
+reloaded = LocalVectorStore(path, dimension=8)
+print(f"\nReloaded {reloaded.count} vectors from {path}")
+assert reloaded.count == 4
+assert reloaded.search(vectors[4], top_k=1)[0].id == "test-4"
+
+print("\n✅ Local vector store working")
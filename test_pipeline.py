@@ -0,0 +1,65 @@
+import itertools
+import threading
+import time
+from shared.pipeline import run_pipeline, batched
+
+# Offline test: no API keys needed
+
+# Outputs come back in source order
+results = run_pipeline(range(20), [lambda x: x * 2, lambda x: x + 1], queue_size=2)
+assert results == [x * 2 + 1 for x in range(20)]
+
+# A slow last stage holds back the source instead of letting items pile up
+produced = 0
+consumed = 0
+max_in_flight = 0
+lock = threading.Lock()
+
+def source():
+    global produced, max_in_flight
+    for i in range(50):
+        with lock:
+            produced += 1
+            max_in_flight = max(max_in_flight, produced - consumed)
+        yield i
+
+def slow(x):
+    global consumed
+    time.sleep(0.005)
+    with lock:
+        consumed += 1
+    return x
+
+run_pipeline(source(), [lambda x: x, slow], queue_size=2)
+print(f"Most items in flight: {max_in_flight}")
+# Two queues of 2, one item in each stage, one waiting in the source
+assert max_in_flight <= 7
+
+# The first error stops every stage, even with an endless source, and is re-raised
+def fail_on_five(x):
+    if x == 5:
+        raise ValueError("bad item")
+    return x
+
+start = time.monotonic()
+try:
+    run_pipeline(itertools.count(), [fail_on_five, lambda x: x], queue_size=2)
+    raise AssertionError("expected ValueError")
+except ValueError as e:
+    print(f"Stage error re-raised: {e} after {time.monotonic() - start:.2f}s")
+assert time.monotonic() - start < 5
+
+# So is an error in the source
+def broken_source():
+    yield 1
+    raise OSError("read failed")
+
+try:
+    run_pipeline(broken_source(), [lambda x: x])
+    raise AssertionError("expected OSError")
+except OSError:
+    pass
+
+assert list(batched(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+
+print("\n✅ Pipeline working")
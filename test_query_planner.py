@@ -0,0 +1,70 @@
+from shared.query_planner import plan_task, negotiate_locally, sanitize_plan
+
+# Offline test: no API keys needed
+PLAN_KEYS = {"task_type", "agents_required", "execution_strategy", "estimated_complexity",
+             "special_requirements", "optimization_hints"}
+
+# Uploads go to transcription then memory, sequentially
+plan, confident = plan_task("Process this task: import the audio file and store it")
+assert set(plan) == PLAN_KEYS and confident
+assert plan["task_type"] == "upload"
+assert plan["agents_required"] == ["transcription_agent", "memory_agent"]
+assert plan["execution_strategy"] == "sequential" and plan["estimated_complexity"] == "low"
+
+# Cross-conversation questions are insight tasks
+plan, confident = plan_task("Answer this query: What recurring themes come up across all meetings?")
+print(f"Insight plan: {plan}")
+assert confident and plan["task_type"] == "insight"
+assert plan["agents_required"] == ["memory_agent", "insights_agent", "synthesis_agent"]
+assert plan["estimated_complexity"] == "high"
+assert "cross-conversation grouping" in plan["special_requirements"]
+
+# Analytical questions without insight keywords are analysis tasks
+plan, _ = plan_task("Answer this query: Why did we compare the two vendors and what are the trade-offs?")
+assert plan["task_type"] == "analysis" and plan["execution_strategy"] == "hybrid"
+assert plan["agents_required"] == ["memory_agent", "synthesis_agent"]
+
+# Plain lookups are queries; temporal ones bring in the timeline agent
+plan, _ = plan_task("Answer this query: what did Sarah say about the budget?")
+assert plan["task_type"] == "query" and "timeline_agent" not in plan["agents_required"]
+plan, _ = plan_task("Answer this query: When did we first discuss the deadline?")
+assert plan["task_type"] == "query" and plan["agents_required"][-1] == "timeline_agent"
+assert "chronological ordering" in plan["special_requirements"]
+assert "query_type=temporal" in plan["optimization_hints"]
+
+# Very short tasks with no features are left to the LLM
+plan, confident = plan_task("hmm")
+assert not confident and plan["estimated_complexity"] == "low"
+
+# Negotiation: the highest-priority agent leads, the rest support at the task's complexity
+negotiation = negotiate_locally(["synthesis_agent", "memory_agent", "insights_agent"], "high")
+assert negotiation["primary_agent"] == "insights_agent"
+assert negotiation["fallback_chain"] == ["insights_agent", "memory_agent", "synthesis_agent"]
+assert negotiation["resource_allocation"] == {"insights_agent": "high", "memory_agent": "high", "synthesis_agent": "high"}
+assert negotiate_locally(["custom_agent", "memory_agent"], "extreme")["resource_allocation"] == {
+    "memory_agent": "high", "custom_agent": "medium"
+}
+assert negotiate_locally([], "low")["primary_agent"] == "memory_agent"
+
+# LLM plans: valid fields are kept, invalid ones fall back to the rule plan
+fallback, _ = plan_task("Answer this query: What recurring themes come up across all meetings?")
+llm_plan = {
+    "task_type": "analysis",
+    "agents_required": ["memory_agent", "made_up_agent"],
+    "execution_strategy": "parallel",
+    "estimated_complexity": 7,
+    "special_requirements": "none",
+    "optimization_hints": ["use cache"]
+}
+sanitized = sanitize_plan(llm_plan, fallback)
+print(f"Sanitized plan: {sanitized}")
+assert sanitized["task_type"] == "analysis" and sanitized["execution_strategy"] == "parallel"
+assert sanitized["agents_required"] == fallback["agents_required"]
+assert sanitized["estimated_complexity"] == fallback["estimated_complexity"]
+assert sanitized["special_requirements"] == fallback["special_requirements"]
+assert sanitized["optimization_hints"] == ["use cache"]
+assert sanitize_plan({"agents_required": []}, fallback)["agents_required"] == fallback["agents_required"]
+assert sanitize_plan(["not", "a", "dict"], fallback) == fallback
+assert sanitize_plan({"agents_required": ["timeline_agent"]}, fallback)["agents_required"] == ["timeline_agent"]
+
+print("\n✅ Query planner working")
@@ -0,0 +1,124 @@
+from google.cloud.firestore_v1.transforms import ArrayUnion, Increment
+import shared.session_store as store_module
+from shared.session_store import SessionStore, _merge
+
+# Offline test: no API keys needed
+
+# Pending writes to one document merge: counters add, appends concatenate, maps merge
+merged = _merge(
+    {"query_count": Increment(1), "queries": ArrayUnion([{"q": 1}]), "stats": {"a": 1, "b": Increment(2)}, "status": "new"},
+    {"query_count": Increment(2), "queries": ArrayUnion([{"q": 2}]), "stats": {"b": Increment(3), "c": 4}, "status": "done"}
+)
+assert merged["query_count"].value == 3
+assert merged["queries"].values == [{"q": 1}, {"q": 2}]
+assert merged["stats"]["a"] == 1 and merged["stats"]["b"].value == 5 and merged["stats"]["c"] == 4
+assert merged["status"] == "done"
+# A plain value replaces a pending transform and vice versa
+assert _merge({"n": Increment(1)}, {"n": 7}) == {"n": 7}
+assert _merge({"n": 7}, {"n": Increment(1)})["n"].value == 1
+
+class Document:
+    def __init__(self, client, path):
+        self.client = client
+        self.path = path
+
+    def collection(self, name):
+        return Collection(self.client, self.path + (name,))
+
+    def set(self, data, merge=False):
+        if self.path in self.client.broken:
+            raise RuntimeError(f"write to {'/'.join(self.path)} rejected")
+        self.client.writes.append((self.path, data))
+
+class Collection:
+    def __init__(self, client, path):
+        self.client = client
+        self.path = path
+
+    def document(self, id):
+        return Document(self.client, self.path + (id,))
+
+class Batch:
+    def __init__(self, client):
+        self.client = client
+        self.sets = []
+
+    def set(self, ref, data, merge=False):
+        self.sets.append((ref, data))
+
+    def commit(self):
+        if any(ref.path in self.client.broken for ref, _ in self.sets):
+            raise RuntimeError("batch rejected")
+        self.client.commits += 1
+        for ref, data in self.sets:
+            ref.set(data, merge=True)
+
+class FakeFirestore:
+    def __init__(self):
+        self.writes = []
+        self.commits = 0
+        self.broken = set()
+
+    def collection(self, name):
+        return Collection(self, (name,))
+
+    def batch(self):
+        return Batch(self)
+
+client = FakeFirestore()
+store_module.firestore_client = client
+store = SessionStore(flush_interval=60)
+
+# Several updates to several sessions cost one commit
+store.save("s1", {"status": "processing"})
+store.record_query("s1", "q1", "what was decided?")
+store.record_query("s1", "q2", "who owns hiring?")
+store.save("s2", {"status": "done"})
+assert store.has_pending(("sessions", "s1"))
+store.flush()
+print(f"Stats after one flush: {store.get_stats()}")
+assert client.commits == 1 and len(client.writes) == 2
+s1 = dict(client.writes)[("sessions", "s1")]
+assert s1["status"] == "processing" and s1["query_count"].value == 2
+assert [q["query_id"] for q in s1["queries"].values] == ["q1", "q2"]
+assert store.get_stats()["pending"] == 0
+
+# A failed batch is retried per document; the failing one is re-queued under newer writes
+client.writes.clear()
+client.broken.add(("sessions", "bad"))
+store.write(("sessions", "bad"), {"count": Increment(1), "status": "old"})
+store.write(("sessions", "ok"), {"status": "fine"})
+try:
+    store.flush()
+    raise AssertionError("expected RuntimeError")
+except RuntimeError as e:
+    print(f"Flush error re-raised: {e}")
+assert client.writes == [(("sessions", "ok"), {"status": "fine"})]
+store.write(("sessions", "bad"), {"count": Increment(2), "status": "new"})
+requeued = store._pending[("sessions", "bad")]
+assert requeued["count"].value == 3 and requeued["status"] == "new"
+
+# Once the document accepts writes the merged data lands in one write
+client.broken.clear()
+store.flush()
+assert client.writes[-1][0] == ("sessions", "bad") and client.writes[-1][1]["count"].value == 3
+assert store.get_stats()["errors"] == 1 and store.get_stats()["dropped"] == 0
+
+# A write that keeps failing is dropped after SESSION_MAX_WRITE_ATTEMPTS flushes
+client.broken.add(("sessions", "doomed"))
+store.write(("sessions", "doomed"), {"status": "never"})
+for _ in range(store_module.SESSION_MAX_WRITE_ATTEMPTS):
+    try:
+        store.flush()
+    except RuntimeError:
+        pass
+assert not store.has_pending(("sessions", "doomed"))
+assert store.get_stats()["dropped"] == 1
+
+# Subcollection paths resolve to nested documents
+store.write(("sessions", "s1", "queries", "q3"), {"query": "next steps?"})
+store.flush()
+assert client.writes[-1][0] == ("sessions", "s1", "queries", "q3")
+assert store.collection_ref(("sessions", "s1", "queries")).path == ("sessions", "s1", "queries")
+
+print("\n✅ Session store working")
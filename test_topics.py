@@ -0,0 +1,80 @@
+import json
+import os
+import tempfile
+import threading
+import numpy as np
+from shared.topics import TopicMap
+
+# Offline test: no API keys needed
+rng = np.random.default_rng(0)
+centers = np.eye(8)[:4] * 5
+
+def vectors(prefix: str, n: int, speaker: str = "Speaker 1") -> list:
+    labels = rng.integers(0, 4, size=n)
+    embeddings = centers[labels] + rng.normal(size=(n, 8)) * 0.3
+    return [{
+        "id": f"{prefix}{i}",
+        "embedding": e.tolist(),
+        "metadata": {"text": f"{prefix} {i}", "speaker": speaker, "file_id": f"file_{prefix}"}
+    } for i, e in enumerate(embeddings)]
+
+class Store:
+    def __init__(self, items, during_scan=None):
+        self.items = items
+        self.during_scan = during_scan
+
+    def iter_vectors(self, batch_size):
+        for start in range(0, len(self.items), 50):
+            yield self.items[start:start + 50]
+            if self.during_scan and start == 0:
+                self.during_scan()
+
+path = tempfile.mkdtemp()
+topics = TopicMap(path)
+assert topics.assign(vectors("early", 5)) == 0  # No-op before the first build
+
+summary = topics.build(Store(vectors("v", 200)), k=4)
+print(f"Built {summary['k']} topics over {summary['total_vectors']} vectors")
+assert summary["total_vectors"] == 200 and sum(t["size"] for t in summary["topics"]) == 200
+assert "assigned_ids" not in json.load(open(os.path.join(path, "topics.json")))
+
+# Duplicate ids (a retried ingest) are skipped
+new = vectors("n", 10, speaker="Speaker 2")
+assert topics.assign(new) == 10
+assert topics.assign(new) == 0
+assert topics.get()["assigned_since_build"] == 10
+assert sum(t["speakers"].get("Speaker 2", 0) for t in topics.get()["topics"]) == 10
+
+# Online centroid update: a centroid moves toward its new members and stays normalized
+before = topics.centroids.copy()
+target = np.zeros(8)
+target[0] = 1
+nearest = int(np.argmax(before @ target))
+topics.assign([{"id": "pull", "embedding": (target + 0.5 * np.eye(8)[7]).tolist(), "metadata": {}}])
+after = topics.centroids
+assert after[nearest] @ np.eye(8)[7] > before[nearest] @ np.eye(8)[7]
+assert np.allclose(np.linalg.norm(after, axis=1), 1.0)
+assert np.allclose(np.delete(after, nearest, axis=0), np.delete(before, nearest, axis=0))
+
+# Saves are debounced; flush() persists them
+topics.flush()
+assert json.load(open(os.path.join(path, "topics.json")))["total_vectors"] == 211
+assert TopicMap(path).get()["total_vectors"] == 211
+
+# Vectors assigned during a build are folded into the new map unless its scan saw them
+stored = vectors("b", 100)
+late = vectors("late", 7)
+
+def ingest_during_scan():
+    # One vector the scan will still reach, and seven it has already passed
+    thread = threading.Thread(target=topics.assign, args=([stored[-1]] + late,))
+    thread.start()
+    thread.join()
+
+summary = topics.build(Store(stored, during_scan=ingest_during_scan), k=4)
+print(f"Rebuilt over {summary['total_vectors']} vectors ({summary['assigned_since_build']} folded in)")
+assert summary["total_vectors"] == 107 and summary["assigned_since_build"] == 7
+assert sum(t["size"] for t in summary["topics"]) == 107
+assert topics.assign(late) == 0
+
+print("\n✅ Topic map working")